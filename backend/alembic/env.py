@@ -0,0 +1,75 @@
+"""Alembicマイグレーション実行環境"""
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.config import settings
+from app.core.database import Base
+import app.models  # noqa: F401  全モデルをメタデータに登録
+
+config = context.config
+
+# アプリから実行する場合は接続が渡される（ログ設定はアプリ側に任せる）
+connectable = config.attributes.get("connection")
+
+if connectable is None and config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+if not config.get_main_option("sqlalchemy.url"):
+    config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+target_metadata = Base.metadata
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def run_migrations_offline() -> None:
+    """SQLを出力するオフラインモード"""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=_is_sqlite(url),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_with_connection(connection) -> None:
+    # SQLiteはALTER TABLEの制約があるため、バッチモードでテーブルを再作成する
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """データベースに接続して実行するオンラインモード"""
+    if connectable is not None:
+        _run_with_connection(connectable)
+        return
+
+    engine = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with engine.connect() as connection:
+        _run_with_connection(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,219 @@
+"""initial schema
+
+既存のモデル定義（create_all で作成していたスキーマ）をベースラインとして作成
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('allowed_emails',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('created_by', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('allowed_emails', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_allowed_emails_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_allowed_emails_id'), ['id'], unique=False)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('supabase_uid', sa.String(), nullable=True),
+    sa.Column('hashed_password', sa.String(), nullable=True),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_supabase_uid'), ['supabase_uid'], unique=True)
+
+    op.create_table('projects',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('start_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('budget', sa.Float(), nullable=False),
+    sa.Column('status', sa.Enum('PLANNING', 'IN_PROGRESS', 'ON_HOLD', 'COMPLETED', 'CANCELLED', name='projectstatus'), nullable=True),
+    sa.Column('manager_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['manager_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_projects_id'), ['id'], unique=False)
+
+    op.create_table('evm_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('pv', sa.Float(), nullable=False),
+    sa.Column('ev', sa.Float(), nullable=False),
+    sa.Column('ac', sa.Float(), nullable=False),
+    sa.Column('sv', sa.Float(), nullable=False),
+    sa.Column('cv', sa.Float(), nullable=False),
+    sa.Column('spi', sa.Float(), nullable=False),
+    sa.Column('cpi', sa.Float(), nullable=False),
+    sa.Column('eac', sa.Float(), nullable=True),
+    sa.Column('etc', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('evm_snapshots', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_evm_snapshots_id'), ['id'], unique=False)
+
+    op.create_table('holidays',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('holiday_type', sa.Enum('WEEKEND', 'NATIONAL', 'COMPANY', 'CUSTOM', name='holidaytype'), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('project_id', 'date', name='uq_project_holiday_date')
+    )
+    with op.batch_alter_table('holidays', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_holidays_date'), ['date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_holidays_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_holidays_project_id'), ['project_id'], unique=False)
+
+    op.create_table('members',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('available_hours_per_week', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('members', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_members_id'), ['id'], unique=False)
+
+    op.create_table('member_skills',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('task_type', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('member_id', 'task_type', name='uix_member_skill')
+    )
+    with op.batch_alter_table('member_skills', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_member_skills_id'), ['id'], unique=False)
+
+    op.create_table('tasks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('predecessor_id', sa.Integer(), nullable=True),
+    sa.Column('assigned_member_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('planned_hours', sa.Float(), nullable=False),
+    sa.Column('actual_hours', sa.Float(), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('hourly_rate', sa.Float(), nullable=False),
+    sa.Column('is_milestone', sa.Boolean(), nullable=False),
+    sa.Column('task_type', sa.String(), nullable=True),
+    sa.Column('sort_order', sa.Integer(), nullable=True),
+    sa.Column('planned_start_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('planned_end_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('actual_start_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('actual_end_date', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['assigned_member_id'], ['members.id'], ),
+    sa.ForeignKeyConstraint(['parent_id'], ['tasks.id'], ),
+    sa.ForeignKeyConstraint(['predecessor_id'], ['tasks.id'], ),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_tasks_id'), ['id'], unique=False)
+
+    op.create_table('costs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=True),
+    sa.Column('cost_type', sa.Enum('LABOR', 'MATERIAL', 'EQUIPMENT', 'OTHER', name='costtype'), nullable=True),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('planned_amount', sa.Float(), nullable=False),
+    sa.Column('actual_amount', sa.Float(), nullable=False),
+    sa.Column('date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('costs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_costs_id'), ['id'], unique=False)
+
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('costs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_costs_id'))
+
+    op.drop_table('costs')
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tasks_id'))
+
+    op.drop_table('tasks')
+    with op.batch_alter_table('member_skills', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_member_skills_id'))
+
+    op.drop_table('member_skills')
+    with op.batch_alter_table('members', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_members_id'))
+
+    op.drop_table('members')
+    with op.batch_alter_table('holidays', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_holidays_project_id'))
+        batch_op.drop_index(batch_op.f('ix_holidays_id'))
+        batch_op.drop_index(batch_op.f('ix_holidays_date'))
+
+    op.drop_table('holidays')
+    with op.batch_alter_table('evm_snapshots', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_evm_snapshots_id'))
+
+    op.drop_table('evm_snapshots')
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_projects_id'))
+
+    op.drop_table('projects')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_supabase_uid'))
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
+    with op.batch_alter_table('allowed_emails', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_allowed_emails_id'))
+        batch_op.drop_index(batch_op.f('ix_allowed_emails_email'))
+
+    op.drop_table('allowed_emails')
@@ -0,0 +1,52 @@
+"""add task indexes
+
+タスク・スナップショット・メンバーの主な検索条件に合わせたインデックスを追加
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('evm_snapshots', schema=None) as batch_op:
+        batch_op.create_index('ix_evm_snapshots_project_date', ['project_id', 'date'], unique=False)
+
+    with op.batch_alter_table('members', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_members_project_id'), ['project_id'], unique=False)
+
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.create_index('ix_tasks_member_start', ['assigned_member_id', 'planned_start_date'], unique=False)
+        batch_op.create_index('ix_tasks_parent_id', ['parent_id'], unique=False)
+        batch_op.create_index('ix_tasks_predecessor_id', ['predecessor_id'], unique=False)
+        batch_op.create_index('ix_tasks_project_parent_start', ['project_id', 'parent_id', 'planned_start_date'], unique=False)
+        batch_op.create_index('ix_tasks_project_start', ['project_id', 'planned_start_date'], unique=False)
+
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_project_start')
+        batch_op.drop_index('ix_tasks_project_parent_start')
+        batch_op.drop_index('ix_tasks_predecessor_id')
+        batch_op.drop_index('ix_tasks_parent_id')
+        batch_op.drop_index('ix_tasks_member_start')
+
+    with op.batch_alter_table('members', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_members_project_id'))
+
+    with op.batch_alter_table('evm_snapshots', schema=None) as batch_op:
+        batch_op.drop_index('ix_evm_snapshots_project_date')
+
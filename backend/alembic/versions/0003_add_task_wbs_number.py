@@ -0,0 +1,32 @@
+"""add task wbs_number
+
+WBSインポートの差分更新でタスクを照合するためのWBS番号を追加
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('wbs_number', sa.String(), nullable=True))
+        batch_op.create_index('ix_tasks_project_wbs_number', ['project_id', 'wbs_number'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('tasks', schema=None) as batch_op:
+        batch_op.drop_index('ix_tasks_project_wbs_number')
+        batch_op.drop_column('wbs_number')
@@ -0,0 +1,36 @@
+"""evm snapshot nullable measurements
+
+過去日の一括作成ではPVのみを記録するため、EV・AC と派生指標をNULL許容に変更
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MEASUREMENT_COLUMNS = ('ev', 'ac', 'sv', 'cv', 'spi', 'cpi')
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('evm_snapshots', schema=None) as batch_op:
+        for column in MEASUREMENT_COLUMNS:
+            batch_op.alter_column(column, existing_type=sa.Float(), nullable=True)
+
+
+def downgrade() -> None:
+    for column in MEASUREMENT_COLUMNS:
+        op.execute(f"UPDATE evm_snapshots SET {column} = 0 WHERE {column} IS NULL")
+    with op.batch_alter_table('evm_snapshots', schema=None) as batch_op:
+        for column in MEASUREMENT_COLUMNS:
+            batch_op.alter_column(column, existing_type=sa.Float(), nullable=False)
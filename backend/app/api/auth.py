@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, clear_token_cache
 from app.models.user import User
 from app.models.allowlist import AllowedEmail
 from app.schemas.auth import (
@@ -66,6 +66,7 @@ def add_to_allowlist(
     db.add(allowed)
     db.commit()
     db.refresh(allowed)
+    clear_token_cache()
     return allowed
 
 
@@ -82,4 +83,5 @@ def remove_from_allowlist(
 
     db.delete(allowed)
     db.commit()
+    clear_token_cache()
     return {"message": "削除しました"}
@@ -1,38 +1,157 @@
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import PlainTextResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import json
 
-from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.database import get_db, get_async_db
+from app.core.auth import get_current_user, get_current_user_async
 from app.models.project import Project
 from app.models.task import Task
 from app.models.member import Member
 from app.models.user import User
 from app.models.evm_snapshot import EVMSnapshot
-from app.schemas.evm import EVMMetrics, EVMSnapshotResponse
+from app.schemas.evm import EVMMetrics, EVMSnapshotResponse, EVMSnapshotBackfillResponse, PVCurveResponse, EVMBreakdownItem
+from app.schemas.member import TASK_TYPE_LABELS
 from app.services.evm_calculator import EVMCalculator
+from app.services.grouped_evm import GroupedEVMCalculator, GROUP_BY_COLUMNS
 
 router = APIRouter(prefix="/evm", tags=["evm"])
 
 
 @router.get("/projects/{project_id}/metrics", response_model=EVMMetrics)
-def get_evm_metrics(
+async def get_evm_metrics(
     project_id: int,
     as_of_date: Optional[datetime] = Query(None, description="計算基準日"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """プロジェクトのEVM指標を計算して取得"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    """
+    プロジェクトのEVM指標を計算して取得
+    読み込みは非同期セッションで行い、計算のみスレッドプールで実行する
+    """
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
 
-    calculator = EVMCalculator(db, project_id)
-    metrics = calculator.calculate_all(as_of_date)
-    return metrics
+    calculator = await EVMCalculator.load(db, project_id)
+    return await run_in_threadpool(calculator.calculate_all, as_of_date)
+
+
+# 日付系列の最大点数（日次で約10年分）
+MAX_SERIES_POINTS = 3660
+
+SERIES_INTERVALS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+
+
+def _build_date_series(project: Project, start_date: Optional[date], end_date: Optional[date], interval: str) -> List[date]:
+    """基準日の系列を作成（省略時はプロジェクト期間）"""
+    if interval not in SERIES_INTERVALS:
+        raise HTTPException(status_code=400, detail="間隔は day または week を指定してください")
+
+    if start_date is None:
+        start_date = project.start_date.date()
+    if end_date is None:
+        end_date = project.end_date.date()
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="開始日は終了日以前である必要があります")
+
+    step = SERIES_INTERVALS[interval]
+    if (end_date - start_date) // step + 1 > MAX_SERIES_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"期間が長すぎます（最大{MAX_SERIES_POINTS}点）"
+        )
+
+    dates = []
+    current = start_date
+    while current <= end_date:
+        dates.append(current)
+        current += step
+    return dates
+
+
+@router.get("/projects/{project_id}/pv-curve", response_model=PVCurveResponse)
+async def get_pv_curve(
+    project_id: int,
+    start_date: Optional[date] = Query(None, description="開始日（省略時はプロジェクト開始日）"),
+    end_date: Optional[date] = Query(None, description="終了日（省略時はプロジェクト終了日）"),
+    interval: str = Query("day", description="間隔: day, week"),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    PVカーブ（基準日ごとのPV）を取得
+    タスクの読み込みは1回のみで、全基準日のPVをまとめて計算する（計算はスレッドプールで実行）
+    """
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
+
+    dates = _build_date_series(project, start_date, end_date, interval)
+
+    calculator = await EVMCalculator.load(db, project_id)
+    pv_values = await run_in_threadpool(calculator.calculate_pv_curve, dates)
+
+    return {
+        "project_id": project_id,
+        "interval": interval,
+        "bac": round(calculator.get_bac(), 2),
+        "points": [
+            {"date": d, "pv": round(pv, 2)}
+            for d, pv in zip(dates, pv_values)
+        ],
+    }
+
+
+@router.get("/projects/{project_id}/breakdown", response_model=List[EVMBreakdownItem])
+async def get_evm_breakdown(
+    project_id: int,
+    group_by: str = Query("member", description="集計単位: member, task_type, parent"),
+    as_of_date: Optional[datetime] = Query(None, description="計算基準日"),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    グループ別のEVM指標を取得（担当者別・タスク種別別・親タスク別）
+    タスクの読み込みは1回のみで、全グループをまとめて集計する（集計はスレッドプールで実行）
+    """
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
+    if group_by not in GROUP_BY_COLUMNS:
+        raise HTTPException(status_code=400, detail="集計単位は member, task_type, parent のいずれかを指定してください")
+
+    calculator = await GroupedEVMCalculator.load(db, project_id, group_by)
+    groups = await run_in_threadpool(calculator.calculate, group_by, as_of_date)
+
+    # グループキーの表示名を取得
+    ids = [k for k in groups if k is not None]
+    if group_by == "member":
+        names = dict((await db.execute(select(Member.id, Member.name).filter(Member.id.in_(ids)))).all()) if ids else {}
+        unassigned = "未割当"
+    elif group_by == "parent":
+        names = dict((await db.execute(select(Task.id, Task.name).filter(Task.id.in_(ids)))).all()) if ids else {}
+        unassigned = "（親タスクなし）"
+    else:
+        names = TASK_TYPE_LABELS
+        unassigned = "未設定"
+
+    return [
+        EVMBreakdownItem(
+            key=None if key is None else str(key),
+            label=unassigned if key is None else names.get(key, str(key)),
+            **group.metrics(),
+        )
+        for key, group in groups.items()
+    ]
 
 
 @router.post("/projects/{project_id}/snapshots", response_model=EVMSnapshotResponse)
@@ -52,39 +171,93 @@ def create_evm_snapshot(
     return snapshot
 
 
+@router.post("/projects/{project_id}/snapshots/backfill", response_model=EVMSnapshotBackfillResponse)
+def backfill_evm_snapshots(
+    project_id: int,
+    start_date: Optional[date] = Query(None, description="開始日（省略時はプロジェクト開始日）"),
+    end_date: Optional[date] = Query(None, description="終了日（省略時は今日）"),
+    interval: str = Query("day", description="間隔: day, week"),
+    overwrite: bool = Query(False, description="期間内のPVのみのスナップショットを置き換えるか"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    過去期間のEVMスナップショットを一括作成
+    PVのみ各日付時点で計算して記録し、EV・ACと派生指標（SV・CV・SPI・CPI）はNULLとする
+    （その時点の進捗・実績は保持していないため、現在の値を過去日に記録しない）
+    既存のスナップショットがある日付はスキップする
+    （overwrite=true の場合はPVのみのスナップショットを置き換え、EV・ACを記録したスナップショットは残す）
+    """
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
+
+    if end_date is None:
+        end_date = min(project.end_date.date(), datetime.now().date())
+    dates = _build_date_series(project, start_date, end_date, interval)
+
+    range_start = datetime.combine(dates[0], datetime.min.time())
+    range_end = datetime.combine(dates[-1] + timedelta(days=1), datetime.min.time())
+    existing_query = db.query(EVMSnapshot).filter(
+        EVMSnapshot.project_id == project_id,
+        EVMSnapshot.date >= range_start,
+        EVMSnapshot.date < range_end,
+    )
+
+    if overwrite:
+        # 置き換えるのは一括作成したPVのみのスナップショットだけ（実測値のあるスナップショットは残す）
+        existing_query.filter(EVMSnapshot.ev.is_(None)).delete(synchronize_session=False)
+        existing_query = existing_query.filter(EVMSnapshot.ev.isnot(None))
+
+    existing_dates = {
+        s[0].date() for s in existing_query.with_entities(EVMSnapshot.date).all()
+    }
+    skipped_count = len([d for d in dates if d in existing_dates])
+    dates = [d for d in dates if d not in existing_dates]
+
+    calculator = EVMCalculator(db, project_id)
+    created_count = calculator.create_snapshots(dates)
+
+    return {
+        "message": f"{created_count}件のスナップショットを作成しました",
+        "created_count": created_count,
+        "skipped_count": skipped_count,
+    }
+
+
 @router.get("/projects/{project_id}/snapshots", response_model=List[EVMSnapshotResponse])
-def get_evm_snapshots(
+async def get_evm_snapshots(
     project_id: int,
     start_date: Optional[datetime] = Query(None, description="開始日"),
     end_date: Optional[datetime] = Query(None, description="終了日"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """プロジェクトのEVMスナップショット履歴を取得"""
-    query = db.query(EVMSnapshot).filter(EVMSnapshot.project_id == project_id)
+    query = select(EVMSnapshot).filter(EVMSnapshot.project_id == project_id)
 
     if start_date:
         query = query.filter(EVMSnapshot.date >= start_date)
     if end_date:
         query = query.filter(EVMSnapshot.date <= end_date)
 
-    snapshots = query.order_by(EVMSnapshot.date).all()
-    return snapshots
+    result = await db.execute(query.order_by(EVMSnapshot.date))
+    return result.scalars().all()
 
 
 @router.get("/projects/{project_id}/analysis")
-def get_evm_analysis(
+async def get_evm_analysis(
     project_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """プロジェクトのEVM分析結果を取得"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    """プロジェクトのEVM分析結果を取得（計算はスレッドプールで実行）"""
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
 
-    calculator = EVMCalculator(db, project_id)
-    metrics = calculator.calculate_all()
+    calculator = await EVMCalculator.load(db, project_id)
+    metrics = await run_in_threadpool(calculator.calculate_all)
 
     # 分析コメント生成
     analysis = {
@@ -254,10 +427,10 @@ def _build_export_data(project, tasks, member_map, metrics, snapshots) -> dict:
             {
                 "date": s.date.strftime("%Y-%m-%d"),
                 "pv": round(s.pv, 2),
-                "ev": round(s.ev, 2),
-                "ac": round(s.ac, 2),
-                "spi": round(s.spi, 3),
-                "cpi": round(s.cpi, 3),
+                "ev": round(s.ev, 2) if s.ev is not None else None,
+                "ac": round(s.ac, 2) if s.ac is not None else None,
+                "spi": round(s.spi, 3) if s.spi is not None else None,
+                "cpi": round(s.cpi, 3) if s.cpi is not None else None,
             }
             for s in snapshots
         ],
@@ -423,7 +596,11 @@ def _to_markdown(data: dict) -> str:
         lines.append("| 日付 | PV | EV | AC | SPI | CPI |")
         lines.append("|------|-----|-----|-----|------|------|")
         for h in data["history"]:
-            lines.append(f"| {h['date']} | {h['pv']}h | {h['ev']}h | {h['ac']}h | {h['spi']:.3f} | {h['cpi']:.3f} |")
+            # PVのみのスナップショット（過去日の一括作成）はEV・ACを「-」で表示
+            if h["ev"] is None:
+                lines.append(f"| {h['date']} | {h['pv']}h | - | - | - | - |")
+            else:
+                lines.append(f"| {h['date']} | {h['pv']}h | {h['ev']}h | {h['ac']}h | {h['spi']:.3f} | {h['cpi']:.3f} |")
         lines.append("")
 
     # 分析用コンテキスト
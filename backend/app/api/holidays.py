@@ -15,6 +15,7 @@ from app.schemas.holiday import (
     HolidayCreate, HolidayUpdate, HolidayResponse,
     HolidayImportRequest, HolidayGenerateRequest
 )
+from app.services.working_calendar import get_working_calendar, invalidate_working_calendar
 
 router = APIRouter(prefix="/holidays", tags=["holidays"])
 
@@ -137,6 +138,7 @@ def create_holiday(
         db.add(db_holiday)
         db.commit()
         db.refresh(db_holiday)
+        invalidate_working_calendar(db_holiday.project_id)
         return db_holiday
     except IntegrityError:
         db.rollback()
@@ -161,6 +163,7 @@ def update_holiday(
 
     db.commit()
     db.refresh(db_holiday)
+    invalidate_working_calendar(db_holiday.project_id)
     return db_holiday
 
 
@@ -175,8 +178,10 @@ def delete_holiday(
     if not db_holiday:
         raise HTTPException(status_code=404, detail="休日が見つかりません")
 
+    project_id = db_holiday.project_id
     db.delete(db_holiday)
     db.commit()
+    invalidate_working_calendar(project_id)
     return {"message": "休日を削除しました"}
 
 
@@ -195,6 +200,7 @@ def delete_all_holidays(
     count = query.count()
     query.delete()
     db.commit()
+    invalidate_working_calendar(project_id)
     return {"message": f"{count}件の休日を削除しました", "deleted_count": count}
 
 
@@ -239,6 +245,7 @@ def import_holidays(
             created.append(db_holiday)
 
     db.commit()
+    invalidate_working_calendar(project_id)
     for h in created:
         db.refresh(h)
 
@@ -322,6 +329,7 @@ async def import_holidays_csv(
             errors.append(f"行{row_num}: {str(e)}")
 
     db.commit()
+    invalidate_working_calendar(project_id)
 
     return {
         "message": "インポートが完了しました",
@@ -389,6 +397,7 @@ def generate_holidays(
         current += timedelta(days=1)
 
     db.commit()
+    invalidate_working_calendar(project_id)
     for h in created:
         db.refresh(h)
 
@@ -403,18 +412,16 @@ def get_working_days_count(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    """期間内の稼働日数を計算"""
+    """期間内の稼働日数を計算（土日祝日を除外）"""
     # 全日数
     total_days = (end_date - start_date).days + 1
 
-    # 休日数
-    holiday_count = db.query(Holiday).filter(
-        Holiday.project_id == project_id,
-        Holiday.date >= start_date,
-        Holiday.date <= end_date
-    ).count()
+    # 稼働日数（EVM計算と同じカレンダーを使用）
+    calendar = get_working_calendar(db, project_id)
+    working_days = calendar.count_working_days(start_date, end_date)
 
-    working_days = total_days - holiday_count
+    # 非稼働日数（土日＋休日）
+    holiday_count = total_days - working_days
 
     return {
         "start_date": start_date.isoformat(),
@@ -1,16 +1,16 @@
-from typing import List, Dict, Set
-from datetime import datetime, timezone, date, timedelta
+from typing import List
+from datetime import datetime, date, timedelta
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func as sql_func
-from collections import defaultdict
+from sqlalchemy import func as sql_func, select
 
-from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.database import get_db, get_async_db
+from app.core.auth import get_current_user, get_current_user_async
 from app.models.member import Member
 from app.models.member_skill import MemberSkill
 from app.models.task import Task
-from app.models.holiday import Holiday
 from app.models.project import Project
 from app.models.user import User
 from app.schemas.member import (
@@ -18,47 +18,47 @@ from app.schemas.member import (
     MemberSkillUpdate, MemberWithSkills, TASK_TYPES,
     DailyUtilization, WeeklyUtilization, MemberUtilizationDetail
 )
+from app.services.grouped_evm import GroupedEVMCalculator, EMPTY_GROUP
+from app.services.utilization import UtilizationEngine, load_assigned_task_rows_async
+from app.services.wbs_import import invalidate_template_cache
+from app.services.working_calendar import WorkingCalendar, get_working_calendar_async
 
 router = APIRouter(prefix="/members", tags=["members"])
 
 
 @router.get("/project/{project_id}", response_model=List[MemberWithUtilization])
-def get_members_by_project(
+async def get_members_by_project(
     project_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """プロジェクトのメンバー一覧を取得（稼働率付き）"""
     # プロジェクト情報を取得
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
 
-    # プロジェクトの休日を取得
-    holidays = db.query(Holiday.date).filter(
-        Holiday.project_id == project_id
-    ).all()
-    holiday_dates: set = {h.date.date() if isinstance(h.date, datetime) else h.date for h in holidays}
+    # プロジェクトの稼働日カレンダーを取得
+    calendar = await get_working_calendar_async(db, project_id)
 
     # プロジェクト期間内の稼働日数を計算
     project_start = project.start_date.date() if isinstance(project.start_date, datetime) else project.start_date
     project_end = project.end_date.date() if isinstance(project.end_date, datetime) else project.end_date
 
-    working_days = 0
-    current = project_start
-    while current <= project_end:
-        if current.weekday() < 5 and current not in holiday_dates:  # 平日かつ休日でない
-            working_days += 1
-        current += timedelta(days=1)
+    working_days = calendar.count_working_days(project_start, project_end)
 
-    members = db.query(Member).filter(Member.project_id == project_id).all()
+    members = (await db.scalars(select(Member).filter(Member.project_id == project_id))).all()
+
+    # アサインされた工数をメンバーごとに1回のクエリで集計
+    assigned_by_member = dict((await db.execute(
+        select(Task.assigned_member_id, sql_func.sum(Task.planned_hours)).filter(
+            Task.assigned_member_id.in_([m.id for m in members])
+        ).group_by(Task.assigned_member_id)
+    )).all())
 
     result = []
     for member in members:
-        # アサインされた工数を集計
-        assigned_hours = db.query(sql_func.sum(Task.planned_hours)).filter(
-            Task.assigned_member_id == member.id
-        ).scalar() or 0
+        assigned_hours = assigned_by_member.get(member.id) or 0
 
         # プロジェクト全期間の稼働可能時間を計算
         # 1日あたりの稼働可能時間 = 週あたり稼働可能時間 / 5
@@ -86,13 +86,13 @@ def get_members_by_project(
 
 
 @router.get("/{member_id}", response_model=MemberResponse)
-def get_member(
+async def get_member(
     member_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """メンバー詳細を取得"""
-    member = db.query(Member).filter(Member.id == member_id).first()
+    member = await db.get(Member, member_id)
     if not member:
         raise HTTPException(status_code=404, detail="メンバーが見つかりません")
     return member
@@ -109,6 +109,9 @@ def create_member(
     db.add(db_member)
     db.commit()
     db.refresh(db_member)
+
+    # WBSテンプレートの担当者リストが変わるため無効化
+    invalidate_template_cache(db_member.project_id)
     return db_member
 
 
@@ -130,6 +133,10 @@ def update_member(
 
     db.commit()
     db.refresh(db_member)
+
+    # WBSテンプレートの担当者リストが変わるため無効化
+    if "name" in update_data:
+        invalidate_template_cache(db_member.project_id)
     return db_member
 
 
@@ -149,27 +156,31 @@ def delete_member(
         {"assigned_member_id": None}
     )
 
+    project_id = db_member.project_id
     db.delete(db_member)
     db.commit()
+
+    # WBSテンプレートの担当者リストが変わるため無効化
+    invalidate_template_cache(project_id)
     return {"message": "メンバーを削除しました"}
 
 
 @router.get("/{member_id}/skills", response_model=List[str])
-def get_member_skills(
+async def get_member_skills(
     member_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """メンバーのスキル（担当可能タスク種別）を取得"""
-    member = db.query(Member).filter(Member.id == member_id).first()
+    member = await db.get(Member, member_id)
     if not member:
         raise HTTPException(status_code=404, detail="メンバーが見つかりません")
 
-    skills = db.query(MemberSkill.task_type).filter(
-        MemberSkill.member_id == member_id
-    ).all()
+    skills = await db.execute(
+        select(MemberSkill.task_type).filter(MemberSkill.member_id == member_id)
+    )
 
-    return [s[0] for s in skills]
+    return skills.scalars().all()
 
 
 @router.put("/{member_id}/skills", response_model=List[str])
@@ -234,14 +245,17 @@ def get_members_with_skills(
 
 
 @router.get("/project/{project_id}/utilization", response_model=List[MemberUtilizationDetail])
-def get_members_utilization(
+async def get_members_utilization(
     project_id: int,
     start_date: str = Query(..., description="開始日 (YYYY-MM-DD)"),
     end_date: str = Query(..., description="終了日 (YYYY-MM-DD)"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """プロジェクトのメンバー稼働率詳細を取得（日毎・週毎）"""
+    """
+    プロジェクトのメンバー稼働率詳細を取得（日毎・週毎）
+    読み込みは非同期セッションで行い、行列計算のみスレッドプールで実行する
+    """
     # 日付をパース
     try:
         start = datetime.strptime(start_date, "%Y-%m-%d").date()
@@ -252,96 +266,53 @@ def get_members_utilization(
     if start > end:
         raise HTTPException(status_code=400, detail="開始日は終了日以前である必要があります")
 
-    # プロジェクトの休日を取得
-    holidays = db.query(Holiday.date).filter(
-        Holiday.project_id == project_id
-    ).all()
-    holiday_dates: Set[date] = {h.date.date() if isinstance(h.date, datetime) else h.date for h in holidays}
-
-    # メンバー一覧を取得
-    members = db.query(Member).filter(Member.project_id == project_id).all()
+    # プロジェクトの稼働日カレンダーを取得
+    calendar = await get_working_calendar_async(db, project_id)
 
-    result = []
-    for member in members:
-        hours_per_day = member.available_hours_per_week / 5  # 週5日稼働として計算
-
-        # メンバーのタスクを取得
-        tasks = db.query(Task).filter(
-            Task.assigned_member_id == member.id,
-            Task.planned_start_date != None,
-            Task.planned_end_date != None
-        ).all()
+    # メンバー一覧と担当タスクをそれぞれ1回のクエリで取得
+    members = (await db.scalars(select(Member).filter(Member.project_id == project_id))).all()
+    rows = await load_assigned_task_rows_async(db, [m.id for m in members])
 
-        # 日毎の稼働時間を計算
-        daily_hours: Dict[date, float] = defaultdict(float)
+    return await run_in_threadpool(_build_utilization_details, calendar, members, rows, start, end)
 
-        for task in tasks:
-            task_start = task.planned_start_date.date() if isinstance(task.planned_start_date, datetime) else task.planned_start_date
-            task_end = task.planned_end_date.date() if isinstance(task.planned_end_date, datetime) else task.planned_end_date
 
-            if task_start is None or task_end is None:
-                continue
+def _build_utilization_details(
+    calendar: WorkingCalendar,
+    members: List[Member],
+    rows: List[tuple],
+    start: date,
+    end: date,
+) -> List[MemberUtilizationDetail]:
+    """メンバー × 日の行列で日毎・週毎の稼働率を一括計算"""
+    member_ids = [m.id for m in members]
+    engine = UtilizationEngine(calendar, start, end)
+    daily_hours = engine.daily_hours(member_ids, rows)
+    weekly_hours = engine.weekly_hours(daily_hours)
+    week_working_days = engine.weekly_working_days()
+    working_dates = [d.strftime("%Y-%m-%d") for d in engine.working_dates()]
+    week_starts = engine.week_starts()
 
-            # タスク期間内の稼働日数を計算
-            working_days = 0
-            current = task_start
-            while current <= task_end:
-                if current.weekday() < 5 and current not in holiday_dates:  # 平日かつ休日でない
-                    working_days += 1
-                current += timedelta(days=1)
-
-            if working_days == 0:
-                continue
-
-            # 1日あたりの工数
-            hours_per_working_day = task.planned_hours / working_days
-
-            # 各日に工数を割り当て
-            current = task_start
-            while current <= task_end:
-                if current.weekday() < 5 and current not in holiday_dates:
-                    if start <= current <= end:
-                        daily_hours[current] += hours_per_working_day
-                current += timedelta(days=1)
+    result = []
+    for i, member in enumerate(members):
+        hours_per_day = member.available_hours_per_week / 5  # 週5日稼働として計算
 
-        # 日毎の稼働率リストを作成
+        # 日毎の稼働率リストを作成（稼働日のみ）
         daily_list = []
-        current = start
-        while current <= end:
-            if current.weekday() < 5 and current not in holiday_dates:  # 稼働日のみ
-                hours = daily_hours.get(current, 0)
-                utilization = (hours / hours_per_day * 100) if hours_per_day > 0 else 0
-                daily_list.append(DailyUtilization(
-                    date=current.strftime("%Y-%m-%d"),
-                    hours=round(hours, 2),
-                    utilization_rate=round(utilization, 1)
-                ))
-            current += timedelta(days=1)
-
-        # 週毎の稼働率を計算
+        for date_str, hours in zip(working_dates, daily_hours[i, engine.working].tolist()):
+            utilization = (hours / hours_per_day * 100) if hours_per_day > 0 else 0
+            daily_list.append(DailyUtilization(
+                date=date_str,
+                hours=round(hours, 2),
+                utilization_rate=round(utilization, 1)
+            ))
+
+        # 週毎の稼働率リストを作成（稼働可能時間は期間内の稼働日のみ）
         weekly_list = []
-        # 開始日を含む週の月曜日を取得
-        week_start = start - timedelta(days=start.weekday())
-        while week_start <= end:
+        for week_start, week_hours, working_days in zip(
+            week_starts, weekly_hours[i].tolist(), week_working_days.tolist()
+        ):
             week_end = week_start + timedelta(days=6)  # 日曜日
-
-            # その週の稼働時間を集計
-            week_hours = 0
-            current = week_start
-            while current <= week_end:
-                if start <= current <= end:
-                    week_hours += daily_hours.get(current, 0)
-                current += timedelta(days=1)
-
-            # その週の稼働可能時間（期間内のみ）
-            week_working_days = 0
-            current = week_start
-            while current <= week_end:
-                if start <= current <= end and current.weekday() < 5 and current not in holiday_dates:
-                    week_working_days += 1
-                current += timedelta(days=1)
-
-            available_hours = week_working_days * hours_per_day
+            available_hours = working_days * hours_per_day
             utilization = (week_hours / available_hours * 100) if available_hours > 0 else 0
 
             weekly_list.append(WeeklyUtilization(
@@ -352,8 +323,6 @@ def get_members_utilization(
                 utilization_rate=round(utilization, 1)
             ))
 
-            week_start += timedelta(days=7)
-
         result.append(MemberUtilizationDetail(
             member_id=member.id,
             member_name=member.name,
@@ -367,77 +336,24 @@ def get_members_utilization(
 
 
 @router.get("/project/{project_id}/evm", response_model=List[MemberEVM])
-def get_members_evm(
+async def get_members_evm(
     project_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """プロジェクトのメンバー別EVM指標を取得（工数ベース）"""
-    members = db.query(Member).filter(Member.project_id == project_id).all()
-    as_of_date = datetime.now(timezone.utc).replace(tzinfo=None)
-
-    result = []
-    for member in members:
-        # メンバーに割り当てられたタスクを取得
-        tasks = db.query(Task).filter(
-            Task.assigned_member_id == member.id
-        ).all()
-
-        # BAC: 計画工数合計
-        bac = sum(t.planned_hours for t in tasks)
-
-        # PV: 計画工数（日割り計算）
-        pv = 0.0
-        for task in tasks:
-            if not task.planned_start_date:
-                pv += task.planned_hours
-                continue
-
-            start = task.planned_start_date.replace(tzinfo=None) if task.planned_start_date.tzinfo else task.planned_start_date
-            end = task.planned_end_date.replace(tzinfo=None) if task.planned_end_date and task.planned_end_date.tzinfo else task.planned_end_date
-
-            if start > as_of_date:
-                continue
-
-            if end and end <= as_of_date:
-                pv += task.planned_hours
-            elif start and end:
-                total_days = (end - start).days + 1
-                elapsed_days = (as_of_date - start).days + 1
-                if total_days > 0:
-                    ratio = min(elapsed_days / total_days, 1.0)
-                    pv += task.planned_hours * ratio
-            else:
-                pv += task.planned_hours
-
-        # EV: 出来高（進捗率加味）
-        ev = sum(t.planned_hours * (t.progress / 100.0) for t in tasks)
-
-        # AC: 実績工数
-        ac = sum(t.actual_hours for t in tasks)
-
-        # 派生指標
-        sv = ev - pv
-        cv = ev - ac
-        spi = ev / pv if pv > 0 else 0.0
-        cpi = ev / ac if ac > 0 else 0.0
-        etc = (bac - ev) / cpi if cpi > 0 else 0.0
-        eac = ac + etc
-
-        result.append(MemberEVM(
+    """
+    プロジェクトのメンバー別EVM指標を取得（工数ベース）
+    PVはプロジェクト全体と同じ稼働日ベースの日割りで計算する（集計はスレッドプールで実行）
+    """
+    members = (await db.scalars(select(Member).filter(Member.project_id == project_id))).all()
+    calculator = await GroupedEVMCalculator.load(db, project_id, "member")
+    groups = await run_in_threadpool(calculator.calculate, "member")
+
+    return [
+        MemberEVM(
             id=member.id,
             name=member.name,
-            task_count=len(tasks),
-            bac=round(bac, 1),
-            pv=round(pv, 1),
-            ev=round(ev, 1),
-            ac=round(ac, 1),
-            sv=round(sv, 1),
-            cv=round(cv, 1),
-            spi=round(spi, 2),
-            cpi=round(cpi, 2),
-            etc=round(etc, 1),
-            eac=round(eac, 1),
-        ))
-
-    return result
+            **groups.get(member.id, EMPTY_GROUP).metrics(),
+        )
+        for member in members
+    ]
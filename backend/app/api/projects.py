@@ -1,47 +1,79 @@
-from typing import List, Optional
+from typing import List, Optional, Dict
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
-from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.database import get_db, get_async_db
+from app.core.auth import get_current_user, get_current_user_async
 from app.models.project import Project, ProjectStatus
 from app.models.task import Task
 from app.models.user import User
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse
+from app.services.evm_totals import invalidate_evm_totals
+from app.services.wbs_import import invalidate_template_cache
+from app.services.working_calendar import invalidate_working_calendar
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
+def _projects_metrics_query(project_ids: List[int]):
+    """GROUP BY project_id の集計1回で全プロジェクトの開始日・終了日・予算を求めるSQL"""
+    return select(
+        Task.project_id,
+        func.min(Task.planned_start_date),
+        func.max(Task.planned_end_date),
+        func.coalesce(func.sum(Task.planned_hours), 0.0),
+    ).filter(
+        Task.project_id.in_(project_ids)
+    ).group_by(Task.project_id)
+
+
+def _projects_metrics_from_rows(project_ids: List[int], rows) -> Dict[int, dict]:
+    """集計結果をプロジェクトIDごとの指標に変換（タスクのないプロジェクトは空の値）"""
+    metrics = {
+        pid: {"start_date": None, "end_date": None, "budget": 0.0}
+        for pid in project_ids
+    }
+    for project_id, start_date, end_date, budget in rows:
+        metrics[project_id] = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "budget": float(budget),
+        }
+    return metrics
+
+
+def calculate_projects_metrics(db: Session, project_ids: List[int]) -> Dict[int, dict]:
+    """複数プロジェクトの開始日・終了日・予算をタスクから一括計算"""
+    if not project_ids:
+        return _projects_metrics_from_rows(project_ids, [])
+    rows = db.execute(_projects_metrics_query(project_ids)).all()
+    return _projects_metrics_from_rows(project_ids, rows)
+
+
+async def calculate_projects_metrics_async(db: AsyncSession, project_ids: List[int]) -> Dict[int, dict]:
+    """calculate_projects_metrics の非同期セッション版"""
+    if not project_ids:
+        return _projects_metrics_from_rows(project_ids, [])
+    rows = (await db.execute(_projects_metrics_query(project_ids))).all()
+    return _projects_metrics_from_rows(project_ids, rows)
+
+
 def calculate_project_metrics(db: Session, project: Project) -> dict:
     """タスクからプロジェクトの開始日・終了日・予算を計算"""
-    tasks = db.query(Task).filter(Task.project_id == project.id).all()
-
-    start_date = None
-    end_date = None
-    budget = 0.0
-
-    if tasks:
-        start_dates = [t.planned_start_date for t in tasks if t.planned_start_date]
-        end_dates = [t.planned_end_date for t in tasks if t.planned_end_date]
-        budget = sum(t.planned_hours for t in tasks)
-
-        if start_dates:
-            start_date = min(start_dates)
-        if end_dates:
-            end_date = max(end_dates)
-
-    return {
-        "start_date": start_date,
-        "end_date": end_date,
-        "budget": budget,
-    }
+    return calculate_projects_metrics(db, [project.id])[project.id]
 
 
-def project_to_response(db: Session, project: Project) -> ProjectResponse:
+def project_to_response(db: Session, project: Project, metrics: Optional[dict] = None) -> ProjectResponse:
     """プロジェクトをレスポンス形式に変換（タスクから計算した値を含む）"""
-    metrics = calculate_project_metrics(db, project)
+    if metrics is None:
+        metrics = calculate_project_metrics(db, project)
+    return _build_project_response(project, metrics)
+
+
+def _build_project_response(project: Project, metrics: dict) -> ProjectResponse:
     return ProjectResponse(
         id=project.id,
         name=project.name,
@@ -57,28 +89,37 @@ def project_to_response(db: Session, project: Project) -> ProjectResponse:
 
 
 @router.get("/", response_model=List[ProjectResponse])
-def get_projects(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_projects(
+    after_id: Optional[int] = Query(None, description="このIDより後のプロジェクトを取得（前ページ最後のID）"),
+    limit: int = Query(100, ge=1, le=1000, description="取得件数"),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """プロジェクト一覧を取得"""
-    projects = db.query(Project).offset(skip).limit(limit).all()
-    return [project_to_response(db, p) for p in projects]
+    """
+    プロジェクト一覧を取得（ID順、キーセットページネーション）
+    次のページは、取得した最後のプロジェクトIDを after_id に指定して取得する
+    """
+    query = select(Project)
+    if after_id is not None:
+        query = query.filter(Project.id > after_id)
+    projects = (await db.scalars(query.order_by(Project.id).limit(limit))).all()
+
+    metrics = await calculate_projects_metrics_async(db, [p.id for p in projects])
+    return [_build_project_response(p, metrics[p.id]) for p in projects]
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(
+async def get_project(
     project_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """プロジェクト詳細を取得"""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
-    return project_to_response(db, project)
+    metrics = await calculate_projects_metrics_async(db, [project.id])
+    return _build_project_response(project, metrics[project.id])
 
 
 @router.post("/", response_model=ProjectResponse)
@@ -139,6 +180,11 @@ def delete_project(
 
     db.delete(db_project)
     db.commit()
+    # 休日・タスク・メンバーもカスケード削除されるためキャッシュを無効化
+    # （SQLiteはIDを再利用するため、新しいプロジェクトに古い内容を返さないようにする）
+    invalidate_working_calendar(project_id)
+    invalidate_evm_totals(project_id)
+    invalidate_template_cache(project_id)
     return {"message": "プロジェクトを削除しました"}
 
 
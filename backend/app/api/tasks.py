@@ -1,6 +1,11 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
+import json
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import func, case, and_, or_
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
@@ -20,13 +25,25 @@ from app.schemas.task import (
     AutoScheduleResponse,
     WBSImportPreviewResponse,
     WBSImportResponse,
+    WBSBulkImportResponse,
     TaskReorderRequest,
     TaskReorderResponse,
     InitCustomOrderResponse,
 )
 from app.services.reschedule import RescheduleService
 from app.services.auto_schedule import AutoScheduleService
-from app.services.wbs_import import WBSImportService
+from app.services.wbs_import import (
+    WBSImportService,
+    FILE_FORMATS,
+    FILE_MEDIA_TYPES,
+    IMPORT_MODES,
+    content_digest,
+    import_file_format,
+    iter_file_chunks,
+    list_sheet_names,
+    parse_wbs_sheets,
+)
+from app.services.evm_totals import invalidate_evm_totals
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
@@ -37,17 +54,18 @@ def update_project_status(db: Session, project_id: int):
     if not project:
         return
 
-    tasks = db.query(Task).filter(Task.project_id == project_id).all()
+    # タスク件数をSQLで集計（全タスクを読み込まない）
+    total_tasks, completed_tasks, in_progress_tasks, started_tasks = db.query(
+        func.count(Task.id),
+        func.coalesce(func.sum(case((Task.progress >= 100, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((and_(Task.progress > 0, Task.progress < 100), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((or_(Task.actual_start_date.isnot(None), Task.progress > 0), 1), else_=0)), 0),
+    ).filter(Task.project_id == project_id).one()
 
-    if not tasks:
+    if not total_tasks:
         # タスクがない場合は計画中のまま
         return
 
-    total_tasks = len(tasks)
-    completed_tasks = len([t for t in tasks if t.progress >= 100])
-    in_progress_tasks = len([t for t in tasks if 0 < t.progress < 100])
-    started_tasks = len([t for t in tasks if t.actual_start_date is not None or t.progress > 0])
-
     # ステータス判定ロジック
     if completed_tasks == total_tasks:
         # 全タスク完了 → 完了
@@ -71,22 +89,15 @@ def update_project_dates(db: Session, project_id: int):
     if not project:
         return
 
-    tasks = db.query(Task).filter(Task.project_id == project_id).all()
-
-    if not tasks:
-        return
-
-    # タスクの予定開始日・終了日を収集
-    start_dates = [t.planned_start_date for t in tasks if t.planned_start_date]
-    end_dates = [t.planned_end_date for t in tasks if t.planned_end_date]
+    # 最も早い開始日と最も遅い終了日をSQLで算出
+    earliest_start, latest_end = db.query(
+        func.min(Task.planned_start_date),
+        func.max(Task.planned_end_date),
+    ).filter(Task.project_id == project_id).one()
 
-    if not start_dates or not end_dates:
+    if not earliest_start or not latest_end:
         return
 
-    # 最も早い開始日と最も遅い終了日を算出
-    earliest_start = min(start_dates)
-    latest_end = max(end_dates)
-
     # プロジェクト期間を更新
     updated = False
     if project.start_date != earliest_start:
@@ -136,6 +147,9 @@ def create_task(
     db.commit()
     db.refresh(db_task)
 
+    # EVM集計値を無効化（次の参照時にSQLで集計し直す）
+    invalidate_evm_totals(db_task.project_id)
+
     # プロジェクトステータスと期間を自動更新
     update_project_status(db, db_task.project_id)
     update_project_dates(db, db_task.project_id)
@@ -162,6 +176,9 @@ def update_task(
     db.commit()
     db.refresh(db_task)
 
+    # EVM集計値を無効化（次の参照時にSQLで集計し直す）
+    invalidate_evm_totals(db_task.project_id)
+
     # プロジェクトステータスと期間を自動更新
     update_project_status(db, db_task.project_id)
     update_project_dates(db, db_task.project_id)
@@ -188,6 +205,9 @@ def update_task_progress(
     db.commit()
     db.refresh(db_task)
 
+    # EVM集計値を無効化（次の参照時にSQLで集計し直す）
+    invalidate_evm_totals(db_task.project_id)
+
     # プロジェクトステータスを自動更新
     update_project_status(db, db_task.project_id)
 
@@ -209,6 +229,9 @@ def delete_task(
     db.delete(db_task)
     db.commit()
 
+    # EVM集計値を無効化（次の参照時にSQLで集計し直す）
+    invalidate_evm_totals(project_id)
+
     # プロジェクトステータスと期間を自動更新
     update_project_status(db, project_id)
     update_project_dates(db, project_id)
@@ -338,12 +361,14 @@ def execute_auto_schedule(
 @router.get("/project/{project_id}/template")
 def download_wbs_template(
     project_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     WBSインポート用Excelテンプレートをダウンロード
     プロジェクトのメンバー情報を含むテンプレートを生成
+    内容はメンバー名ごとにキャッシュし、ETagが一致する場合は304を返す
     """
     # プロジェクト存在確認
     project = db.query(Project).filter(Project.id == project_id).first()
@@ -351,13 +376,61 @@ def download_wbs_template(
         raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
 
     service = WBSImportService(db, project_id)
-    excel_content = service.generate_template()
+    etag, content = service.get_template()
+    etag_header = f'"{etag}"'
+    headers = {
+        "ETag": etag_header,
+        # キャッシュしたテンプレートは毎回ETagで再検証させる
+        "Cache-Control": "private, no-cache",
+    }
 
-    return StreamingResponse(
-        excel_content,
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {value.strip().removeprefix("W/") for value in if_none_match.split(",")}
+        if etag_header in candidates or "*" in candidates:
+            return Response(status_code=304, headers=headers)
+
+    return Response(
+        content,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={
-            "Content-Disposition": f"attachment; filename=wbs_template_{project_id}.xlsx"
+            **headers,
+            "Content-Disposition": f"attachment; filename=wbs_template_{project_id}.xlsx",
+        }
+    )
+
+
+@router.get("/project/{project_id}/export-excel")
+def export_wbs_excel(
+    project_id: int,
+    format: str = "xlsx",
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    プロジェクトのタスクをWBSインポートと同じ形式でエクスポート
+    format は xlsx（既定）・csv・parquet（列構成はいずれもインポートと同じ）
+    一時ファイルに書き出し、一定サイズずつストリーミングで返す
+    """
+    # プロジェクト存在確認
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
+
+    if format not in FILE_FORMATS:
+        raise HTTPException(status_code=400, detail="出力形式は xlsx・csv・parquet のいずれかを指定してください")
+
+    service = WBSImportService(db, project_id)
+    if format == "xlsx":
+        output = service.export_tasks()
+    else:
+        output = service.export_frame(format)
+
+    return StreamingResponse(
+        iter_file_chunks(output),
+        media_type=FILE_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f"attachment; filename=wbs_export_{project_id}.{format}"
         }
     )
 
@@ -379,17 +452,18 @@ async def preview_wbs_import(
         raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
 
     # ファイル形式チェック
-    if not file.filename or not file.filename.endswith(('.xlsx', '.xls')):
+    file_format = import_file_format(file.filename)
+    if file_format is None:
         raise HTTPException(
             status_code=400,
-            detail="Excelファイル（.xlsx, .xls）をアップロードしてください"
+            detail="Excel（.xlsx, .xls）・CSV（.csv）・Parquet（.parquet）ファイルをアップロードしてください"
         )
 
-    # ファイル内容を読み込み
-    content = await file.read()
+    # アップロードは一時ファイルに保存されているため、メモリに読み込まずに先頭から読む
+    await file.seek(0)
 
     service = WBSImportService(db, project_id)
-    result = service.preview(content)
+    result = await run_in_threadpool(service.preview, file.file, file_format)
 
     return result
 
@@ -397,31 +471,62 @@ async def preview_wbs_import(
 @router.post("/project/{project_id}/import-excel", response_model=WBSImportResponse)
 async def execute_wbs_import(
     project_id: int,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    import_token: Optional[str] = Form(None),
+    mode: str = Form("replace", description="replace: 全削除→再作成, diff: WBS番号で照合して差分のみ反映"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
     WBSインポート実行
-    既存のタスクを全て削除し、Excelからタスクを一括作成
+    mode=replace は既存のタスクを全て削除し、Excelからタスクを一括作成
+    mode=diff はWBS番号で既存のタスクと照合し、追加・変更・削除のあったタスクのみ反映
+    （既存タスクの進捗・実績工数は保持される）
+    ファイルはExcelのほか、同じ列構成のCSV・Parquetも受け付ける
+    プレビューで返された import_token を渡すと、プレビュー時のパース結果を使う
+    （ファイルも渡した場合、内容がプレビュー時と異なるかキャッシュにない場合はファイルをパースする。
+    import_token のみでキャッシュにない場合は410を返す）
     """
     # プロジェクト存在確認
     project = db.query(Project).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="プロジェクトが見つかりません")
 
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail="インポート方式は replace または diff を指定してください")
+
     # ファイル形式チェック
-    if not file.filename or not file.filename.endswith(('.xlsx', '.xls')):
+    file_format = import_file_format(file.filename) if file is not None else None
+    if file is not None and file_format is None:
         raise HTTPException(
             status_code=400,
-            detail="Excelファイル（.xlsx, .xls）をアップロードしてください"
+            detail="Excel（.xlsx, .xls）・CSV（.csv）・Parquet（.parquet）ファイルをアップロードしてください"
         )
 
-    # ファイル内容を読み込み
-    content = await file.read()
-
     service = WBSImportService(db, project_id)
-    result = service.execute_import(content)
+    result = None
+    if import_token and file is not None:
+        # プレビュー後に別のファイルを選び直した場合はプレビュー時のパース結果を使わない
+        await file.seek(0)
+        if await run_in_threadpool(content_digest, file.file) != import_token:
+            import_token = None
+
+    if import_token:
+        result = await run_in_threadpool(service.execute_cached_import, import_token, mode=mode)
+
+    if result is None:
+        if file is None:
+            raise HTTPException(
+                status_code=410,
+                detail="プレビューの有効期限が切れました。再度プレビューを実行してください"
+            )
+
+        # アップロードは一時ファイルに保存されているため、メモリに読み込まずに先頭から読む
+        await file.seek(0)
+        result = await run_in_threadpool(service.execute_import, file.file, mode=mode, file_format=file_format)
+
+    # タスクを一括で置き換えるためEVM集計値を無効化
+    invalidate_evm_totals(project_id)
 
     # インポート成功時はプロジェクト期間を更新
     if result["success"]:
@@ -431,6 +536,112 @@ async def execute_wbs_import(
     return result
 
 
+@router.post("/import-excel/bulk", response_model=WBSBulkImportResponse)
+async def execute_wbs_bulk_import(
+    file: UploadFile = File(...),
+    sheet_projects: Optional[str] = Form(
+        None,
+        description='シート名→プロジェクトIDのJSON（例: {"サブA": 1}）。省略時はプロジェクト名と同名のシートが対象',
+    ),
+    mode: str = Form("replace", description="replace: 全削除→再作成, diff: WBS番号で照合して差分のみ反映"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    複数シートのWBS一括インポート
+    シートごとに対応するプロジェクトへインポートする（シートのパースはプロセスプールで並列に行う）
+    コミットはプロジェクト単位で、エラーのあるシートのプロジェクトは変更しない
+    """
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail="インポート方式は replace または diff を指定してください")
+
+    # ファイル形式チェック
+    if not file.filename or not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(
+            status_code=400,
+            detail="Excelファイル（.xlsx, .xls）をアップロードしてください"
+        )
+
+    requested: Optional[Dict[str, int]] = None
+    if sheet_projects:
+        try:
+            requested = json.loads(sheet_projects)
+            if not isinstance(requested, dict):
+                raise ValueError
+            requested = {str(sheet): int(project_id) for sheet, project_id in requested.items()}
+        except (ValueError, TypeError):
+            raise HTTPException(
+                status_code=400,
+                detail="シートとプロジェクトの対応は {\"シート名\": プロジェクトID} の形式で指定してください"
+            )
+
+    # 各プロセスがパスから読み込めるよう一時ファイルに保存
+    with tempfile.NamedTemporaryFile(suffix=".xlsx") as tmp:
+        await file.seek(0)
+        await run_in_threadpool(shutil.copyfileobj, file.file, tmp)
+        tmp.flush()
+
+        try:
+            sheet_names = await run_in_threadpool(list_sheet_names, tmp.name)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # シートとプロジェクトの対応
+        sheet_to_project: Dict[str, Project] = {}
+        if requested is not None:
+            projects = {
+                p.id: p for p in db.query(Project).filter(Project.id.in_(set(requested.values())))
+            }
+            for sheet, project_id in requested.items():
+                if sheet not in sheet_names:
+                    raise HTTPException(status_code=400, detail=f"シート「{sheet}」が見つかりません")
+                if project_id not in projects:
+                    raise HTTPException(status_code=404, detail=f"プロジェクト（ID: {project_id}）が見つかりません")
+                sheet_to_project[sheet] = projects[project_id]
+        else:
+            projects_by_name = {
+                p.name: p for p in db.query(Project).filter(Project.name.in_(sheet_names))
+            }
+            for sheet in sheet_names:
+                if sheet in projects_by_name:
+                    sheet_to_project[sheet] = projects_by_name[sheet]
+
+        if not sheet_to_project:
+            raise HTTPException(status_code=400, detail="インポート対象のシートがありません")
+        if len({p.id for p in sheet_to_project.values()}) < len(sheet_to_project):
+            raise HTTPException(status_code=400, detail="同じプロジェクトに複数のシートが指定されています")
+
+        parsed = await run_in_threadpool(parse_wbs_sheets, tmp.name, list(sheet_to_project))
+
+    # プロジェクトごとにコミット
+    results = []
+    for sheet, project in sheet_to_project.items():
+        tasks, parse_errors = parsed[sheet]
+        service = WBSImportService(db, project.id)
+        result = await run_in_threadpool(service.import_parsed, tasks, parse_errors, mode=mode)
+
+        # タスクを一括で置き換えるためEVM集計値を無効化
+        invalidate_evm_totals(project.id)
+
+        # インポート成功時はプロジェクト期間を更新
+        if result["success"]:
+            update_project_dates(db, project.id)
+            update_project_status(db, project.id)
+
+        results.append({
+            **result,
+            "sheet_name": sheet,
+            "project_id": project.id,
+            "project_name": project.name,
+        })
+
+    return {
+        "success": all(r["success"] for r in results),
+        "results": results,
+        "skipped_sheets": [sheet for sheet in sheet_names if sheet not in sheet_to_project],
+    }
+
+
 # デフォルトソートのための定数（フロントエンドと同期）
 TASK_TYPE_ORDER = {
     'requirements': 0,
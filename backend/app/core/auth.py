@@ -1,16 +1,19 @@
 from typing import Optional
 import logging
+import threading
 import urllib.request
 import json
 
 import jwt
-from jwt import PyJWKClient
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, get_async_db
+from app.core.jwks import JWKSKeyStore, JWKSUnavailableError
+from app.core.token_cache import TokenCache
 from app.models.user import User
 from app.models.allowlist import AllowedEmail
 
@@ -19,30 +22,61 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer()
 optional_security = HTTPBearer(auto_error=False)
 
-# JWKSクライアントをキャッシュ
-_jwks_client: Optional[PyJWKClient] = None
+# JWKSキーストア（起動時にローカルから読み込み、バックグラウンドで更新）
+jwks_store = JWKSKeyStore(
+    jwks_url=f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json" if settings.SUPABASE_URL else None,
+    cache_file=settings.SUPABASE_JWKS_FILE,
+    refresh_interval_seconds=settings.JWKS_REFRESH_INTERVAL_SECONDS,
+    fetch_timeout_seconds=settings.JWKS_FETCH_TIMEOUT_SECONDS,
+)
 
+# 検証済みトークン → ユーザー（セッションから切り離したコピー）のキャッシュ
+# 許可リストの変更時は clear_token_cache でバージョンを進めて全件破棄する
+_token_cache: TokenCache[User] = TokenCache(
+    max_size=settings.TOKEN_CACHE_SIZE,
+    max_ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+_token_cache_version = 0
+_token_cache_lock = threading.Lock()
 
-def get_jwks_client() -> PyJWKClient:
-    """SupabaseのJWKSクライアントを取得（キャッシュ付き）"""
-    global _jwks_client
-    if _jwks_client is None:
-        if not settings.SUPABASE_URL:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="SUPABASE_URL が設定されていません",
-            )
-        jwks_url = f"{settings.SUPABASE_URL}/auth/v1/.well-known/jwks.json"
-        _jwks_client = PyJWKClient(jwks_url)
-    return _jwks_client
+
+def clear_token_cache() -> None:
+    """検証済みトークンのキャッシュを破棄（許可リストの追加・削除後に呼ぶ）"""
+    global _token_cache_version
+    with _token_cache_lock:
+        _token_cache_version += 1
+        _token_cache.clear()
+
+
+def _token_cache_current_version() -> int:
+    """トークンキャッシュの現在のバージョン（ユーザー照会の前に取得する）"""
+    with _token_cache_lock:
+        return _token_cache_version
+
+
+def _detached_copy(user: User) -> User:
+    """キャッシュ用に、どのセッションにも属さないユーザーのコピーを作成"""
+    copy = User(**{c.key: getattr(user, c.key) for c in User.__table__.columns})
+    make_transient_to_detached(copy)
+    return copy
+
+
+def _cache_user(token: str, payload: dict, user: User, version: int) -> None:
+    """
+    検証・許可リストチェック済みのユーザーをトークンの有効期限までキャッシュ
+    照会中に許可リストが変更された場合（バージョンが進んだ場合）はキャッシュしない
+    """
+    copy = _detached_copy(user)
+    with _token_cache_lock:
+        if _token_cache_version == version:
+            _token_cache.set(token, copy, payload.get("exp"))
 
 
 def verify_supabase_token(token: str) -> dict:
     """SupabaseのJWTトークンを検証（JWKS使用）"""
     try:
         # JWKSから公開鍵を取得してES256で検証
-        jwks_client = get_jwks_client()
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        signing_key = jwks_store.get_signing_key(token)
 
         payload = jwt.decode(
             token,
@@ -64,6 +98,14 @@ def verify_supabase_token(token: str) -> dict:
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"無効なトークンです: {str(e)}",
         )
+    except JWKSUnavailableError as e:
+        logger.error(f"JWKS unavailable: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="認証用の公開鍵を取得できません。しばらくしてから再度お試しください",
+            # 鍵のローテーション直後は次の取得（最短間隔ごと）で解消する
+            headers={"Retry-After": str(int(jwks_store.min_refetch_seconds))},
+        )
     except Exception as e:
         logger.error(f"Token verification error: {str(e)}")
         raise HTTPException(
@@ -72,14 +114,8 @@ def verify_supabase_token(token: str) -> dict:
         )
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-) -> User:
-    """現在のユーザーを取得（許可リストチェック含む）"""
-    token = credentials.credentials
-    payload = verify_supabase_token(token)
-
+def _resolve_user(db: Session, payload: dict) -> User:
+    """検証済みトークンのペイロードからユーザーを取得（許可リストチェック含む）"""
     email = payload.get("email")
     supabase_uid = payload.get("sub")
 
@@ -125,6 +161,41 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db),
+) -> User:
+    """現在のユーザーを取得（許可リストチェック含む）"""
+    token = credentials.credentials
+    cached = _token_cache.get(token)
+    if cached is not None:
+        # キャッシュ済みのユーザーをSQLを発行せずにセッションに紐付ける
+        return db.merge(cached, load=False)
+
+    version = _token_cache_current_version()
+    payload = verify_supabase_token(token)
+    user = _resolve_user(db, payload)
+    _cache_user(token, payload, user, version)
+    return user
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db),
+) -> User:
+    """現在のユーザーを取得（非同期エンドポイント用、スレッドプールを使わない）"""
+    token = credentials.credentials
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    version = _token_cache_current_version()
+    payload = verify_supabase_token(token)
+    user = await db.run_sync(_resolve_user, payload)
+    _cache_user(token, payload, user, version)
+    return user
+
+
 def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
     db: Session = Depends(get_db),
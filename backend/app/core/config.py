@@ -10,6 +10,25 @@ class Settings(BaseSettings):
     # データベース
     DATABASE_URL: str = "sqlite:///./evm.db"
 
+    # 接続プール（PostgreSQL等）
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # 接続待ちのタイムアウト（秒）
+    DB_POOL_RECYCLE: int = 1800  # 接続の再作成間隔（秒）
+
+    # SQLiteチューニング（接続ごとのPRAGMA）
+    # メモリ256MBのVM向け: ページキャッシュは同期・非同期の2エンジン × 最大接続数ぶん確保されるため
+    # 接続数はダッシュボードの同時リクエスト（5〜8件）を待たせずに受けられるだけ確保し、
+    # 接続あたりのキャッシュを小さくして 2 × (5 + 10) × 1MiB = 30MiB、mmapは接続間で共有され32MiBまで
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 32 * 1024 * 1024  # メモリマップサイズ（バイト、接続間で共有）
+    SQLITE_CACHE_SIZE_KB: int = 1024  # 接続あたりのページキャッシュ（KiB）
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # ロック待ちのタイムアウト（ミリ秒）
+    SQLITE_POOL_SIZE: int = 5  # エンジンごとの接続数
+    SQLITE_MAX_OVERFLOW: int = 10
+    SQLITE_MEMORY_BUDGET_MB: int = 64  # 上記の合計の上限（超える設定は起動時に警告）
+
     # JWT認証（レガシー、Supabase移行後は不要）
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
@@ -19,6 +38,27 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = ""
     SUPABASE_JWT_SECRET: str = ""
 
+    # JWKS（JWT検証用の公開鍵）
+    SUPABASE_JWKS_JSON: str = ""  # JWKSのJSON（テスト・ベンチマーク用のローカル鍵など）
+    SUPABASE_JWKS_FILE: str = ""  # 起動時に読み込み、取得した鍵を保存するファイル
+    JWKS_REFRESH_INTERVAL_SECONDS: int = 3600  # バックグラウンドでの再取得間隔（秒）
+    JWKS_FETCH_TIMEOUT_SECONDS: float = 5  # 取得のタイムアウト（秒）
+
+    # 検証済みトークンのキャッシュ（署名検証と許可リスト照会を省略）
+    TOKEN_CACHE_SIZE: int = 1024  # 最大件数（0で無効）
+    TOKEN_CACHE_TTL_SECONDS: int = 300  # 最大保持時間（トークンの有効期限が先に来ればそちら）
+
+    # WBSインポートのプレビュー結果のキャッシュ（実行時の再パースを省略）
+    WBS_IMPORT_CACHE_SIZE: int = 8  # 最大件数（0で無効）
+    WBS_IMPORT_CACHE_TTL_SECONDS: int = 1800  # 最大保持時間（秒）
+    WBS_IMPORT_CACHE_MAX_ROWS: int = 50000  # 保持するタスクの合計行数の上限（メモリ使用量を抑える）
+    WBS_IMPORT_MAX_WORKERS: int = 2  # 複数シートの一括インポートでシートを並列にパースするプロセス数
+
+    # EVMスナップショット定期作成（進行中のプロジェクトが対象）
+    SNAPSHOT_SCHEDULER_ENABLED: bool = False
+    SNAPSHOT_INTERVAL_MINUTES: int = 1440  # 作成間隔（分）
+    SNAPSHOT_BATCH_SIZE: int = 20  # 1回のコミットで処理するプロジェクト数
+
     # CORS設定（カンマ区切りで複数指定可能）
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000,https://wbs-evm-frontend.fly.dev"
 
@@ -1,16 +1,143 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # SQLite用
-)
+logger = logging.getLogger(__name__)
+
+
+def is_sqlite_url(url: str) -> bool:
+    """SQLiteの接続URLかどうかを判定"""
+    return url.startswith("sqlite")
+
+
+def _is_sqlite_memory_url(url: str) -> bool:
+    """SQLiteのインメモリDBかどうかを判定（接続ごとに別DBになるためプール設定を変えない）"""
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    SQLiteの接続ごとのPRAGMA設定（connectイベントで呼ぶ）
+    WALで読み込みと書き込みを並行させ、ロック待ちはbusy_timeoutで吸収する
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # 負の値はKiB単位の指定
+        cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}")
+    finally:
+        cursor.close()
+
+
+def sqlite_memory_budget_bytes() -> int:
+    """
+    SQLiteが確保しうるメモリの上限（バイト）
+    ページキャッシュは同期・非同期の2エンジンの全接続ぶん、mmapは接続間で共有されるため1回ぶん
+    """
+    connections_per_engine = settings.SQLITE_POOL_SIZE + settings.SQLITE_MAX_OVERFLOW
+    cache_bytes = 2 * connections_per_engine * settings.SQLITE_CACHE_SIZE_KB * 1024
+    return cache_bytes + settings.SQLITE_MMAP_SIZE
+
+
+def check_sqlite_memory_budget(url: str) -> bool:
+    """SQLiteのプール・キャッシュ設定がメモリ予算に収まるかを確認（超える場合は警告）"""
+    if not is_sqlite_url(url):
+        return True
+    required = sqlite_memory_budget_bytes()
+    budget = settings.SQLITE_MEMORY_BUDGET_MB * 1024 * 1024
+    if required > budget:
+        logger.warning(
+            f"SQLite settings may use up to {required // (1024 * 1024)}MiB "
+            f"(budget: {settings.SQLITE_MEMORY_BUDGET_MB}MiB); "
+            "lower SQLITE_POOL_SIZE, SQLITE_MAX_OVERFLOW, SQLITE_CACHE_SIZE_KB or SQLITE_MMAP_SIZE"
+        )
+        return False
+    return True
+
+
+def _engine_options(url: str) -> dict:
+    """
+    接続URLに応じたエンジン設定（プロファイル）
+    - SQLite: 読み込み用の接続プール（PRAGMAはconnectイベントで設定）
+    - PostgreSQL等: プールサイズ・再接続の設定
+    """
+    if is_sqlite_url(url):
+        options = {"connect_args": {"check_same_thread": False}}
+        if not _is_sqlite_memory_url(url):
+            options.update(
+                pool_size=settings.SQLITE_POOL_SIZE,
+                max_overflow=settings.SQLITE_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+            )
+        return options
+
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def create_db_engine(url: str) -> Engine:
+    """接続URLに応じたプロファイルでエンジンを作成"""
+    db_engine = create_engine(url, **_engine_options(url))
+    if is_sqlite_url(url):
+        event.listen(db_engine, "connect", set_sqlite_pragmas)
+    return db_engine
+
+
+# 非同期エンジンで使用するドライバー
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """同期用の接続URLを非同期ドライバーのURLに変換（sqlite → sqlite+aiosqlite 等）"""
+    parsed = make_url(url)
+    # ドライバーが明示されている場合（postgresql+psycopg2 等）も置き換える
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    """接続URLに応じたプロファイルで非同期エンジンを作成"""
+    options = _engine_options(url)
+    if is_sqlite_url(url) and not _is_sqlite_memory_url(url):
+        # aiosqliteの既定はNullPoolのため、接続（とページキャッシュ）を再利用するプールを指定
+        options["poolclass"] = AsyncAdaptedQueuePool
+    db_engine = create_async_engine(to_async_url(url), **options)
+    if is_sqlite_url(url):
+        event.listen(db_engine.sync_engine, "connect", set_sqlite_pragmas)
+    return db_engine
+
+
+engine = create_db_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 読み込みが中心のエンドポイント用（スレッドプールを使わずに同時接続を処理する）
+async_engine = create_async_db_engine(settings.DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -21,3 +148,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """非同期データベースセッションの依存性注入"""
+    async with AsyncSessionLocal() as db:
+        yield db
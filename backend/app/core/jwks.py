@@ -0,0 +1,249 @@
+"""JWKS（JWT検証用の公開鍵セット）の保持と更新"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Dict, Optional, Set, Tuple
+
+import jwt
+from jwt import PyJWK, PyJWKSet
+
+logger = logging.getLogger(__name__)
+
+# 取得待ちとして保持する未知の kid の上限（不正な kid を大量に送られても増え続けないようにする）
+MAX_PENDING_KIDS = 16
+
+
+class JWKSUnavailableError(Exception):
+    """検証に使える鍵がない場合のエラー"""
+
+
+class JWKSKeyStore:
+    """
+    JWKSキーストア
+
+    鍵は起動時にファイル・環境変数から読み込み、ネットワークからの取得は
+    バックグラウンドで定期的に行う。リクエスト処理中はネットワークを待たず、
+    鍵が未読み込みの場合や未知の kid（鍵のローテーション）を受け取った場合は
+    バックグラウンドでの取得を要求するだけ（取得の間隔は最短間隔で制限）
+    未知の kid は取得が済むまで再試行可能なエラー（JWKSUnavailableError）とし、
+    取得後も見つからない場合に不正なトークンとして扱う
+    """
+
+    def __init__(
+        self,
+        jwks_url: Optional[str] = None,
+        cache_file: Optional[str] = None,
+        refresh_interval_seconds: float = 3600,
+        fetch_timeout_seconds: float = 5,
+        min_refetch_seconds: float = 60,
+    ):
+        self.jwks_url = jwks_url or None
+        self.cache_file = cache_file or None
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.fetch_timeout_seconds = fetch_timeout_seconds
+        self.min_refetch_seconds = min_refetch_seconds
+
+        self._keys: Dict[Optional[str], PyJWK] = {}
+        self._last_fetch = 0.0
+        self._fetch_lock = threading.Lock()
+        # 次の取得を待っている未知の kid と、取得後も見つからなかった kid
+        self._pending_kids: Set[Optional[str]] = set()
+        self._rejected_kids: Set[Optional[str]] = set()
+        self._kids_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._refresh_requested: Optional[asyncio.Event] = None
+
+    @property
+    def has_keys(self) -> bool:
+        return bool(self._keys)
+
+    def load_jwks(self, jwks: dict) -> int:
+        """JWKS（{"keys": [...]}）を読み込んで鍵を差し替え、読み込んだ鍵の数を返す"""
+        key_set = PyJWKSet.from_dict(jwks)
+        # 参照中のリクエストに影響しないよう辞書ごと差し替える
+        self._keys = {key.key_id: key for key in key_set.keys}
+        return len(self._keys)
+
+    def load_json(self, text: str) -> int:
+        """JSON文字列からJWKSを読み込み"""
+        return self.load_jwks(json.loads(text))
+
+    def load_file(self, path: str) -> int:
+        """ファイルからJWKSを読み込み"""
+        with open(path, encoding="utf-8") as f:
+            return self.load_json(f.read())
+
+    def _save_cache_file(self, text: str) -> None:
+        """取得したJWKSをファイルに保存（次回起動時にネットワークを待たずに使う）"""
+        directory = os.path.dirname(os.path.abspath(self.cache_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".jwks-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+
+    def fetch(self) -> int:
+        """ネットワークからJWKSを取得して鍵を差し替え"""
+        if not self.jwks_url:
+            raise JWKSUnavailableError("JWKSの取得先URLが設定されていません")
+
+        requested_at = time.monotonic()
+        with self._fetch_lock:
+            # ロック待ちの間に他のスレッドが取得した場合は再取得しない
+            if self._last_fetch >= requested_at:
+                return len(self._keys)
+            try:
+                with urllib.request.urlopen(self.jwks_url, timeout=self.fetch_timeout_seconds) as response:
+                    text = response.read().decode("utf-8")
+            finally:
+                self._last_fetch = time.monotonic()
+            count = self.load_json(text)
+            self._settle_pending_kids()
+
+        if self.cache_file:
+            try:
+                self._save_cache_file(text)
+            except OSError as e:
+                logger.warning(f"Failed to save JWKS cache file: {e}")
+        logger.info(f"Fetched {count} JWKS keys")
+        return count
+
+    def _settle_pending_kids(self) -> None:
+        """取得後、取得待ちだった kid のうち見つからなかったものを不正な kid として記録"""
+        keys = self._keys
+        with self._kids_lock:
+            self._rejected_kids = {kid for kid in self._pending_kids if kid not in keys}
+            self._pending_kids = set()
+
+    def _is_refresh_pending(self, kid: Optional[str]) -> bool:
+        """未知の kid を次の取得待ちとして扱うか（取得後も見つからなかった kid はFalse）"""
+        if self._task is None:
+            # バックグラウンドでの取得をしない場合は待っても見つからない
+            return False
+        with self._kids_lock:
+            if kid in self._rejected_kids:
+                return False
+            if kid not in self._pending_kids:
+                if len(self._pending_kids) >= MAX_PENDING_KIDS:
+                    return False
+                self._pending_kids.add(kid)
+            return True
+
+    def load_initial(self, jwks_json: Optional[str] = None) -> None:
+        """起動時の読み込み（環境変数のJSON → キャッシュファイルの順）"""
+        try:
+            if jwks_json:
+                self.load_json(jwks_json)
+            elif self.cache_file and os.path.exists(self.cache_file):
+                self.load_file(self.cache_file)
+        except (OSError, ValueError, jwt.PyJWKError) as e:
+            logger.warning(f"Failed to load local JWKS: {e}")
+        if self.has_keys:
+            logger.info(f"Loaded {len(self._keys)} JWKS keys from local source")
+
+    def _find_key(self, kid: Optional[str]) -> Optional[PyJWK]:
+        keys = self._keys
+        if kid in keys:
+            return keys[kid]
+        # kid のないトークンは鍵が1つの場合のみ受け付ける
+        if kid is None and len(keys) == 1:
+            return next(iter(keys.values()))
+        return None
+
+    def get_signing_key(self, token: str) -> PyJWK:
+        """
+        トークンのヘッダーの kid に対応する鍵を取得
+        ネットワークからは取得しない（鍵がなければバックグラウンドでの取得を要求してエラー）
+        未知の kid は、鍵のローテーション直後であれば次の取得で見つかるため、
+        取得が済むまでは JWKSUnavailableError（503）とし、取得後も見つからなければ InvalidTokenError（401）
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._find_key(kid)
+        if key is not None:
+            return key
+
+        if not self.has_keys:
+            self.request_refresh()
+            raise JWKSUnavailableError("JWKSの鍵が読み込まれていません")
+
+        if self._is_refresh_pending(kid):
+            self.request_refresh()
+            raise JWKSUnavailableError(f"署名鍵を取得中です: {kid}")
+        raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+
+    def request_refresh(self) -> None:
+        """バックグラウンドでの取得を要求（どのスレッドからも呼べる）"""
+        loop, event = self._loop, self._refresh_requested
+        if loop is None or event is None:
+            return
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            # イベントループの終了後
+            pass
+
+    def start_background_refresh(self) -> None:
+        """バックグラウンドでの定期取得を開始（イベントループ上で呼ぶ）"""
+        if self._task is None and self.jwks_url:
+            self._loop = asyncio.get_running_loop()
+            self._refresh_requested = asyncio.Event()
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_background_refresh(self) -> None:
+        """バックグラウンドでの定期取得を停止"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+            self._refresh_requested = None
+
+    async def _refresh_loop(self) -> None:
+        """
+        起動直後と一定間隔ごとにJWKSを取得（失敗時は保持中の鍵を使い続ける）
+        取得が要求された場合は、前回の取得から最短間隔が経過していれば次の定期取得を待たずに取得する
+        """
+        while True:
+            self._refresh_requested.clear()
+            try:
+                await asyncio.to_thread(self.fetch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"JWKS refresh failed: {e}")
+
+            await asyncio.sleep(min(self.min_refetch_seconds, self.refresh_interval_seconds))
+            try:
+                await asyncio.wait_for(
+                    self._refresh_requested.wait(),
+                    timeout=max(self.refresh_interval_seconds - self.min_refetch_seconds, 0),
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+def generate_local_jwks(kid: str = "local") -> Tuple[object, dict]:
+    """
+    テスト・ベンチマーク用のES256鍵ペアとJWKSを生成
+    秘密鍵で jwt.encode(payload, private_key, algorithm="ES256", headers={"kid": kid}) として署名する
+    """
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from jwt.algorithms import ECAlgorithm
+
+    private_key = ec.generate_private_key(ec.SECP256R1())
+    jwk = json.loads(ECAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "ES256", "use": "sig"})
+    return private_key, {"keys": [jwk]}
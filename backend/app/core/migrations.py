@@ -0,0 +1,43 @@
+"""Alembicによるデータベーススキーマの管理"""
+
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from app.core.database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# create_all で作成されていた既存スキーマに相当するリビジョン
+BASELINE_REVISION = "0001"
+
+
+def get_alembic_config() -> Config:
+    """alembic.ini を読み込んだ設定を取得（作業ディレクトリに依存しない）"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    return config
+
+
+def run_migrations(engine: Engine = default_engine) -> None:
+    """
+    データベースを最新のスキーマに更新
+    マイグレーション導入前に create_all で作成されたデータベースは
+    ベースラインとして記録してから差分のみ適用する
+    """
+    config = get_alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+
+        tables = set(inspect(connection).get_table_names())
+        if "alembic_version" not in tables and "projects" in tables:
+            logger.info(f"Stamping existing database as revision {BASELINE_REVISION}")
+            command.stamp(config, BASELINE_REVISION)
+
+        command.upgrade(config, "head")
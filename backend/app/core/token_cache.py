@@ -0,0 +1,96 @@
+"""検証済みJWTトークンのキャッシュ（署名検証と許可リスト・ユーザー照会の省略用）"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def hash_token(token: str) -> str:
+    """トークンのキャッシュキー（トークン自体はメモリに保持しない）"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache(Generic[T]):
+    """
+    有効期限付きLRUキャッシュ
+
+    キーはトークンのSHA-256ハッシュ
+    エントリはトークンの exp か最大TTLの早い方で失効し、
+    件数（max_weight 指定時は重みの合計も）が上限を超えると最も古く使われたエントリから削除する
+    """
+
+    def __init__(self, max_size: int, max_ttl_seconds: float, max_weight: Optional[float] = None):
+        self.max_size = max_size
+        self.max_ttl_seconds = max_ttl_seconds
+        self.max_weight = max_weight
+        self._entries: "OrderedDict[str, Tuple[float, T, float]]" = OrderedDict()
+        self._total_weight = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[T]:
+        """有効なエントリを取得（失効済み・未登録はNone）"""
+        key = hash_token(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, weight = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._total_weight -= weight
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, token: str, value: T, exp: Optional[float] = None, weight: float = 1) -> bool:
+        """
+        エントリを登録（exp はトークンの有効期限のUNIX時刻、weight はエントリの重み）
+        登録しなかった場合（無効・期限切れ・重みが上限超過）はFalse
+        """
+        if self.max_size <= 0:
+            return False
+        if self.max_weight is not None and weight > self.max_weight:
+            return False
+        now = time.time()
+        expires_at = now + self.max_ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return False
+
+        key = hash_token(token)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_weight -= previous[2]
+            self._entries[key] = (expires_at, value, weight)
+            self._total_weight += weight
+            while len(self._entries) > self.max_size or (
+                self.max_weight is not None and self._total_weight > self.max_weight
+            ):
+                _, (_, _, evicted_weight) = self._entries.popitem(last=False)
+                self._total_weight -= evicted_weight
+        return True
+
+    def delete(self, token: str) -> None:
+        """エントリを削除"""
+        key = hash_token(token)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_weight -= entry[2]
+
+    def clear(self) -> None:
+        """全エントリを削除（許可リスト変更時など）"""
+        with self._lock:
+            self._entries.clear()
+            self._total_weight = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -1,12 +1,43 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.auth import jwks_store
+from app.core.database import check_sqlite_memory_budget
+from app.core.migrations import run_migrations
 from app.api import projects, tasks, evm, members, holidays, auth
+from app.services.snapshot_scheduler import SnapshotScheduler
+from app.services.wbs_import import shutdown_parse_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動・終了時の処理"""
+    # データベースを最新のスキーマに更新
+    run_migrations()
+    check_sqlite_memory_budget(settings.DATABASE_URL)
+
+    # JWT検証用の鍵をローカルから読み込み、ネットワークからの取得はバックグラウンドで行う
+    jwks_store.load_initial(settings.SUPABASE_JWKS_JSON)
+    jwks_store.start_background_refresh()
+
+    scheduler = None
+    if settings.SNAPSHOT_SCHEDULER_ENABLED:
+        scheduler = SnapshotScheduler(
+            interval_minutes=settings.SNAPSHOT_INTERVAL_MINUTES,
+            batch_size=settings.SNAPSHOT_BATCH_SIZE,
+        )
+        scheduler.start()
+
+    yield
+
+    if scheduler is not None:
+        await scheduler.stop()
+    await jwks_store.stop_background_refresh()
+    shutdown_parse_executor()
 
-# データベーステーブルを作成
-Base.metadata.create_all(bind=engine)
 
 # FastAPIアプリケーション
 app = FastAPI(
@@ -15,6 +46,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS設定
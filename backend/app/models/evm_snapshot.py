@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -15,17 +15,18 @@ class EVMSnapshot(Base):
     date = Column(DateTime(timezone=True), nullable=False)
 
     # EVM基本指標
+    # 過去日の一括作成ではPVのみを記録し、EV・ACと派生指標はNULL（その時点の進捗・実績は保持していないため）
     pv = Column(Float, nullable=False, default=0)  # Planned Value（計画価値）
-    ev = Column(Float, nullable=False, default=0)  # Earned Value（出来高）
-    ac = Column(Float, nullable=False, default=0)  # Actual Cost（実コスト）
+    ev = Column(Float, nullable=True)  # Earned Value（出来高）
+    ac = Column(Float, nullable=True)  # Actual Cost（実コスト）
 
     # EVM差異指標
-    sv = Column(Float, nullable=False, default=0)  # Schedule Variance（SV = EV - PV）
-    cv = Column(Float, nullable=False, default=0)  # Cost Variance（CV = EV - AC）
+    sv = Column(Float, nullable=True)  # Schedule Variance（SV = EV - PV）
+    cv = Column(Float, nullable=True)  # Cost Variance（CV = EV - AC）
 
     # EVM効率指標
-    spi = Column(Float, nullable=False, default=0)  # Schedule Performance Index（SPI = EV / PV）
-    cpi = Column(Float, nullable=False, default=0)  # Cost Performance Index（CPI = EV / AC）
+    spi = Column(Float, nullable=True)  # Schedule Performance Index（SPI = EV / PV）
+    cpi = Column(Float, nullable=True)  # Cost Performance Index（CPI = EV / AC）
 
     # 予測指標
     eac = Column(Float, nullable=True)  # Estimate at Completion
@@ -35,3 +36,8 @@ class EVMSnapshot(Base):
 
     # リレーション
     project = relationship("Project", back_populates="evm_snapshots")
+
+    # プロジェクト別のスナップショット履歴・最新日の取得
+    __table_args__ = (
+        Index("ix_evm_snapshots_project_date", "project_id", "date"),
+    )
@@ -11,7 +11,7 @@ class Member(Base):
     __tablename__ = "members"
 
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     available_hours_per_week = Column(Float, nullable=False, default=40)  # 週あたり稼働可能時間
     created_at = Column(DateTime(timezone=True), server_default=func.now())
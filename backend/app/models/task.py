@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -35,6 +35,9 @@ class Task(Base):
     # カスタム並び順
     sort_order = Column(Integer, nullable=True)
 
+    # WBS番号（Excelインポートの差分更新で照合に使用）
+    wbs_number = Column(String, nullable=True)
+
     # 予定スケジュール
     planned_start_date = Column(DateTime(timezone=True), nullable=True)
     planned_end_date = Column(DateTime(timezone=True), nullable=True)
@@ -51,3 +54,18 @@ class Task(Base):
     parent = relationship("Task", remote_side=[id], foreign_keys=[parent_id], backref="children")
     predecessor = relationship("Task", remote_side=[id], foreign_keys=[predecessor_id], backref="successors")
     assigned_member = relationship("Member", back_populates="assigned_tasks")
+
+    # 主な検索条件に合わせたインデックス
+    __table_args__ = (
+        # プロジェクト内の同階層タスクを開始日順に取得（リスケジュール対象の抽出など）
+        Index("ix_tasks_project_parent_start", "project_id", "parent_id", "planned_start_date"),
+        # プロジェクト内のタスクを開始日順に取得
+        Index("ix_tasks_project_start", "project_id", "planned_start_date"),
+        # 子タスク・後続タスクの取得
+        Index("ix_tasks_parent_id", "parent_id"),
+        Index("ix_tasks_predecessor_id", "predecessor_id"),
+        # 担当者別の集計（稼働率・メンバー別EVM）
+        Index("ix_tasks_member_start", "assigned_member_id", "planned_start_date"),
+        # WBSインポートの差分更新での照合
+        Index("ix_tasks_project_wbs_number", "project_id", "wbs_number"),
+    )
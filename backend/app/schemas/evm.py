@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, date
+from typing import Optional, List
 from pydantic import BaseModel
 
 
@@ -24,15 +24,54 @@ class EVMSnapshotResponse(BaseModel):
     project_id: int
     date: datetime
     pv: float
-    ev: float
-    ac: float
-    sv: float
-    cv: float
-    spi: float
-    cpi: float
+    # 過去日の一括作成で作成したスナップショットはPVのみ（以下はNone）
+    ev: Optional[float] = None
+    ac: Optional[float] = None
+    sv: Optional[float] = None
+    cv: Optional[float] = None
+    spi: Optional[float] = None
+    cpi: Optional[float] = None
     eac: Optional[float] = None
     etc: Optional[float] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class EVMSnapshotBackfillResponse(BaseModel):
+    """EVMスナップショット一括作成結果"""
+    message: str
+    created_count: int
+    skipped_count: int
+
+
+class PVCurvePoint(BaseModel):
+    """PVカーブの1点"""
+    date: date
+    pv: float  # Planned Value
+
+
+class PVCurveResponse(BaseModel):
+    """PVカーブレスポンススキーマ"""
+    project_id: int
+    interval: str  # day / week
+    bac: float  # Budget at Completion
+    points: List[PVCurvePoint]
+
+
+class EVMBreakdownItem(BaseModel):
+    """グループ別EVM指標（工数ベース）"""
+    key: Optional[str] = None  # グループキー（メンバーID・タスク種別・親タスクID、未設定はNone）
+    label: str  # 表示名
+    task_count: int = 0
+    bac: float = 0  # Budget at Completion
+    pv: float = 0   # Planned Value
+    ev: float = 0   # Earned Value
+    ac: float = 0   # Actual Cost
+    sv: float = 0   # Schedule Variance
+    cv: float = 0   # Cost Variance
+    spi: float = 0  # Schedule Performance Index
+    cpi: float = 0  # Cost Performance Index
+    etc: float = 0  # Estimate to Complete
+    eac: float = 0  # Estimate at Completion
@@ -13,6 +13,7 @@ class TaskBase(BaseModel):
     is_milestone: bool = False  # 固定日付タスク（リスケジュール対象外）
     task_type: Optional[str] = None  # タスク種別（フェーズ）
     sort_order: Optional[int] = None  # カスタム並び順
+    wbs_number: Optional[str] = None  # WBS番号（Excelインポートでの照合用）
     # 予定スケジュール
     planned_start_date: Optional[datetime] = None
     planned_end_date: Optional[datetime] = None
@@ -40,6 +41,7 @@ class TaskUpdate(BaseModel):
     is_milestone: Optional[bool] = None  # 固定日付タスク
     task_type: Optional[str] = None  # タスク種別（フェーズ）
     sort_order: Optional[int] = None  # カスタム並び順
+    wbs_number: Optional[str] = None  # WBS番号
     planned_start_date: Optional[datetime] = None
     planned_end_date: Optional[datetime] = None
     actual_start_date: Optional[datetime] = None
@@ -182,6 +184,8 @@ class WBSImportPreviewResponse(BaseModel):
     errors: List[WBSImportError]
     tasks: List[WBSImportPreviewTask]
     total_count: int
+    import_token: Optional[str] = None  # インポート実行時に渡すとExcelの再パースを省略
+    diff_unavailable_reason: Optional[str] = None  # 差分更新（mode=diff）できない場合の理由
 
 
 class WBSImportResponse(BaseModel):
@@ -190,6 +194,24 @@ class WBSImportResponse(BaseModel):
     message: str
     errors: List[WBSImportError]
     imported_count: int
+    # 差分更新（mode=diff）時の内訳
+    inserted_count: int = 0
+    updated_count: int = 0
+    deleted_count: int = 0
+
+
+class WBSBulkImportSheetResult(WBSImportResponse):
+    """複数シート一括インポートのシートごとの結果"""
+    sheet_name: str
+    project_id: int
+    project_name: str
+
+
+class WBSBulkImportResponse(BaseModel):
+    """複数シート一括インポート実行結果"""
+    success: bool
+    results: List[WBSBulkImportSheetResult]
+    skipped_sheets: List[str] = []  # 対応するプロジェクトがないシート
 
 
 # タスク並び順関連スキーマ
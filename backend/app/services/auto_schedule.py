@@ -1,12 +1,12 @@
-from datetime import datetime, date, timedelta
-from typing import List, Set, Optional, Dict, Any
+from datetime import datetime, date
+from typing import List, Optional, Dict, Any
 from math import ceil
 from sqlalchemy.orm import Session
 
 from app.models.task import Task
 from app.models.member import Member
 from app.models.member_skill import MemberSkill
-from app.models.holiday import Holiday
+from app.services.working_calendar import WorkingCalendar, get_working_calendar
 
 
 class AutoScheduleService:
@@ -15,26 +15,13 @@ class AutoScheduleService:
     def __init__(self, db: Session, project_id: int):
         self.db = db
         self.project_id = project_id
-        self._holiday_dates: Optional[Set[date]] = None
+        self._calendar: Optional[WorkingCalendar] = None
 
-    def _get_holiday_dates(self) -> Set[date]:
-        """休日セットを取得（キャッシュ）"""
-        if self._holiday_dates is None:
-            holidays = self.db.query(Holiday.date).filter(
-                Holiday.project_id == self.project_id
-            ).all()
-            self._holiday_dates = {h[0] for h in holidays}
-        return self._holiday_dates
-
-    def _is_non_working_day(self, target_date: date) -> bool:
-        """指定日が非稼働日（土日または休日）かどうかを判定"""
-        # 土曜日(5)または日曜日(6)
-        if target_date.weekday() >= 5:
-            return True
-        # 休日カレンダーに登録されている日
-        if target_date in self._get_holiday_dates():
-            return True
-        return False
+    def _get_calendar(self) -> WorkingCalendar:
+        """プロジェクトの稼働日カレンダーを取得（キャッシュ）"""
+        if self._calendar is None:
+            self._calendar = get_working_calendar(self.db, self.project_id)
+        return self._calendar
 
     def _to_date(self, dt: Any) -> Optional[date]:
         """datetimeまたはdateをdateに変換"""
@@ -62,30 +49,11 @@ class AutoScheduleService:
         days=1の場合は同日、days=2の場合は翌稼働日
         土日祝日を除外した稼働日で計算
         """
-        if days <= 0:
-            return start_date
-
-        current = start_date
-        remaining = days - 1  # 開始日を含むので-1
-
-        # 開始日が非稼働日（土日または休日）の場合は次の稼働日を探す
-        while self._is_non_working_day(current):
-            current += timedelta(days=1)
-
-        # 残りの稼働日を加算
-        while remaining > 0:
-            current += timedelta(days=1)
-            if not self._is_non_working_day(current):
-                remaining -= 1
-
-        return current
+        return self._get_calendar().add_working_days(start_date, days)
 
     def get_next_working_day(self, current_date: date) -> date:
         """次の稼働日を取得（土日祝日を除外）"""
-        next_day = current_date + timedelta(days=1)
-        while self._is_non_working_day(next_day):
-            next_day += timedelta(days=1)
-        return next_day
+        return self._get_calendar().next_working_day(current_date)
 
     def _get_members_for_task_type(self, task_type: str) -> List[Member]:
         """指定タスク種別を担当可能なメンバーを取得"""
@@ -233,8 +201,7 @@ class AutoScheduleService:
                     task_start = predecessor_next
 
             # 土日祝日を考慮して開始日を調整
-            while self._is_non_working_day(task_start):
-                task_start += timedelta(days=1)
+            task_start = self._get_calendar().roll_forward(task_start)
 
             # 所要日数を計算
             task_days = self.calculate_task_days(task.planned_hours, hours_per_day)
@@ -1,59 +1,88 @@
-from datetime import datetime, timezone, date, timedelta
-from typing import Optional, Set
+from datetime import datetime, timezone, date, time
+from typing import Optional, List, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.project import Project
 from app.models.task import Task
 from app.models.evm_snapshot import EVMSnapshot
-from app.models.holiday import Holiday
+from app.services.evm_totals import EVMTotals, get_evm_totals, get_evm_totals_async
+from app.services.pv_engine import PlannedValueEngine
+from app.services.working_calendar import WorkingCalendar, get_working_calendar, get_working_calendar_async
 
 
 class EVMCalculator:
     """EVM（アーンドバリューマネジメント）計算エンジン"""
 
-    def __init__(self, db: Session, project_id: int):
+    def __init__(self, db: Optional[Session], project_id: int):
         self.db = db
         self.project_id = project_id
-        self._holiday_dates: Optional[Set[date]] = None
+        self._calendar: Optional[WorkingCalendar] = None
+        self._task_rows: Optional[List[Tuple]] = None
+        self._pv_engine: Optional[PlannedValueEngine] = None
+        self._totals: Optional[EVMTotals] = None
 
-    def _get_holiday_dates(self) -> Set[date]:
-        """プロジェクトの休日日付セットを取得（キャッシュ）"""
-        if self._holiday_dates is None:
-            holidays = self.db.query(Holiday.date).filter(
-                Holiday.project_id == self.project_id
-            ).all()
-            self._holiday_dates = {h[0] for h in holidays}
-        return self._holiday_dates
+    @classmethod
+    async def load(cls, db: AsyncSession, project_id: int) -> "EVMCalculator":
+        """
+        非同期セッションで計算に必要なデータ（タスク列・集計値・カレンダー）を読み込んだ計算エンジンを作成
+        以降の計算はDBにアクセスしないため、スレッドプールで実行できる（保存系のメソッドは使えない）
+        """
+        calculator = cls(None, project_id)
+        calculator._task_rows = (await db.execute(calculator._task_rows_query())).all()
+        calculator._totals = await get_evm_totals_async(db, project_id)
+        calculator._calendar = await get_working_calendar_async(db, project_id)
+        return calculator
+
+    def _task_rows_query(self):
+        """PV計算に必要なタスク列（ORMオブジェクトを生成せず、必要な列のみ）"""
+        return select(
+            Task.planned_hours,
+            Task.planned_start_date,
+            Task.planned_end_date,
+        ).filter(
+            Task.project_id == self.project_id
+        )
+
+    def _get_task_rows(self) -> List[Tuple]:
+        """PV計算に必要なタスク列を1クエリで取得（キャッシュ）"""
+        if self._task_rows is None:
+            self._task_rows = self.db.execute(self._task_rows_query()).all()
+        return self._task_rows
+
+    def _get_totals(self) -> EVMTotals:
+        """BAC・EV・ACの集計値を取得（タスク書き込み時に差分更新されるストアから）"""
+        if self._totals is None:
+            self._totals = get_evm_totals(self.db, self.project_id)
+        return self._totals
+
+    def _get_calendar(self) -> WorkingCalendar:
+        """プロジェクトの稼働日カレンダーを取得（キャッシュ）"""
+        if self._calendar is None:
+            self._calendar = get_working_calendar(self.db, self.project_id)
+        return self._calendar
 
     def _is_non_working_day(self, target_date: date) -> bool:
         """指定日が非稼働日（土日または休日）かどうかを判定"""
-        # 土曜日(5)または日曜日(6)
-        if target_date.weekday() >= 5:
-            return True
-        # 休日カレンダーに登録されている日
-        if target_date in self._get_holiday_dates():
-            return True
-        return False
+        return self._get_calendar().is_non_working_day(target_date)
 
     def _count_working_days(self, start_date: date, end_date: date) -> int:
         """期間内の稼働日数を計算（土日祝日を除外）"""
-        working_days = 0
-        current = start_date
-        while current <= end_date:
-            if not self._is_non_working_day(current):
-                working_days += 1
-            current += timedelta(days=1)
-        return working_days
+        return self._get_calendar().count_working_days(start_date, end_date)
 
     def _count_elapsed_working_days(self, start_date: date, as_of_date: date) -> int:
         """開始日から基準日までの経過稼働日数を計算（土日祝日を除外）"""
-        working_days = 0
-        current = start_date
-        while current <= as_of_date:
-            if not self._is_non_working_day(current):
-                working_days += 1
-            current += timedelta(days=1)
-        return working_days
+        return self._get_calendar().count_working_days(start_date, as_of_date)
+
+    def _get_pv_engine(self) -> PlannedValueEngine:
+        """PV計算エンジンを取得（キャッシュ）"""
+        if self._pv_engine is None:
+            self._pv_engine = PlannedValueEngine.from_rows(
+                self._get_calendar(),
+                self._get_task_rows(),
+            )
+        return self._pv_engine
 
     def calculate_pv(self, as_of_date: Optional[datetime] = None) -> float:
         """
@@ -68,92 +97,25 @@ class EVMCalculator:
         if as_of_date.tzinfo is not None:
             as_of_date = as_of_date.replace(tzinfo=None)
 
-        as_of_date_only = as_of_date.date()
+        return float(self._get_pv_engine().curve([as_of_date.date()])[0])
 
-        # 全タスクを取得
-        tasks = self.db.query(Task).filter(
-            Task.project_id == self.project_id
-        ).all()
-
-        def to_naive(dt):
-            """タイムゾーン情報を取り除く"""
-            if dt is None:
-                return None
-            if dt.tzinfo is not None:
-                return dt.replace(tzinfo=None)
-            return dt
-
-        def to_date(dt) -> Optional[date]:
-            """datetimeをdateに変換"""
-            if dt is None:
-                return None
-            if isinstance(dt, date) and not isinstance(dt, datetime):
-                return dt
-            return dt.date()
-
-        pv = 0.0
-        for task in tasks:
-            # 予定日が設定されていない場合は計画工数全体を含める
-            if not task.planned_start_date:
-                pv += task.planned_hours
-                continue
-
-            start = to_date(to_naive(task.planned_start_date))
-            end = to_date(to_naive(task.planned_end_date))
-
-            # 予定開始日がまだ来ていない場合はスキップ
-            if start > as_of_date_only:
-                continue
-
-            if end and end <= as_of_date_only:
-                # タスク完了予定日を過ぎている場合は100%
-                pv += task.planned_hours
-            elif start and end:
-                # 期間中の場合は稼働日ベースで日割り計算
-                total_working_days = self._count_working_days(start, end)
-                elapsed_working_days = self._count_elapsed_working_days(start, as_of_date_only)
-                # end日を超えないようにする
-                elapsed_working_days = min(elapsed_working_days, total_working_days)
-
-                if total_working_days > 0:
-                    ratio = elapsed_working_days / total_working_days
-                    pv += task.planned_hours * ratio
-            else:
-                # 終了日が設定されていない場合は全体を含める
-                pv += task.planned_hours
-
-        return pv
+    def calculate_pv_curve(self, as_of_dates: List[date]) -> List[float]:
+        """複数の基準日のPVをまとめて計算（PVカーブ）"""
+        return self._get_pv_engine().curve(as_of_dates).tolist()
 
     def calculate_ev(self) -> float:
         """
         EV（Earned Value / 出来高）を計算
         計画工数 × 進捗率の合計（工数ベース）
         """
-        tasks = self.db.query(Task).filter(
-            Task.project_id == self.project_id
-        ).all()
-
-        ev = 0.0
-        for task in tasks:
-            # 計画工数 × 進捗率
-            ev += task.planned_hours * (task.progress / 100.0)
-
-        return ev
+        return self._get_totals().ev
 
     def calculate_ac(self) -> float:
         """
         AC（Actual Cost / 実績工数）を計算
         実績工数の合計（工数ベース）
         """
-        tasks = self.db.query(Task).filter(
-            Task.project_id == self.project_id
-        ).all()
-
-        ac = 0.0
-        for task in tasks:
-            ac += task.actual_hours
-
-        return ac
+        return self._get_totals().ac
 
     def calculate_sv(self, ev: float, pv: float) -> float:
         """SV（Schedule Variance / スケジュール差異）= EV - PV"""
@@ -187,29 +149,14 @@ class EVMCalculator:
 
     def get_bac(self) -> float:
         """BAC（Budget at Completion / 計画総工数）を取得"""
-        tasks = self.db.query(Task).filter(
-            Task.project_id == self.project_id
-        ).all()
-
-        bac = 0.0
-        for task in tasks:
-            bac += task.planned_hours
-
-        return bac
+        return self._get_totals().bac
 
-    def calculate_all(self, as_of_date: Optional[datetime] = None) -> dict:
-        """全EVM指標を計算"""
-        if as_of_date is None:
-            as_of_date = datetime.now(timezone.utc)
-
-        pv = self.calculate_pv(as_of_date)
-        ev = self.calculate_ev()
-        ac = self.calculate_ac()
+    def _build_metrics(self, as_of_date: datetime, pv: float, ev: float, ac: float, bac: float) -> dict:
+        """基本指標から派生指標を計算して指標一式を作成"""
         sv = self.calculate_sv(ev, pv)
         cv = self.calculate_cv(ev, ac)
         spi = self.calculate_spi(ev, pv)
         cpi = self.calculate_cpi(ev, ac)
-        bac = self.get_bac()
         etc = self.calculate_etc(bac, ev, cpi)
         eac = self.calculate_eac(ac, etc)
 
@@ -227,26 +174,76 @@ class EVMCalculator:
             "eac": round(eac, 2),
         }
 
+    def calculate_all(self, as_of_date: Optional[datetime] = None) -> dict:
+        """
+        全EVM指標を計算
+        BAC・EV・ACは集計ストアから取得し、タスクの読み込みはPV計算の1回のみ
+        """
+        if as_of_date is None:
+            as_of_date = datetime.now(timezone.utc)
+
+        pv = self.calculate_pv(as_of_date)
+        ev = self.calculate_ev()
+        ac = self.calculate_ac()
+        bac = self.get_bac()
+
+        return self._build_metrics(as_of_date, pv, ev, ac, bac)
+
+    def to_snapshot_row(self, metrics: dict) -> dict:
+        """EVM指標をスナップショットの列に変換"""
+        return {
+            "project_id": self.project_id,
+            "date": metrics["date"],
+            "pv": metrics["pv"],
+            "ev": metrics["ev"],
+            "ac": metrics["ac"],
+            "sv": metrics["sv"],
+            "cv": metrics["cv"],
+            "spi": metrics["spi"],
+            "cpi": metrics["cpi"],
+            "eac": metrics["eac"],
+            "etc": metrics["etc"],
+        }
+
     def create_snapshot(self, as_of_date: Optional[datetime] = None) -> EVMSnapshot:
         """EVM指標のスナップショットを作成して保存"""
         metrics = self.calculate_all(as_of_date)
 
-        snapshot = EVMSnapshot(
-            project_id=self.project_id,
-            date=metrics["date"],
-            pv=metrics["pv"],
-            ev=metrics["ev"],
-            ac=metrics["ac"],
-            sv=metrics["sv"],
-            cv=metrics["cv"],
-            spi=metrics["spi"],
-            cpi=metrics["cpi"],
-            eac=metrics["eac"],
-            etc=metrics["etc"],
-        )
+        snapshot = EVMSnapshot(**self.to_snapshot_row(metrics))
 
         self.db.add(snapshot)
         self.db.commit()
         self.db.refresh(snapshot)
 
         return snapshot
+
+    def create_snapshots(self, as_of_dates: List[date]) -> int:
+        """
+        過去の基準日のスナップショットを一括作成して保存（PVのみ）
+        その時点の進捗・実績は保持していないため、EV・ACと派生指標は記録しない（NULL）
+        タスクの読み込みは1回のみで、1回の一括INSERTで書き込む
+        """
+        if not as_of_dates:
+            return 0
+
+        pv_values = self.calculate_pv_curve(as_of_dates)
+        rows = [
+            {
+                "project_id": self.project_id,
+                "date": datetime.combine(d, time.min),
+                "pv": round(pv, 2),
+                "ev": None,
+                "ac": None,
+                "sv": None,
+                "cv": None,
+                "spi": None,
+                "cpi": None,
+                "eac": None,
+                "etc": None,
+            }
+            for d, pv in zip(as_of_dates, pv_values)
+        ]
+        self.db.execute(insert(EVMSnapshot), rows)
+        self.db.commit()
+
+        return len(rows)
@@ -0,0 +1,90 @@
+"""プロジェクト別EVM集計値（BAC・EV・AC）のキャッシュ"""
+
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+
+
+class EVMTotals(NamedTuple):
+    """基準日に依存しないEVM集計値"""
+    bac: float  # 計画工数合計
+    ev: float   # 計画工数 × 進捗率の合計
+    ac: float   # 実績工数合計
+
+
+def _totals_query(project_id: int):
+    """プロジェクトの集計値を求めるSQL（集計1回）"""
+    return select(
+        func.coalesce(func.sum(Task.planned_hours), 0.0),
+        func.coalesce(func.sum(Task.planned_hours * Task.progress / 100.0), 0.0),
+        func.coalesce(func.sum(Task.actual_hours), 0.0),
+    ).filter(
+        Task.project_id == project_id
+    )
+
+
+def load_evm_totals(db: Session, project_id: int) -> EVMTotals:
+    """SQLの集計1回でプロジェクトの集計値を計算"""
+    bac, ev, ac = db.execute(_totals_query(project_id)).one()
+    return EVMTotals(float(bac), float(ev), float(ac))
+
+
+async def load_evm_totals_async(db: AsyncSession, project_id: int) -> EVMTotals:
+    """SQLの集計1回でプロジェクトの集計値を計算（非同期セッション）"""
+    bac, ev, ac = (await db.execute(_totals_query(project_id))).one()
+    return EVMTotals(float(bac), float(ev), float(ac))
+
+
+# プロジェクトごとの集計値（プロセス内で共有）
+# タスクの書き込み（コミット後）に invalidate_evm_totals で無効化する
+# 差分の加算は集計中の読み込みやタスクの同時更新と競合して二重計上されるため行わない
+_totals_cache: Dict[int, Tuple[int, EVMTotals]] = {}
+_totals_versions: Dict[int, int] = {}
+_totals_lock = threading.Lock()
+
+
+def _cached_totals(project_id: int) -> Tuple[int, Optional[EVMTotals]]:
+    """現在のバージョンと、そのバージョンでキャッシュした集計値（なければNone）"""
+    with _totals_lock:
+        version = _totals_versions.get(project_id, 0)
+        cached = _totals_cache.get(project_id)
+    if cached is not None and cached[0] == version:
+        return version, cached[1]
+    return version, None
+
+
+def _store_totals(project_id: int, version: int, totals: EVMTotals) -> None:
+    """集計値をキャッシュ（集計中に書き込みがあった場合は古い内容をキャッシュしない）"""
+    with _totals_lock:
+        if _totals_versions.get(project_id, 0) == version:
+            _totals_cache[project_id] = (version, totals)
+
+
+def get_evm_totals(db: Session, project_id: int) -> EVMTotals:
+    """プロジェクトの集計値を取得（未キャッシュ時のみSQLで集計）"""
+    version, totals = _cached_totals(project_id)
+    if totals is None:
+        totals = load_evm_totals(db, project_id)
+        _store_totals(project_id, version, totals)
+    return totals
+
+
+async def get_evm_totals_async(db: AsyncSession, project_id: int) -> EVMTotals:
+    """プロジェクトの集計値を取得（非同期セッション、未キャッシュ時のみSQLで集計）"""
+    version, totals = _cached_totals(project_id)
+    if totals is None:
+        totals = await load_evm_totals_async(db, project_id)
+        _store_totals(project_id, version, totals)
+    return totals
+
+
+def invalidate_evm_totals(project_id: int) -> None:
+    """プロジェクトの集計値を無効化（タスクの作成・更新・削除・インポートのコミット後に呼ぶ）"""
+    with _totals_lock:
+        _totals_versions[project_id] = _totals_versions.get(project_id, 0) + 1
+        _totals_cache.pop(project_id, None)
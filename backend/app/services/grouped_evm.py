@@ -0,0 +1,147 @@
+"""グループ別（担当者・タスク種別・親タスク）EVM集計エンジン"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+from app.services.pv_engine import PlannedValueEngine
+from app.services.working_calendar import WorkingCalendar, get_working_calendar, get_working_calendar_async
+
+
+# 集計キーとなるタスクの列
+GROUP_BY_COLUMNS = {
+    "member": Task.assigned_member_id,
+    "task_type": Task.task_type,
+    "parent": Task.parent_id,
+}
+
+
+class GroupEVM(NamedTuple):
+    """グループ1件分のEVM集計値"""
+    task_count: int
+    bac: float
+    pv: float
+    ev: float
+    ac: float
+
+    def metrics(self) -> dict:
+        """派生指標を含む指標一式（工数ベース）"""
+        sv = self.ev - self.pv
+        cv = self.ev - self.ac
+        spi = self.ev / self.pv if self.pv > 0 else 0.0
+        cpi = self.ev / self.ac if self.ac > 0 else 0.0
+        etc = (self.bac - self.ev) / cpi if cpi > 0 else 0.0
+        eac = self.ac + etc
+        return {
+            "task_count": self.task_count,
+            "bac": round(self.bac, 1),
+            "pv": round(self.pv, 1),
+            "ev": round(self.ev, 1),
+            "ac": round(self.ac, 1),
+            "sv": round(sv, 1),
+            "cv": round(cv, 1),
+            "spi": round(spi, 2),
+            "cpi": round(cpi, 2),
+            "etc": round(etc, 1),
+            "eac": round(eac, 1),
+        }
+
+
+EMPTY_GROUP = GroupEVM(0, 0.0, 0.0, 0.0, 0.0)
+
+
+class GroupedEVMCalculator:
+    """
+    グループ別EVM計算エンジン
+
+    プロジェクトのタスクを1回のクエリで読み込み、
+    PVは EVMCalculator と同じ稼働日ベースの日割りでタスクごとに計算して
+    グループキーごとに np.bincount で合計する
+    """
+
+    def __init__(self, db: Optional[Session], project_id: int):
+        self.db = db
+        self.project_id = project_id
+        self._calendar: Optional[WorkingCalendar] = None
+        self._rows: Dict[str, List[Tuple]] = {}
+
+    @classmethod
+    async def load(cls, db: AsyncSession, project_id: int, group_by: str) -> "GroupedEVMCalculator":
+        """
+        非同期セッションで集計単位のタスク列とカレンダーを読み込んだ計算エンジンを作成
+        以降の計算はDBにアクセスしないため、スレッドプールで実行できる
+        """
+        calculator = cls(None, project_id)
+        calculator._rows[group_by] = (await db.execute(calculator._rows_query(group_by))).all()
+        calculator._calendar = await get_working_calendar_async(db, project_id)
+        return calculator
+
+    def _rows_query(self, group_by: str):
+        """集計に必要なタスク列（先頭はグループキー）"""
+        if group_by not in GROUP_BY_COLUMNS:
+            raise ValueError(f"Unknown group_by: {group_by}")
+        return select(
+            GROUP_BY_COLUMNS[group_by],
+            Task.planned_hours,
+            Task.planned_start_date,
+            Task.planned_end_date,
+            Task.progress,
+            Task.actual_hours,
+        ).filter(
+            Task.project_id == self.project_id
+        )
+
+    def _get_rows(self, group_by: str) -> List[Tuple]:
+        if group_by not in self._rows:
+            self._rows[group_by] = self.db.execute(self._rows_query(group_by)).all()
+        return self._rows[group_by]
+
+    def _get_calendar(self) -> WorkingCalendar:
+        if self._calendar is None:
+            self._calendar = get_working_calendar(self.db, self.project_id)
+        return self._calendar
+
+    def calculate(self, group_by: str, as_of_date: Optional[datetime] = None) -> Dict[object, GroupEVM]:
+        """グループキーごとのEVM集計値を計算（タスクのないグループは含まない）"""
+        if group_by not in GROUP_BY_COLUMNS:
+            raise ValueError(f"Unknown group_by: {group_by}")
+
+        if as_of_date is None:
+            as_of_date = datetime.now(timezone.utc)
+        if as_of_date.tzinfo is not None:
+            as_of_date = as_of_date.replace(tzinfo=None)
+
+        rows = self._get_rows(group_by)
+        if not rows:
+            return {}
+
+        engine = PlannedValueEngine.from_rows(
+            self._get_calendar(),
+            ((r[1], r[2], r[3]) for r in rows),
+        )
+        pv = engine.task_values([as_of_date.date()])[:, 0]
+        planned_hours = engine.planned_hours
+        ev = planned_hours * np.array([(r[4] or 0.0) / 100.0 for r in rows], dtype=np.float64)
+        ac = np.array([r[5] or 0.0 for r in rows], dtype=np.float64)
+
+        # グループキー（None含む）を連番に変換して合計
+        keys = list(dict.fromkeys(r[0] for r in rows))
+        key_index = {key: i for i, key in enumerate(keys)}
+        groups = np.array([key_index[r[0]] for r in rows], dtype=np.int64)
+        n_groups = len(keys)
+
+        counts = np.bincount(groups, minlength=n_groups)
+        sums = [
+            np.bincount(groups, weights=values, minlength=n_groups)
+            for values in (planned_hours, pv, ev, ac)
+        ]
+
+        return {
+            key: GroupEVM(int(counts[i]), *(float(s[i]) for s in sums))
+            for i, key in enumerate(keys)
+        }
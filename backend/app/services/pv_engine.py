@@ -0,0 +1,116 @@
+"""PV（計画価値）のベクトル化計算エンジン"""
+
+from datetime import date, datetime
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.working_calendar import WorkingCalendar
+
+
+def _to_date(value) -> Optional[date]:
+    """datetime（タイムゾーン付き含む）またはdateをdateに変換"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None).date()
+    return value
+
+
+class PlannedValueEngine:
+    """
+    PV（計画価値）計算エンジン
+
+    タスクを列（予定工数・予定開始日・予定終了日・稼働日数）の配列として保持し、
+    複数の基準日のPVを1回のベクトル演算で計算する
+    計算方法は EVMCalculator.calculate_pv と同じ（稼働日ベースの日割り）
+    """
+
+    # 1回に展開する「タスク数 × 基準日数」の上限（メモリ使用量を抑える）
+    MAX_CELLS_PER_CHUNK = 2_000_000
+
+    def __init__(
+        self,
+        calendar: WorkingCalendar,
+        planned_hours: np.ndarray,
+        start_dates: np.ndarray,
+        end_dates: np.ndarray,
+    ):
+        self.calendar = calendar
+        self.planned_hours = np.asarray(planned_hours, dtype=np.float64)
+        self.start_dates = np.asarray(start_dates, dtype="datetime64[D]")
+        self.end_dates = np.asarray(end_dates, dtype="datetime64[D]")
+
+        self.has_start = ~np.isnat(self.start_dates)
+        self.has_end = ~np.isnat(self.end_dates)
+        # 開始日・終了日の両方があるタスクのみ日割り計算の対象
+        self.prorated = self.has_start & self.has_end
+
+        self.total_working_days = np.zeros(len(self.planned_hours), dtype=np.int64)
+        if self.prorated.any():
+            starts = self.start_dates[self.prorated]
+            ends = self.end_dates[self.prorated]
+            self.total_working_days[self.prorated] = calendar.count_working_days_array(starts, ends)
+
+    @classmethod
+    def from_rows(
+        cls,
+        calendar: WorkingCalendar,
+        rows: Iterable[Tuple[float, Optional[datetime], Optional[datetime]]],
+    ) -> "PlannedValueEngine":
+        """(予定工数, 予定開始日, 予定終了日) の行から列配列を作成"""
+        rows = list(rows)
+        return cls(
+            calendar,
+            np.array([r[0] or 0.0 for r in rows], dtype=np.float64),
+            np.array([_to_date(r[1]) for r in rows], dtype="datetime64[D]"),
+            np.array([_to_date(r[2]) for r in rows], dtype="datetime64[D]"),
+        )
+
+    def task_values(self, as_of_dates: Sequence[date]) -> np.ndarray:
+        """
+        タスクごと・基準日ごとのPVを計算
+        戻り値の形状は (タスク数, 基準日数)
+        """
+        dates = np.asarray(as_of_dates, dtype="datetime64[D]")
+        n_tasks = len(self.planned_hours)
+        if n_tasks == 0 or dates.size == 0:
+            return np.zeros((n_tasks, dates.size), dtype=np.float64)
+
+        d = dates[np.newaxis, :]
+        started = self.start_dates[:, np.newaxis] <= d
+        finished = self.end_dates[:, np.newaxis] <= d
+
+        # 経過稼働日数 = 開始日から基準日まで（両端含む）、計画稼働日数を上限とする
+        # カレンダーの索引は他の計算で起点ごと作り直されることがあるため、
+        # 累積値を保持せず基準日ごとに開始日からの日数を数える
+        elapsed = np.zeros((n_tasks, dates.size), dtype=np.int64)
+        if self.prorated.any():
+            elapsed[self.prorated] = self.calendar.count_working_days_array(
+                self.start_dates[self.prorated][:, np.newaxis], d
+            )
+        total = self.total_working_days[:, np.newaxis]
+        elapsed = np.clip(elapsed, 0, total)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(total > 0, elapsed / np.maximum(total, 1), 0.0)
+
+        # 完了予定日を過ぎたタスクは100%、期間中は稼働日ベースで日割り
+        fraction = np.where(finished, 1.0, ratio)
+        # 開始日のみ設定されたタスクは開始後に全体を含める
+        fraction = np.where(self.prorated[:, np.newaxis], fraction, 1.0)
+        # 予定開始日がまだ来ていないタスクは含めない
+        fraction = np.where(self.has_start[:, np.newaxis] & ~started, 0.0, fraction)
+        # 予定日が設定されていないタスクは計画工数全体を含める
+        fraction = np.where(self.has_start[:, np.newaxis], fraction, 1.0)
+
+        return fraction * self.planned_hours[:, np.newaxis]
+
+    def curve(self, as_of_dates: Sequence[date]) -> np.ndarray:
+        """基準日ごとのプロジェクト全体のPVを計算（PVカーブ）"""
+        dates = np.asarray(as_of_dates, dtype="datetime64[D]")
+        n_tasks = max(len(self.planned_hours), 1)
+        chunk = max(1, self.MAX_CELLS_PER_CHUNK // n_tasks)
+        result = np.zeros(dates.size, dtype=np.float64)
+        for i in range(0, dates.size, chunk):
+            result[i:i + chunk] = self.task_values(dates[i:i + chunk]).sum(axis=0)
+        return result
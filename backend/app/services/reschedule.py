@@ -1,9 +1,9 @@
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 from typing import List, Set, Optional, Dict, Any
 from sqlalchemy.orm import Session
 
 from app.models.task import Task
-from app.models.holiday import Holiday
+from app.services.working_calendar import WorkingCalendar, get_working_calendar
 
 
 class RescheduleService:
@@ -12,26 +12,13 @@ class RescheduleService:
     def __init__(self, db: Session, project_id: int):
         self.db = db
         self.project_id = project_id
-        self._holiday_dates: Optional[Set[date]] = None
-
-    def _get_holiday_dates(self) -> Set[date]:
-        """休日セットを取得（キャッシュ）"""
-        if self._holiday_dates is None:
-            holidays = self.db.query(Holiday.date).filter(
-                Holiday.project_id == self.project_id
-            ).all()
-            self._holiday_dates = {h[0] for h in holidays}
-        return self._holiday_dates
-
-    def _is_non_working_day(self, target_date: date) -> bool:
-        """指定日が非稼働日（土日または休日）かどうかを判定"""
-        # 土曜日(5)または日曜日(6)
-        if target_date.weekday() >= 5:
-            return True
-        # 休日カレンダーに登録されている日
-        if target_date in self._get_holiday_dates():
-            return True
-        return False
+        self._calendar: Optional[WorkingCalendar] = None
+
+    def _get_calendar(self) -> WorkingCalendar:
+        """プロジェクトの稼働日カレンダーを取得（キャッシュ）"""
+        if self._calendar is None:
+            self._calendar = get_working_calendar(self.db, self.project_id)
+        return self._calendar
 
     def _to_date(self, dt: Any) -> Optional[date]:
         """datetimeまたはdateをdateに変換"""
@@ -54,19 +41,7 @@ class RescheduleService:
         Returns:
             計算後の日付
         """
-        if days == 0:
-            return start_date
-
-        current = start_date
-        remaining = abs(days)
-        direction = 1 if days > 0 else -1
-
-        while remaining > 0:
-            current += timedelta(days=direction)
-            if not self._is_non_working_day(current):
-                remaining -= 1
-
-        return current
+        return self._get_calendar().shift_working_days(start_date, days)
 
     def get_successor_tasks(self, task_id: int, visited: Optional[Set[int]] = None) -> List[Task]:
         """
@@ -0,0 +1,158 @@
+"""EVMスナップショットの定期作成（プロセス内スケジューラー）"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional
+
+from sqlalchemy import insert, func
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models.evm_snapshot import EVMSnapshot
+from app.models.project import Project, ProjectStatus
+from app.services.evm_calculator import EVMCalculator
+
+logger = logging.getLogger(__name__)
+
+
+def _to_naive_utc(dt: datetime) -> datetime:
+    """UTCのnaive datetimeに変換（SQLiteはタイムゾーンを保持しないため）"""
+    if dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def get_due_project_ids(db: Session, interval: timedelta, now: datetime) -> List[int]:
+    """
+    スナップショット作成対象のプロジェクトIDを取得
+    進行中のプロジェクトのうち、直近のスナップショットが間隔より古いもの
+    （過去日の一括作成によるPVのみのスナップショットは数えない）
+    """
+    project_ids = [
+        p[0] for p in db.query(Project.id).filter(
+            Project.status == ProjectStatus.IN_PROGRESS
+        ).order_by(Project.id).all()
+    ]
+    if not project_ids:
+        return []
+
+    latest = dict(
+        db.query(EVMSnapshot.project_id, func.max(EVMSnapshot.date)).filter(
+            EVMSnapshot.project_id.in_(project_ids),
+            EVMSnapshot.ev.isnot(None),
+        ).group_by(EVMSnapshot.project_id).all()
+    )
+
+    threshold = _to_naive_utc(now) - interval
+    return [
+        pid for pid in project_ids
+        if latest.get(pid) is None or _to_naive_utc(latest[pid]) <= threshold
+    ]
+
+
+def _insert_snapshots(db: Session, rows: List[dict]) -> int:
+    """
+    スナップショットを一括INSERTしてコミット
+    一括INSERTが失敗した場合は1件ずつ再試行し、失敗したプロジェクトのみスキップする
+    """
+    try:
+        db.execute(insert(EVMSnapshot), rows)
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        logger.exception("Failed to insert EVM snapshot batch; retrying one by one")
+
+    created = 0
+    for row in rows:
+        try:
+            db.execute(insert(EVMSnapshot), [row])
+            db.commit()
+            created += 1
+        except Exception:
+            db.rollback()
+            logger.exception(f"Failed to insert EVM snapshot for project {row['project_id']}")
+    return created
+
+
+def run_snapshot_job(interval: timedelta, batch_size: int) -> int:
+    """
+    進行中の全プロジェクトのスナップショットを作成
+    batch_size件のプロジェクトごとに一括INSERTしてコミットする
+    計算・INSERTに失敗したプロジェクトはログに記録してスキップし、他のプロジェクトは作成を続ける
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        project_ids = get_due_project_ids(db, interval, now)
+
+        created = 0
+        for i in range(0, len(project_ids), batch_size):
+            rows = []
+            for project_id in project_ids[i:i + batch_size]:
+                try:
+                    calculator = EVMCalculator(db, project_id)
+                    rows.append(calculator.to_snapshot_row(calculator.calculate_all(now)))
+                except Exception:
+                    db.rollback()
+                    logger.exception(f"Failed to calculate EVM snapshot for project {project_id}")
+            if rows:
+                created += _insert_snapshots(db, rows)
+
+        return created
+    finally:
+        db.close()
+
+
+class SnapshotScheduler:
+    """
+    EVMスナップショット定期作成スケジューラー
+
+    asyncioのタスクとして間隔ごとにジョブを起動し、
+    計算はリクエスト用スレッドプールとは別の専用スレッドで実行する
+    """
+
+    def __init__(self, interval_minutes: int, batch_size: int):
+        self.interval = timedelta(minutes=interval_minutes)
+        self.batch_size = max(1, batch_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """スケジューラーを開始（イベントループ上で呼ぶ）"""
+        if self._task is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evm-snapshot")
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"EVM snapshot scheduler started (interval: {self.interval})")
+
+    async def stop(self) -> None:
+        """スケジューラーを停止"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def _run(self) -> None:
+        """間隔ごとにジョブを実行（起動直後にも実行し、作成済みのプロジェクトはスキップ）"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                created = await loop.run_in_executor(
+                    self._executor, run_snapshot_job, self.interval, self.batch_size
+                )
+                if created:
+                    logger.info(f"Created {created} EVM snapshots")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("EVM snapshot job failed")
+            await asyncio.sleep(self.interval.total_seconds())
@@ -0,0 +1,123 @@
+"""メンバー稼働率のベクトル化計算エンジン"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+from app.services.pv_engine import _to_date
+from app.services.working_calendar import WorkingCalendar
+
+
+def _assigned_task_rows_query(member_ids: Sequence[int]):
+    return select(
+        Task.assigned_member_id,
+        Task.planned_hours,
+        Task.planned_start_date,
+        Task.planned_end_date,
+    ).filter(
+        Task.assigned_member_id.in_(member_ids),
+        Task.planned_start_date != None,
+        Task.planned_end_date != None,
+    )
+
+
+def load_assigned_task_rows(db: Session, member_ids: Sequence[int]) -> List[Tuple]:
+    """
+    メンバーに割り当てられた予定日付きタスクを1回のクエリで取得
+    戻り値は (担当メンバーID, 予定工数, 予定開始日, 予定終了日) の行
+    """
+    if not member_ids:
+        return []
+    return db.execute(_assigned_task_rows_query(member_ids)).all()
+
+
+async def load_assigned_task_rows_async(db: AsyncSession, member_ids: Sequence[int]) -> List[Tuple]:
+    """load_assigned_task_rows の非同期セッション版"""
+    if not member_ids:
+        return []
+    return (await db.execute(_assigned_task_rows_query(member_ids))).all()
+
+
+class UtilizationEngine:
+    """
+    メンバー稼働率計算エンジン
+
+    集計期間の「メンバー × 日」行列にタスクの日割り工数を差分配列で加算し、
+    累積和で日毎のアサイン時間を求める
+    週毎の集計は月曜始まりに揃えた行列を (メンバー, 週, 7日) に変形して合計する
+    """
+
+    def __init__(self, calendar: WorkingCalendar, start_date: date, end_date: date):
+        self.calendar = calendar
+        self.start_date = start_date
+        self.end_date = end_date
+
+        # 開始日を含む週の月曜日から、終了日を含む週の日曜日まで
+        self.week_origin = start_date - timedelta(days=start_date.weekday())
+        padded_end = end_date + timedelta(days=6 - end_date.weekday())
+        self.days = np.arange(
+            np.datetime64(self.week_origin, "D"),
+            np.datetime64(padded_end, "D") + 1,
+        )
+        self.offset = (start_date - self.week_origin).days
+        self.n_days = (end_date - start_date).days + 1
+
+        # 集計期間内の稼働日のみTrue（週の前後の余白はFalse）
+        self.in_range = np.zeros(self.days.size, dtype=bool)
+        self.in_range[self.offset:self.offset + self.n_days] = True
+        self.working = self.calendar.working_day_mask(self.days) & self.in_range
+
+    def daily_hours(self, member_ids: Sequence[int], rows: Sequence[Tuple]) -> np.ndarray:
+        """
+        メンバーごと・日ごとのアサイン時間を計算
+        戻り値の形状は (メンバー数, 週に揃えた日数)、集計期間外と非稼働日は0
+        """
+        member_index: Dict[int, int] = {mid: i for i, mid in enumerate(member_ids)}
+        diff = np.zeros((len(member_ids), self.days.size + 1), dtype=np.float64)
+
+        rows = [r for r in rows if r[0] in member_index]
+        if rows:
+            members = np.array([member_index[r[0]] for r in rows], dtype=np.int64)
+            hours = np.array([r[1] or 0.0 for r in rows], dtype=np.float64)
+            starts = np.array([_to_date(r[2]) for r in rows], dtype="datetime64[D]")
+            ends = np.array([_to_date(r[3]) for r in rows], dtype="datetime64[D]")
+
+            # タスク期間内の稼働日数で割った1日あたりの工数
+            working_days = self.calendar.count_working_days_array(starts, ends)
+            valid = working_days > 0
+            rate = np.where(valid, hours / np.maximum(working_days, 1), 0.0)
+
+            # 集計期間と重なる部分のみ加算（区間の始点に+、終点の翌日に-）
+            origin = np.datetime64(self.week_origin, "D")
+            first = np.maximum((starts - origin).astype(np.int64), self.offset)
+            last = np.minimum((ends - origin).astype(np.int64), self.offset + self.n_days - 1)
+            valid &= first <= last
+
+            np.add.at(diff, (members[valid], first[valid]), rate[valid])
+            np.add.at(diff, (members[valid], last[valid] + 1), -rate[valid])
+
+        daily = np.cumsum(diff[:, :-1], axis=1)
+        # 累積和の丸め誤差で残る微小値を0にする
+        daily[np.abs(daily) < 1e-9] = 0.0
+        return np.where(self.working, daily, 0.0)
+
+    def weekly_hours(self, daily: np.ndarray) -> np.ndarray:
+        """週ごとのアサイン時間（形状は (メンバー数, 週数)）"""
+        return daily.reshape(daily.shape[0], -1, 7).sum(axis=2)
+
+    def weekly_working_days(self) -> np.ndarray:
+        """週ごとの集計期間内の稼働日数"""
+        return self.working.reshape(-1, 7).sum(axis=1)
+
+    def working_dates(self) -> List[date]:
+        """集計期間内の稼働日の一覧"""
+        return [d.item() for d in self.days[self.working]]
+
+    def week_starts(self) -> List[date]:
+        """各週の開始日（月曜日）の一覧"""
+        return [d.item() for d in self.days[::7]]
@@ -0,0 +1,310 @@
+"""WBSのCSV/Parquet入出力（pandasによる列単位のバリデーション）"""
+
+from io import BytesIO
+from typing import BinaryIO, Iterable, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.services.wbs_import import (
+    IMPORT_COLUMN_COUNT,
+    TASK_TYPES,
+    WBS_COLUMNS,
+    WBSImportError,
+    WBSImportTask,
+    _parse_date,
+)
+
+
+# 取り込み時の列名（並びはExcelのインポート列と同じ）
+FRAME_COLUMNS = [
+    "wbs_number",
+    "name",
+    "task_type",
+    "planned_hours",
+    "planned_start_date",
+    "planned_end_date",
+    "assigned_member_name",
+    "predecessor_wbs",
+    "description",
+    "is_milestone",
+]
+
+# 出力時の列名（Excelのヘッダーと同じ）
+EXPORT_HEADERS = [header for _, header, _ in WBS_COLUMNS]
+
+# CSVの文字コード（BOM付きUTF-8で読めない場合はExcelで保存したShift_JISとみなす）
+CSV_ENCODINGS = ("utf-8-sig", "cp932")
+
+FILE_FORMAT_LABELS = {
+    "csv": "CSV",
+    "parquet": "Parquet",
+}
+
+_MILESTONE_VALUES = ["TRUE", "1", "はい", "YES"]
+
+# 一括変換する日付の形式（Excel版の _parse_date と同じ順）
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d")
+
+# 1行内のエラーの順序（Excelの行ごとのチェック順と同じ）
+_ERROR_ORDER_HOURS = 0
+_ERROR_ORDER_START = 1
+_ERROR_ORDER_END = 2
+_ERROR_ORDER_RANGE = 3
+
+
+def read_wbs_frame(source: Union[bytes, BinaryIO], file_format: str) -> pd.DataFrame:
+    """CSV/Parquetを列の並びで読み込み（ヘッダー行の名前は使わない）"""
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+
+    if file_format == "csv":
+        frame = None
+        for encoding in CSV_ENCODINGS:
+            source.seek(0)
+            try:
+                # 行番号をExcelと揃えるため空行も読み込む
+                frame = pd.read_csv(
+                    source,
+                    dtype=str,
+                    keep_default_na=False,
+                    skip_blank_lines=False,
+                    encoding=encoding,
+                )
+                break
+            except UnicodeDecodeError:
+                if encoding == CSV_ENCODINGS[-1]:
+                    raise
+        # 空のセルは未入力（Excelの空セルと同じ扱い）
+        frame = frame.mask(frame == "", None)
+    elif file_format == "parquet":
+        frame = pd.read_parquet(source)
+        # 日時の列は日付に変換
+        for column in frame.columns:
+            if pd.api.types.is_datetime64_any_dtype(frame[column]):
+                frame[column] = frame[column].dt.date
+    else:
+        raise ValueError(f"Unknown file format: {file_format}")
+
+    frame = frame.iloc[:, :IMPORT_COLUMN_COUNT].astype(object)
+    frame = frame.where(frame.notna(), None)
+    for i in range(frame.shape[1], IMPORT_COLUMN_COUNT):
+        frame[f"_missing_{i}"] = None
+    frame.columns = FRAME_COLUMNS
+    return frame.reset_index(drop=True)
+
+
+def _present(values: pd.Series) -> pd.Series:
+    """入力ありの判定（Excel版の `if value:` と同じ真偽）"""
+    return values.astype(bool)
+
+
+def _none_series(index: pd.Index) -> pd.Series:
+    """全てNoneの列（pd.Series(None) はNaNになるため）"""
+    return pd.Series([None] * len(index), index=index, dtype=object)
+
+
+def _stripped(values: pd.Series) -> pd.Series:
+    """str(value).strip()（未入力はNone）"""
+    present = _present(values)
+    result = _none_series(values.index)
+    result[present] = values[present].astype(str).str.strip()
+    return result
+
+
+def _parse_hours(values: pd.Series, rows: pd.Series, errors: list) -> pd.Series:
+    """予定工数を数値に変換（変換できない値だけ1件ずつ float() で判定）"""
+    present = _present(values)
+    hours = pd.Series(0.0, index=values.index)
+    if not present.any():
+        return hours
+
+    raw = values[present]
+    parsed = pd.to_numeric(raw.astype(str).str.strip(), errors="coerce")
+    hours[present] = parsed
+
+    for index in parsed.index[parsed.isna()]:
+        value = values[index]
+        try:
+            hours[index] = float(value)
+        except ValueError:
+            hours[index] = 0.0
+            errors.append((rows[index], _ERROR_ORDER_HOURS, f"予定工数「{value}」は数値で入力してください"))
+    return hours
+
+
+def _parse_dates(values: pd.Series, field_name: str, order: int, rows: pd.Series, errors: list) -> pd.Series:
+    """
+    日付に変換
+    文字列は DATE_FORMATS の順に一括変換し、変換できない値（日付型・不正な形式）だけ1件ずつ _parse_date で判定
+    """
+    present = _present(values)
+    result = _none_series(values.index)
+    if not present.any():
+        return result
+
+    raw = values[present]
+    remaining = raw[raw.map(type) == str].str.strip()
+    for date_format in DATE_FORMATS:
+        parsed = pd.to_datetime(remaining, format=date_format, errors="coerce")
+        converted = parsed.notna()
+        result[parsed.index[converted]] = parsed[converted].dt.date
+        remaining = remaining[~converted]
+
+    fallback = raw.index.difference(result.index[result.notna()])
+    parsed_values = {}
+    for index, value in zip(fallback, raw[fallback].tolist()):
+        row_errors: List[WBSImportError] = []
+        parsed_values[index] = _parse_date(value, int(rows[index]), field_name, row_errors)
+        errors.extend((e.row, order, e.message) for e in row_errors)
+    if parsed_values:
+        result[list(parsed_values)] = pd.Series(parsed_values, dtype=object)
+    return result
+
+
+def parse_wbs_frame(frame: pd.DataFrame, first_row: int = 2) -> Tuple[List[WBSImportTask], List[WBSImportError]]:
+    """
+    DataFrameをタスクに変換
+    バリデーションとエラーメッセージ・順序はExcel版（iter_wbs_tasks）と同じで、
+    WBS番号の重複・日付の前後・先行タスクの存在チェックは列単位で行う
+    """
+    # 行番号（インデックスは0からの連番）
+    rows = pd.Series(np.arange(first_row, first_row + len(frame)), index=frame.index)
+
+    # エラーは (行番号, 行内の順序, メッセージ)
+    errors: list = []
+
+    # 空行はスキップ
+    wbs_present = _present(frame["wbs_number"])
+    name_present = _present(frame["name"])
+    target = wbs_present | name_present
+
+    # WBS番号必須チェック
+    missing_wbs = target & ~wbs_present
+    errors.extend((row, -1, "WBS番号は必須です") for row in rows[missing_wbs])
+    target &= wbs_present
+
+    # WBS番号重複チェック（最初の行を残す）
+    wbs_numbers = frame["wbs_number"][target].astype(str).str.strip()
+    duplicated = wbs_numbers.duplicated(keep="first")
+    first_rows = rows[target].groupby(wbs_numbers).transform("first")
+    errors.extend(
+        (row, -1, f"WBS番号「{wbs_number}」が行{first}と重複しています")
+        for row, wbs_number, first in zip(rows[duplicated.index[duplicated]], wbs_numbers[duplicated], first_rows[duplicated])
+    )
+    seen_wbs_numbers = set(wbs_numbers[~duplicated])
+    target[duplicated.index[duplicated]] = False
+
+    # タスク名必須チェック
+    missing_name = target & ~name_present
+    errors.extend((row, -1, "タスク名は必須です") for row in rows[missing_name])
+    target &= name_present
+
+    frame = frame[target]
+    rows = rows[target]
+    wbs_numbers = wbs_numbers[frame.index]
+    names = frame["name"].astype(str).str.strip()
+
+    # タスク種別
+    task_type_text = _stripped(frame["task_type"])
+    task_types = task_type_text.map(TASK_TYPES)
+    known_values = task_type_text.isin(list(TASK_TYPES.values()))
+    task_types[known_values] = task_type_text[known_values]
+    task_types = task_types.astype(object).where(task_types.notna(), None)
+
+    # 予定工数・予定開始日・予定終了日
+    planned_hours = _parse_hours(frame["planned_hours"], rows, errors)
+    start_dates = _parse_dates(frame["planned_start_date"], "予定開始日", _ERROR_ORDER_START, rows, errors)
+    end_dates = _parse_dates(frame["planned_end_date"], "予定終了日", _ERROR_ORDER_END, rows, errors)
+
+    # 日付の整合性チェック
+    both = start_dates.notna() & end_dates.notna()
+    reversed_range = (start_dates[both] > end_dates[both]).astype(bool)
+    errors.extend(
+        (row, _ERROR_ORDER_RANGE, "予定開始日は予定終了日以前にしてください")
+        for row in rows[reversed_range.index[reversed_range]]
+    )
+
+    # 担当者・先行タスク・説明（未入力はExcel版と同じく元の値のまま）
+    def text_or_raw(column: str) -> pd.Series:
+        raw = frame[column]
+        return _stripped(raw).where(_present(raw), raw)
+
+    assigned_member_names = text_or_raw("assigned_member_name")
+    predecessors = text_or_raw("predecessor_wbs")
+    descriptions = text_or_raw("description")
+
+    # 固定日付
+    is_milestone = _stripped(frame["is_milestone"]).str.upper().isin(_MILESTONE_VALUES)
+
+    # エラーを行番号順に並べる（同じ行内はExcel版のチェック順）
+    import_errors = [
+        WBSImportError(int(row), message)
+        for row, _, message in sorted(errors, key=lambda e: (e[0], e[1]))
+    ]
+
+    # 先行タスクWBS番号の存在チェック
+    missing_predecessor = _present(predecessors) & ~predecessors.isin(seen_wbs_numbers)
+    import_errors.extend(
+        WBSImportError(int(row), f"先行タスク「{predecessor_wbs}」が見つかりません")
+        for row, predecessor_wbs in zip(rows[missing_predecessor], predecessors[missing_predecessor])
+    )
+
+    tasks = [
+        WBSImportTask(
+            row=row,
+            wbs_number=wbs_number,
+            name=name,
+            task_type=task_type,
+            planned_hours=hours,
+            planned_start_date=start,
+            planned_end_date=end,
+            assigned_member_name=member,
+            description=description,
+            is_milestone=milestone,
+            predecessor_wbs=predecessor,
+        )
+        for row, wbs_number, name, task_type, hours, start, end, member, description, milestone, predecessor in zip(*(
+            column.tolist() for column in (
+                rows, wbs_numbers, names, task_types, planned_hours, start_dates, end_dates,
+                assigned_member_names, descriptions, is_milestone, predecessors,
+            )
+        ))
+    ]
+    return tasks, import_errors
+
+
+def parse_wbs_file(
+    source: Union[bytes, BinaryIO],
+    file_format: str,
+) -> Tuple[List[WBSImportTask], List[WBSImportError]]:
+    """CSV/Parquetファイルをパース"""
+    try:
+        frame = read_wbs_frame(source, file_format)
+    except Exception as e:
+        label = FILE_FORMAT_LABELS.get(file_format, file_format)
+        return [], [WBSImportError(0, f"{label}ファイルの読み込みに失敗しました: {str(e)}")]
+    return parse_wbs_frame(frame)
+
+
+def write_wbs_frame(rows: Iterable[list], output: BinaryIO, file_format: str, chunk_size: int) -> None:
+    """
+    エクスポート行（Excelと同じ列）をCSV/Parquetで出力
+    CSVは一定行数ずつ追記し、Parquetは列形式のため全行を1つのDataFrameにまとめて書き出す
+    """
+    if file_format == "csv":
+        # Excelで開けるようBOM付きで出力
+        pd.DataFrame(columns=EXPORT_HEADERS).to_csv(output, index=False, encoding="utf-8-sig")
+        chunk: List[list] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                pd.DataFrame(chunk, columns=EXPORT_HEADERS).to_csv(output, index=False, header=False, encoding="utf-8")
+                chunk = []
+        if chunk:
+            pd.DataFrame(chunk, columns=EXPORT_HEADERS).to_csv(output, index=False, header=False, encoding="utf-8")
+    elif file_format == "parquet":
+        frame = pd.DataFrame(list(rows), columns=EXPORT_HEADERS)
+        frame.to_parquet(output, index=False)
+    else:
+        raise ValueError(f"Unknown file format: {file_format}")
@@ -1,16 +1,31 @@
 """WBSインポート/エクスポートサービス"""
 
+import copy
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date
 from io import BytesIO
-from typing import List, Optional, Tuple, Dict
-from openpyxl import Workbook
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.worksheet.datavalidation import DataValidation
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.token_cache import TokenCache
 from app.models.task import Task
 from app.models.member import Member
 
+logger = logging.getLogger(__name__)
+
 
 # タスク種別マッピング
 TASK_TYPES = {
@@ -91,6 +106,471 @@ class WBSImportTask:
         }
 
 
+# Excelの列定義 (列, ヘッダー, 列幅)（テンプレート・エクスポート共通、並びはインポートの列順）
+WBS_COLUMNS = [
+    ("A", "WBS番号", 12),
+    ("B", "タスク名", 30),
+    ("C", "タスク種別", 15),
+    ("D", "予定工数(h)", 12),
+    ("E", "予定開始日", 15),
+    ("F", "予定終了日", 15),
+    ("G", "担当者", 15),
+    ("H", "先行タスク", 12),
+    ("I", "説明", 40),
+    ("J", "固定日付", 10),
+]
+
+# ヘッダースタイル
+HEADER_FONT = Font(bold=True, color="FFFFFF")
+HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center", wrap_text=True)
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+
+# ドロップダウンリストを設定する最終行（データ行がこれより多い場合はデータ行まで）
+VALIDATION_LAST_ROW = 1000
+
+# エクスポートの読み込み・ストリーミングの単位
+EXPORT_YIELD_PER = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# エクスポートの出力順
+EXPORT_ORDER_BY = (Task.sort_order.is_(None), Task.sort_order, Task.id)
+
+# インポート・エクスポートのファイル形式
+FILE_FORMATS = ("xlsx", "csv", "parquet")
+
+# アップロードファイルの拡張子→ファイル形式
+IMPORT_FILE_EXTENSIONS = {
+    ".xlsx": "xlsx",
+    ".xls": "xlsx",
+    ".csv": "csv",
+    ".parquet": "parquet",
+}
+
+# ファイル形式→ダウンロード時のContent-Type
+FILE_MEDIA_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def import_file_format(filename: Optional[str]) -> Optional[str]:
+    """アップロードファイル名の拡張子からファイル形式を判定（対象外はNone）"""
+    if not filename:
+        return None
+    return IMPORT_FILE_EXTENSIONS.get(os.path.splitext(filename)[1].lower())
+
+
+def build_data_validations(member_names: List[str], last_row: int = VALIDATION_LAST_ROW) -> List[DataValidation]:
+    """タスク種別・担当者・固定日付のドロップダウンリスト"""
+    validations = []
+
+    # ドロップダウンリスト: タスク種別
+    task_type_validation = DataValidation(
+        type="list",
+        formula1='"' + ','.join(TASK_TYPES.keys()) + '"',
+        allow_blank=True
+    )
+    task_type_validation.error = "リストから選択してください"
+    task_type_validation.errorTitle = "無効な入力"
+    task_type_validation.add(f"C2:C{last_row}")
+    validations.append(task_type_validation)
+
+    # ドロップダウンリスト: 担当者
+    if member_names:
+        member_validation = DataValidation(
+            type="list",
+            formula1=f'"{",".join(member_names)}"',
+            allow_blank=True
+        )
+        member_validation.error = "リストから選択してください"
+        member_validation.errorTitle = "無効な入力"
+        member_validation.add(f"G2:G{last_row}")
+        validations.append(member_validation)
+
+    # ドロップダウンリスト: 固定日付
+    milestone_validation = DataValidation(
+        type="list",
+        formula1='"TRUE,FALSE"',
+        allow_blank=True
+    )
+    milestone_validation.add(f"J2:J{last_row}")
+    validations.append(milestone_validation)
+
+    return validations
+
+
+def iter_file_chunks(file: BinaryIO, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """ファイルを先頭から一定サイズずつ読み出し、読み終えたら閉じる（StreamingResponse用）"""
+    try:
+        file.seek(0)
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
+
+
+# インポート対象の列数（WBS番号〜固定日付）
+IMPORT_COLUMN_COUNT = 10
+
+# 一括登録・更新の1文あたりの行数
+IMPORT_BATCH_SIZE = 1000
+
+# 進捗通知 (処理済み件数, 全件数)
+ImportProgressCallback = Callable[[int, int], None]
+
+# インポート方式（replace: 全削除→再作成、diff: WBS番号で照合して差分のみ反映）
+IMPORT_MODES = ("replace", "diff")
+
+# 差分更新で変更の有無を比較する列
+DIFF_COLUMNS = (
+    "wbs_number",
+    "name",
+    "description",
+    "task_type",
+    "planned_hours",
+    "planned_start_date",
+    "planned_end_date",
+    "assigned_member_id",
+    "is_milestone",
+)
+
+
+class _ImportProgress:
+    """処理済み件数を加算して進捗を通知"""
+
+    def __init__(self, callback: Optional[ImportProgressCallback], total: int):
+        self.callback = callback
+        self.total = total
+        self.done = 0
+
+    def advance(self, count: int) -> None:
+        self.done += count
+        if self.callback:
+            self.callback(self.done, self.total)
+        logger.debug(f"WBS import: {self.done}/{self.total}")
+
+
+def _same_value(current, new) -> bool:
+    """既存の列の値とExcelの値が同じか（日付列はDB側が日時のため日付で比較）"""
+    if isinstance(current, datetime) and isinstance(new, date) and not isinstance(new, datetime):
+        return current.date() == new
+    return current == new
+
+
+# プレビューでパース・バリデーション済みのタスク（キーは "プロジェクトID:ファイル内容のハッシュ"）
+# 実行時にインポートトークンで参照し、Excelの再パースを省略する
+# 件数に加えてタスクの合計行数で上限を設け、大きなファイルのプレビューが重なってもメモリ使用量を抑える
+_import_cache: TokenCache[Tuple["WBSImportTask", ...]] = TokenCache(
+    max_size=settings.WBS_IMPORT_CACHE_SIZE,
+    max_ttl_seconds=settings.WBS_IMPORT_CACHE_TTL_SECONDS,
+    max_weight=settings.WBS_IMPORT_CACHE_MAX_ROWS,
+)
+
+
+def _cache_import_tasks(cache_key: str, tasks: List["WBSImportTask"]) -> bool:
+    """タスクのコピーをキャッシュ（行数が上限を超えるなどでキャッシュしなかった場合はFalse）"""
+    return _import_cache.set(cache_key, tuple(copy.copy(t) for t in tasks), weight=max(len(tasks), 1))
+
+
+def _cached_import_tasks(cache_key: str) -> Optional[List["WBSImportTask"]]:
+    """
+    キャッシュしたタスクのコピーを取得
+    担当者IDの解決などでタスクを書き換えるため、リクエスト間で同じオブジェクトを共有しない
+    """
+    cached = _import_cache.get(cache_key)
+    if cached is None:
+        return None
+    return [copy.copy(t) for t in cached]
+
+
+def content_digest(source: Union[bytes, BinaryIO]) -> str:
+    """ファイル内容のSHA-256（ファイルオブジェクトは読み込み後に先頭へ戻す）"""
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    source.seek(0)
+    for chunk in iter(lambda: source.read(1 << 20), b""):
+        digest.update(chunk)
+    source.seek(0)
+    return digest.hexdigest()
+
+
+# テンプレートの形式を変更した場合は更新する（ETagが変わり、キャッシュ済みの内容は使われなくなる）
+TEMPLATE_FORMAT_VERSION = "2"
+
+# 保持するテンプレートの最大件数
+TEMPLATE_CACHE_SIZE = 32
+
+# テンプレートの内容はメンバー名の並びだけで決まるため、メンバー名のハッシュ（ETag）ごとに保持する
+# プロジェクトごとのETagはメンバーの作成・更新・削除時に invalidate_template_cache で無効化する
+_template_contents: "OrderedDict[str, bytes]" = OrderedDict()
+_template_etags: Dict[int, Tuple[int, str]] = {}
+_template_versions: Dict[int, int] = {}
+_template_lock = threading.Lock()
+
+
+def template_etag(member_names: List[str]) -> str:
+    """メンバー名の並びからテンプレートのETagを計算"""
+    digest = hashlib.sha256(TEMPLATE_FORMAT_VERSION.encode("utf-8"))
+    for name in member_names:
+        digest.update(b"\0")
+        digest.update(name.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def invalidate_template_cache(project_id: int) -> None:
+    """プロジェクトのテンプレートのETagを無効化（メンバーの変更後に呼ぶ）"""
+    with _template_lock:
+        _template_versions[project_id] = _template_versions.get(project_id, 0) + 1
+        _template_etags.pop(project_id, None)
+
+
+def _parse_date(
+    value,
+    row: int,
+    field_name: str,
+    errors: List[WBSImportError]
+) -> Optional[date]:
+    """日付をパース"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+    except ValueError:
+        try:
+            return datetime.strptime(str(value).strip(), "%Y/%m/%d").date()
+        except ValueError:
+            errors.append(WBSImportError(
+                row,
+                f"{field_name}「{value}」の日付形式が不正です（YYYY-MM-DD）"
+            ))
+            return None
+
+
+def iter_wbs_tasks(
+    rows: Iterable[Tuple[int, Sequence]],
+    errors: List[WBSImportError],
+) -> Iterator[WBSImportTask]:
+    """
+    (行番号, 列の値) の行を順にバリデーションしてタスクを生成
+    エラーは errors に追加し、先行タスクの存在チェックは全行の読み込み後に行う
+    """
+    wbs_numbers_seen: Dict[str, int] = {}  # WBS番号 -> 行番号
+    predecessors: List[Tuple[int, str]] = []  # (行番号, 先行タスクWBS番号)
+
+    for row_idx, values in rows:
+        # 末尾の空セルが省略された行は列数に揃える
+        if len(values) < IMPORT_COLUMN_COUNT:
+            values = tuple(values) + (None,) * (IMPORT_COLUMN_COUNT - len(values))
+        (wbs_number, name, task_type_raw, planned_hours_raw, planned_start_raw,
+         planned_end_raw, assigned_member_name, predecessor_wbs, description,
+         is_milestone_raw) = values[:IMPORT_COLUMN_COUNT]
+
+        # 空行チェック
+        if not wbs_number and not name:
+            continue  # 空行はスキップ
+
+        # WBS番号必須チェック
+        if not wbs_number:
+            errors.append(WBSImportError(row_idx, "WBS番号は必須です"))
+            continue
+
+        wbs_number = str(wbs_number).strip()
+
+        # WBS番号重複チェック
+        if wbs_number in wbs_numbers_seen:
+            errors.append(WBSImportError(
+                row_idx,
+                f"WBS番号「{wbs_number}」が行{wbs_numbers_seen[wbs_number]}と重複しています"
+            ))
+            continue
+        wbs_numbers_seen[wbs_number] = row_idx
+
+        # タスク名必須チェック
+        if not name:
+            errors.append(WBSImportError(row_idx, "タスク名は必須です"))
+            continue
+
+        name = str(name).strip()
+
+        # タスク種別
+        task_type = None
+        if task_type_raw:
+            task_type_str = str(task_type_raw).strip()
+            if task_type_str in TASK_TYPES:
+                task_type = TASK_TYPES[task_type_str]
+            elif task_type_str in TASK_TYPES.values():
+                task_type = task_type_str
+
+        # 予定工数
+        planned_hours = 0.0
+        if planned_hours_raw:
+            try:
+                planned_hours = float(planned_hours_raw)
+            except ValueError:
+                errors.append(WBSImportError(row_idx, f"予定工数「{planned_hours_raw}」は数値で入力してください"))
+
+        # 予定開始日
+        planned_start_date = None
+        if planned_start_raw:
+            planned_start_date = _parse_date(planned_start_raw, row_idx, "予定開始日", errors)
+
+        # 予定終了日
+        planned_end_date = None
+        if planned_end_raw:
+            planned_end_date = _parse_date(planned_end_raw, row_idx, "予定終了日", errors)
+
+        # 日付の整合性チェック
+        if planned_start_date and planned_end_date and planned_start_date > planned_end_date:
+            errors.append(WBSImportError(row_idx, "予定開始日は予定終了日以前にしてください"))
+
+        # 担当者
+        if assigned_member_name:
+            assigned_member_name = str(assigned_member_name).strip()
+
+        # 先行タスク（WBS番号）
+        if predecessor_wbs:
+            predecessor_wbs = str(predecessor_wbs).strip()
+            predecessors.append((row_idx, predecessor_wbs))
+
+        # 説明
+        if description:
+            description = str(description).strip()
+
+        # 固定日付
+        is_milestone = False
+        if is_milestone_raw:
+            is_milestone_str = str(is_milestone_raw).strip().upper()
+            is_milestone = is_milestone_str in ("TRUE", "1", "はい", "YES")
+
+        yield WBSImportTask(
+            row=row_idx,
+            wbs_number=wbs_number,
+            name=name,
+            task_type=task_type,
+            planned_hours=planned_hours,
+            planned_start_date=planned_start_date,
+            planned_end_date=planned_end_date,
+            assigned_member_name=assigned_member_name,
+            description=description,
+            is_milestone=is_milestone,
+            predecessor_wbs=predecessor_wbs,
+        )
+
+    # 先行タスクWBS番号の存在チェック
+    for row_idx, predecessor_wbs in predecessors:
+        if predecessor_wbs not in wbs_numbers_seen:
+            errors.append(WBSImportError(
+                row_idx,
+                f"先行タスク「{predecessor_wbs}」が見つかりません"
+            ))
+
+
+def open_wbs_workbook(source: Union[str, bytes, BinaryIO], errors: List[WBSImportError]):
+    """ブックを読み取り専用モードで開く（失敗時はエラーを追加してNone）"""
+    try:
+        if isinstance(source, bytes):
+            source = BytesIO(source)
+        return load_workbook(source, read_only=True, data_only=True)
+    except Exception as e:
+        errors.append(WBSImportError(0, f"Excelファイルの読み込みに失敗しました: {str(e)}"))
+        return None
+
+
+def read_wbs_sheet(ws, errors: List[WBSImportError]) -> List[WBSImportTask]:
+    """シートのデータ行（2行目以降）をタスクに変換"""
+    # 保存元によってはシートの範囲情報が不正確なため、実際の行を最後まで読む
+    ws.reset_dimensions()
+
+    # ヘッダー行をスキップしてデータ行を処理
+    rows = ws.iter_rows(min_row=2, max_col=IMPORT_COLUMN_COUNT, values_only=True)
+    return list(iter_wbs_tasks(enumerate(rows, start=2), errors))
+
+
+def list_sheet_names(path: str) -> List[str]:
+    """ブックのシート名一覧（読み込めない場合は ValueError）"""
+    errors: List[WBSImportError] = []
+    wb = open_wbs_workbook(path, errors)
+    if wb is None:
+        raise ValueError(errors[0].message)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def parse_wbs_sheet(path: str, sheet_name: str) -> Tuple[List[WBSImportTask], List[WBSImportError]]:
+    """
+    ファイルのシート1つをパース
+    プロセスプールのワーカーで実行するため、ファイルはパスで受け取り結果はpickle可能な値で返す
+    """
+    errors: List[WBSImportError] = []
+    wb = open_wbs_workbook(path, errors)
+    if wb is None:
+        return [], errors
+    try:
+        return read_wbs_sheet(wb[sheet_name], errors), errors
+    finally:
+        wb.close()
+
+
+# 複数シートのパース用プロセスプール（openpyxlのパースはCPU処理でGILに律速されるため）
+_parse_executor: Optional[ProcessPoolExecutor] = None
+_parse_executor_lock = threading.Lock()
+
+
+def _parse_worker_count() -> int:
+    """並列パースのプロセス数（設定値とCPU数の小さい方）"""
+    return max(1, min(settings.WBS_IMPORT_MAX_WORKERS, os.cpu_count() or 1))
+
+
+def _get_parse_executor() -> ProcessPoolExecutor:
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            # スレッドを使うサーバープロセスからforkしないようspawnで起動する
+            _parse_executor = ProcessPoolExecutor(
+                max_workers=_parse_worker_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_executor
+
+
+def shutdown_parse_executor() -> None:
+    """プロセスプールを終了（アプリケーション終了時に呼ぶ）"""
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is not None:
+            _parse_executor.shutdown(cancel_futures=True)
+            _parse_executor = None
+
+
+def parse_wbs_sheets(
+    path: str,
+    sheet_names: List[str],
+) -> Dict[str, Tuple[List[WBSImportTask], List[WBSImportError]]]:
+    """複数シートをプロセスプールで並列にパース（1シートのみ・並列数1の場合はこのプロセスで実行）"""
+    if len(sheet_names) <= 1 or _parse_worker_count() <= 1:
+        return {name: parse_wbs_sheet(path, name) for name in sheet_names}
+
+    executor = _get_parse_executor()
+    futures = {name: executor.submit(parse_wbs_sheet, path, name) for name in sheet_names}
+    return {name: future.result() for name, future in futures.items()}
+
+
 class WBSImportService:
     """WBSインポート/エクスポートサービス"""
 
@@ -98,44 +578,60 @@ class WBSImportService:
         self.db = db
         self.project_id = project_id
 
-    def generate_template(self) -> BytesIO:
+    def get_template(self) -> Tuple[str, bytes]:
+        """
+        Excelテンプレートを (ETag, 内容) で取得
+        メンバーが変更されていなければメンバーの照会とテンプレートの生成を省略する
+        """
+        with _template_lock:
+            version = _template_versions.get(self.project_id, 0)
+            cached = _template_etags.get(self.project_id)
+            if cached is not None and cached[0] == version:
+                content = _template_contents.get(cached[1])
+                if content is not None:
+                    _template_contents.move_to_end(cached[1])
+                    return cached[1], content
+
+        member_names = self._member_names()
+        etag = template_etag(member_names)
+
+        with _template_lock:
+            content = _template_contents.get(etag)
+        if content is None:
+            content = self.generate_template(member_names).getvalue()
+
+        with _template_lock:
+            _template_contents[etag] = content
+            _template_contents.move_to_end(etag)
+            while len(_template_contents) > TEMPLATE_CACHE_SIZE:
+                _template_contents.popitem(last=False)
+            # 生成中にメンバーが変更された場合はETagをキャッシュしない
+            if _template_versions.get(self.project_id, 0) == version:
+                _template_etags[self.project_id] = (version, etag)
+        return etag, content
+
+    def _member_names(self) -> List[str]:
+        """プロジェクトのメンバー名（登録順）"""
+        return [
+            name for (name,) in self.db.query(Member.name).filter(
+                Member.project_id == self.project_id
+            ).order_by(Member.id)
+        ]
+
+    def generate_template(self, member_names: Optional[List[str]] = None) -> BytesIO:
         """Excelテンプレートを生成"""
         wb = Workbook()
         ws = wb.active
         ws.title = "WBS"
 
-        # ヘッダースタイル
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-
         # ヘッダー設定
-        headers = [
-            ("A", "WBS番号", 12),
-            ("B", "タスク名", 30),
-            ("C", "タスク種別", 15),
-            ("D", "予定工数(h)", 12),
-            ("E", "予定開始日", 15),
-            ("F", "予定終了日", 15),
-            ("G", "担当者", 15),
-            ("H", "先行タスク", 12),
-            ("I", "説明", 40),
-            ("J", "固定日付", 10),
-        ]
-
-        for col, header, width in headers:
+        for col, header, width in WBS_COLUMNS:
             cell = ws[f"{col}1"]
             cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = thin_border
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+            cell.alignment = HEADER_ALIGNMENT
+            cell.border = THIN_BORDER
             ws.column_dimensions[col].width = width
 
         # サンプルデータ（入力例として表示）
@@ -151,41 +647,13 @@ class WBSImportService:
         for row_idx, data in enumerate(sample_data, start=2):
             for col_idx, value in enumerate(data):
                 cell = ws.cell(row=row_idx, column=col_idx + 1, value=value)
-                cell.border = thin_border
+                cell.border = THIN_BORDER
 
-        # ドロップダウンリスト: タスク種別
-        task_type_validation = DataValidation(
-            type="list",
-            formula1='"' + ','.join(TASK_TYPES.keys()) + '"',
-            allow_blank=True
-        )
-        task_type_validation.error = "リストから選択してください"
-        task_type_validation.errorTitle = "無効な入力"
-        ws.add_data_validation(task_type_validation)
-        task_type_validation.add(f"C2:C1000")
-
-        # ドロップダウンリスト: 担当者
-        members = self.db.query(Member).filter(Member.project_id == self.project_id).all()
-        if members:
-            member_names = ','.join([m.name for m in members])
-            member_validation = DataValidation(
-                type="list",
-                formula1=f'"{member_names}"',
-                allow_blank=True
-            )
-            member_validation.error = "リストから選択してください"
-            member_validation.errorTitle = "無効な入力"
-            ws.add_data_validation(member_validation)
-            member_validation.add(f"G2:G1000")
-
-        # ドロップダウンリスト: 固定日付
-        milestone_validation = DataValidation(
-            type="list",
-            formula1='"TRUE,FALSE"',
-            allow_blank=True
-        )
-        ws.add_data_validation(milestone_validation)
-        milestone_validation.add(f"J2:J1000")
+        # ドロップダウンリスト
+        if member_names is None:
+            member_names = self._member_names()
+        for validation in build_data_validations(member_names):
+            ws.add_data_validation(validation)
 
         # 使い方シート
         ws_help = wb.create_sheet("使い方")
@@ -214,6 +682,7 @@ class WBSImportService:
             [""],
             ["■ インポート時の注意"],
             ["  - インポートすると、既存のタスクは全て削除されます"],
+            ["  - 差分更新を選ぶと、WBS番号が一致するタスクの進捗・実績工数は保持されます"],
             ["  - プレビュー画面で内容を確認してから実行してください"],
         ]
         for row_idx, row_data in enumerate(help_content, start=1):
@@ -226,167 +695,170 @@ class WBSImportService:
         output.seek(0)
         return output
 
-    def parse_excel(self, file_content: bytes) -> Tuple[List[WBSImportTask], List[WBSImportError]]:
-        """Excelファイルをパース"""
-        from openpyxl import load_workbook
-
-        errors: List[WBSImportError] = []
-        tasks: List[WBSImportTask] = []
-
-        try:
-            wb = load_workbook(BytesIO(file_content), data_only=True)
-        except Exception as e:
-            errors.append(WBSImportError(0, f"Excelファイルの読み込みに失敗しました: {str(e)}"))
-            return tasks, errors
-
-        # WBSシートを探す
-        ws = None
-        if "WBS" in wb.sheetnames:
-            ws = wb["WBS"]
-        else:
-            ws = wb.active
-
-        # ヘッダー行をスキップしてデータ行を処理
-        wbs_numbers_seen: Dict[str, int] = {}  # WBS番号 -> 行番号
-
-        for row_idx in range(2, ws.max_row + 1):
-            # 空行チェック
-            wbs_number = ws.cell(row=row_idx, column=1).value
-            name = ws.cell(row=row_idx, column=2).value
-
-            if not wbs_number and not name:
-                continue  # 空行はスキップ
-
-            # WBS番号必須チェック
-            if not wbs_number:
-                errors.append(WBSImportError(row_idx, "WBS番号は必須です"))
+    def _export_wbs_numbers(self) -> Dict[int, str]:
+        """
+        エクスポート時のタスクID→WBS番号（出力順）
+        保存済みの番号を使い、未設定（画面から作成したタスクなど）や重複の場合は
+        出力順の連番のうち未使用の番号を振る
+        """
+        numbered = self.db.query(Task.id, Task.wbs_number).filter(
+            Task.project_id == self.project_id
+        ).order_by(*EXPORT_ORDER_BY).all()
+        wbs_numbers: Dict[int, str] = {}
+        used = set()
+        for task_id, wbs_number in numbered:
+            if wbs_number and wbs_number not in used:
+                wbs_numbers[task_id] = wbs_number
+                used.add(wbs_number)
+        next_number = 1
+        for task_id, _ in numbered:
+            if task_id in wbs_numbers:
                 continue
+            while str(next_number) in used:
+                next_number += 1
+            wbs_numbers[task_id] = str(next_number)
+            used.add(str(next_number))
+        return wbs_numbers
+
+    def _iter_export_rows(self, wbs_numbers: Dict[int, str], member_names: Dict[int, str]) -> Iterator[list]:
+        """エクスポート行（インポートと同じ列構成）を出力順に返す"""
+        rows = self.db.query(
+            Task.id,
+            Task.name,
+            Task.task_type,
+            Task.planned_hours,
+            Task.planned_start_date,
+            Task.planned_end_date,
+            Task.assigned_member_id,
+            Task.predecessor_id,
+            Task.description,
+            Task.is_milestone,
+        ).filter(
+            Task.project_id == self.project_id
+        ).order_by(*EXPORT_ORDER_BY).yield_per(EXPORT_YIELD_PER)
+
+        for row in rows:
+            yield [
+                wbs_numbers[row.id],
+                row.name,
+                TASK_TYPES_REVERSE.get(row.task_type, row.task_type),
+                row.planned_hours,
+                row.planned_start_date.date() if row.planned_start_date else None,
+                row.planned_end_date.date() if row.planned_end_date else None,
+                member_names.get(row.assigned_member_id),
+                wbs_numbers.get(row.predecessor_id),
+                row.description,
+                "TRUE" if row.is_milestone else "FALSE",
+            ]
+
+    def _export_member_names(self) -> Dict[int, str]:
+        return dict(
+            self.db.query(Member.id, Member.name).filter(Member.project_id == self.project_id)
+        )
 
-            wbs_number = str(wbs_number).strip()
+    def export_tasks(self) -> BinaryIO:
+        """
+        プロジェクトのタスクをインポートと同じ列構成でExcelに出力
+        書き込み専用モードで行を順に書き出し、結果は一時ファイル（先頭位置）で返すため
+        タスク数に関わらずメモリ使用量は一定
+        先行タスクは _export_wbs_numbers で決めたWBS番号で出力する
+        （未設定・重複の番号はエクスポート時に保存し、差分更新で照合できるようにする）
+        """
+        # 先行タスクを番号で出力するため、先に出力順のIDとWBS番号だけを読み込んで番号を決める
+        wbs_numbers = self._assign_export_wbs_numbers()
+        member_names = self._export_member_names()
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("WBS")
+        for col, _, width in WBS_COLUMNS:
+            ws.column_dimensions[col].width = width
+        for validation in build_data_validations(
+            list(member_names.values()), max(VALIDATION_LAST_ROW, len(wbs_numbers) + 1)
+        ):
+            ws.data_validations.append(validation)
+
+        header_cells = []
+        for _, header, _ in WBS_COLUMNS:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+            cell.alignment = HEADER_ALIGNMENT
+            cell.border = THIN_BORDER
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        for row in self._iter_export_rows(wbs_numbers, member_names):
+            ws.append(row)
+
+        output = tempfile.TemporaryFile()
+        try:
+            wb.save(output)
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return output
 
-            # WBS番号重複チェック
-            if wbs_number in wbs_numbers_seen:
-                errors.append(WBSImportError(
-                    row_idx,
-                    f"WBS番号「{wbs_number}」が行{wbs_numbers_seen[wbs_number]}と重複しています"
-                ))
-                continue
-            wbs_numbers_seen[wbs_number] = row_idx
+    def export_frame(self, file_format: str) -> BinaryIO:
+        """
+        プロジェクトのタスクをExcelと同じ列構成でCSV/Parquetに出力
+        結果は一時ファイル（先頭位置）で返す
+        """
+        from app.services.wbs_frame import write_wbs_frame
 
-            # タスク名必須チェック
-            if not name:
-                errors.append(WBSImportError(row_idx, "タスク名は必須です"))
-                continue
+        wbs_numbers = self._assign_export_wbs_numbers()
+        member_names = self._export_member_names()
 
-            name = str(name).strip()
-
-            # タスク種別
-            task_type_raw = ws.cell(row=row_idx, column=3).value
-            task_type = None
-            if task_type_raw:
-                task_type_str = str(task_type_raw).strip()
-                if task_type_str in TASK_TYPES:
-                    task_type = TASK_TYPES[task_type_str]
-                elif task_type_str in TASK_TYPES.values():
-                    task_type = task_type_str
-
-            # 予定工数
-            planned_hours_raw = ws.cell(row=row_idx, column=4).value
-            planned_hours = 0.0
-            if planned_hours_raw:
-                try:
-                    planned_hours = float(planned_hours_raw)
-                except ValueError:
-                    errors.append(WBSImportError(row_idx, f"予定工数「{planned_hours_raw}」は数値で入力してください"))
-
-            # 予定開始日
-            planned_start_raw = ws.cell(row=row_idx, column=5).value
-            planned_start_date = None
-            if planned_start_raw:
-                planned_start_date = self._parse_date(planned_start_raw, row_idx, "予定開始日", errors)
-
-            # 予定終了日
-            planned_end_raw = ws.cell(row=row_idx, column=6).value
-            planned_end_date = None
-            if planned_end_raw:
-                planned_end_date = self._parse_date(planned_end_raw, row_idx, "予定終了日", errors)
-
-            # 日付の整合性チェック
-            if planned_start_date and planned_end_date and planned_start_date > planned_end_date:
-                errors.append(WBSImportError(row_idx, "予定開始日は予定終了日以前にしてください"))
-
-            # 担当者
-            assigned_member_name = ws.cell(row=row_idx, column=7).value
-            if assigned_member_name:
-                assigned_member_name = str(assigned_member_name).strip()
-
-            # 先行タスク（WBS番号）
-            predecessor_wbs = ws.cell(row=row_idx, column=8).value
-            if predecessor_wbs:
-                predecessor_wbs = str(predecessor_wbs).strip()
-
-            # 説明
-            description = ws.cell(row=row_idx, column=9).value
-            if description:
-                description = str(description).strip()
-
-            # 固定日付
-            is_milestone_raw = ws.cell(row=row_idx, column=10).value
-            is_milestone = False
-            if is_milestone_raw:
-                is_milestone_str = str(is_milestone_raw).strip().upper()
-                is_milestone = is_milestone_str in ("TRUE", "1", "はい", "YES")
-
-            task = WBSImportTask(
-                row=row_idx,
-                wbs_number=wbs_number,
-                name=name,
-                task_type=task_type,
-                planned_hours=planned_hours,
-                planned_start_date=planned_start_date,
-                planned_end_date=planned_end_date,
-                assigned_member_name=assigned_member_name,
-                description=description,
-                is_milestone=is_milestone,
-                predecessor_wbs=predecessor_wbs,
+        output = tempfile.TemporaryFile()
+        try:
+            write_wbs_frame(
+                self._iter_export_rows(wbs_numbers, member_names), output, file_format, EXPORT_YIELD_PER
             )
-            tasks.append(task)
-
-        # 先行タスクWBS番号の存在チェック
-        wbs_set = set(wbs_numbers_seen.keys())
-        for task in tasks:
-            if task.predecessor_wbs and task.predecessor_wbs not in wbs_set:
-                errors.append(WBSImportError(
-                    task.row,
-                    f"先行タスク「{task.predecessor_wbs}」が見つかりません"
-                ))
-
-        return tasks, errors
+        except Exception:
+            output.close()
+            raise
+        output.seek(0)
+        return output
 
-    def _parse_date(
+    def parse_file(
         self,
-        value,
-        row: int,
-        field_name: str,
-        errors: List[WBSImportError]
-    ) -> Optional[date]:
-        """日付をパース"""
-        if isinstance(value, datetime):
-            return value.date()
-        if isinstance(value, date):
-            return value
+        source: Union[bytes, BinaryIO],
+        file_format: str = "xlsx",
+    ) -> Tuple[List[WBSImportTask], List[WBSImportError]]:
+        """
+        ファイル形式に応じてパース
+        CSV/Parquetはpandasで読み込み、バリデーションは列単位で行う（結果はExcelと同じ）
+        """
+        if file_format == "xlsx":
+            return self.parse_excel(source)
+
+        # pandasはCSV/Parquetの場合のみ読み込む
+        from app.services.wbs_frame import parse_wbs_file
+
+        return parse_wbs_file(source, file_format)
+
+    def parse_excel(self, source: Union[bytes, BinaryIO]) -> Tuple[List[WBSImportTask], List[WBSImportError]]:
+        """
+        Excelファイルをパース
+        読み取り専用モードで行を順に読み込むため、シートの大きさに関わらずメモリ使用量は一定
+        source はバイト列またはファイルオブジェクト（アップロードの一時ファイルなど）
+        """
+        errors: List[WBSImportError] = []
+        wb = open_wbs_workbook(source, errors)
+        if wb is None:
+            return [], errors
 
         try:
-            return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
-        except ValueError:
-            try:
-                return datetime.strptime(str(value).strip(), "%Y/%m/%d").date()
-            except ValueError:
-                errors.append(WBSImportError(
-                    row,
-                    f"{field_name}「{value}」の日付形式が不正です（YYYY-MM-DD）"
-                ))
-                return None
+            # WBSシートを探す
+            if "WBS" in wb.sheetnames:
+                ws = wb["WBS"]
+            else:
+                ws = wb.active
+            tasks = read_wbs_sheet(ws, errors)
+        finally:
+            wb.close()
+
+        return tasks, errors
 
     def resolve_references(
         self,
@@ -412,33 +884,264 @@ class WBSImportService:
 
         return tasks, errors
 
-    def preview(self, file_content: bytes) -> dict:
-        """インポートプレビュー"""
-        tasks, parse_errors = self.parse_excel(file_content)
-
-        if parse_errors:
-            return {
-                "success": False,
-                "errors": [e.to_dict() for e in parse_errors],
-                "tasks": [],
-                "total_count": 0,
-            }
+    def _cache_key(self, import_token: str) -> str:
+        return f"{self.project_id}:{import_token}"
+
+    def preview(self, source: Union[bytes, BinaryIO], file_format: str = "xlsx") -> dict:
+        """
+        インポートプレビュー
+        パースに成功したタスクはキャッシュし、実行時に使うインポートトークンを返す
+        （キャッシュの上限を超えてキャッシュしなかった場合、インポートトークンはNone）
+        """
+        import_token = content_digest(source)
+        cache_key = self._cache_key(import_token)
+
+        # 同じファイルのプレビュー済みタスクがあればパースを省略
+        tasks = _cached_import_tasks(cache_key)
+        cached = tasks is not None
+        if tasks is None:
+            tasks, parse_errors = self.parse_file(source, file_format)
+
+            if parse_errors:
+                return {
+                    "success": False,
+                    "errors": [e.to_dict() for e in parse_errors],
+                    "tasks": [],
+                    "total_count": 0,
+                    "import_token": None,
+                }
+
+            cached = _cache_import_tasks(cache_key, tasks)
 
         tasks, resolve_errors = self.resolve_references(tasks)
 
-        all_errors = parse_errors + resolve_errors
-
         return {
-            "success": len(all_errors) == 0,
-            "errors": [e.to_dict() for e in all_errors],
+            "success": len(resolve_errors) == 0,
+            "errors": [e.to_dict() for e in resolve_errors],
             "tasks": [t.to_dict() for t in tasks],
             "total_count": len(tasks),
+            "import_token": import_token if cached else None,
+            "diff_unavailable_reason": self.diff_unavailable_reason(),
         }
 
-    def execute_import(self, file_content: bytes) -> dict:
-        """インポート実行（既存タスク削除→新規作成）"""
-        tasks, parse_errors = self.parse_excel(file_content)
+    def _import_values(self, task: WBSImportTask) -> dict:
+        """Excelから設定する列の値（進捗・実績・単価・親タスク・先行タスクは含まない）"""
+        return {
+            "wbs_number": task.wbs_number,
+            "name": task.name,
+            "description": task.description,
+            "task_type": task.task_type,
+            "planned_hours": task.planned_hours,
+            "planned_start_date": task.planned_start_date,
+            "planned_end_date": task.planned_end_date,
+            "assigned_member_id": task.assigned_member_id,
+            "is_milestone": task.is_milestone,
+        }
+
+    def _insert_tasks(self, tasks: List[WBSImportTask], tracker: "_ImportProgress") -> Dict[str, int]:
+        """
+        タスクを先行タスクなしで一括登録し、WBS番号→IDを返す
+        INSERT ... RETURNING でバッチごとにIDを受け取る
+        """
+        insert_stmt = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+        wbs_to_db_id: Dict[str, int] = {}
+        for start in range(0, len(tasks), IMPORT_BATCH_SIZE):
+            batch = tasks[start:start + IMPORT_BATCH_SIZE]
+            ids = self.db.scalars(insert_stmt, [
+                {
+                    **self._import_values(task),
+                    "project_id": self.project_id,
+                    "parent_id": None,  # 親子関係は使用しない
+                    "predecessor_id": None,  # 後で設定
+                    "progress": 0,
+                    "actual_hours": 0,
+                    "hourly_rate": 5000,
+                }
+                for task in batch
+            ]).all()
+            for task, task_id in zip(batch, ids):
+                wbs_to_db_id[task.wbs_number] = task_id
+            tracker.advance(len(batch))
+        return wbs_to_db_id
+
+    def _update_tasks(self, values: List[dict], tracker: "_ImportProgress") -> None:
+        """主キー（id）指定の一括UPDATE（各要素のキーは揃えておく）"""
+        for start in range(0, len(values), IMPORT_BATCH_SIZE):
+            batch = values[start:start + IMPORT_BATCH_SIZE]
+            self.db.execute(update(Task), batch)
+            tracker.advance(len(batch))
+
+    def _delete_tasks(self, task_ids: List[int], tracker: "_ImportProgress") -> None:
+        """タスクを一括削除（削除対象どうしの参照はバッチをまたぐため先に外す）"""
+        for start in range(0, len(task_ids), IMPORT_BATCH_SIZE):
+            batch = task_ids[start:start + IMPORT_BATCH_SIZE]
+            self.db.execute(
+                update(Task).where(Task.id.in_(batch)).values(parent_id=None, predecessor_id=None)
+            )
+        for start in range(0, len(task_ids), IMPORT_BATCH_SIZE):
+            batch = task_ids[start:start + IMPORT_BATCH_SIZE]
+            self.db.execute(delete(Task).where(Task.id.in_(batch)))
+            tracker.advance(len(batch))
+
+    def _replace_tasks(self, tasks: List[WBSImportTask], progress: Optional[ImportProgressCallback]) -> dict:
+        """既存タスクを全削除して一括登録（コミットは呼び出し側）"""
+        # 先行タスクの設定がある行は登録と更新の2回数える
+        tracker = _ImportProgress(progress, len(tasks) + sum(1 for t in tasks if t.predecessor_wbs))
+
+        # 既存タスクを全削除
+        deleted_count = self.db.query(Task).filter(Task.project_id == self.project_id).delete()
+
+        # 新規タスクを作成（まず先行タスクなしで作成）
+        wbs_to_db_id = self._insert_tasks(tasks, tracker)
+
+        # 先行タスクIDを設定
+        self._update_tasks([
+            {"id": wbs_to_db_id[task.wbs_number], "predecessor_id": wbs_to_db_id[task.predecessor_wbs]}
+            for task in tasks
+            if task.predecessor_wbs and task.predecessor_wbs in wbs_to_db_id
+        ], tracker)
+
+        return {"inserted_count": len(tasks), "updated_count": 0, "deleted_count": deleted_count}
+
+    def _assign_export_wbs_numbers(self) -> Dict[int, str]:
+        """
+        エクスポートするWBS番号を決め、未設定・重複の既存タスクにはその番号を保存してコミット
+        エクスポートしたファイルの番号が保存済みの番号と一致するため、差分更新で照合できる
+        """
+        wbs_numbers = self._export_wbs_numbers()
+        stored = dict(self.db.query(Task.id, Task.wbs_number).filter(Task.project_id == self.project_id))
+        values = [
+            {"id": task_id, "wbs_number": wbs_number}
+            for task_id, wbs_number in wbs_numbers.items()
+            if stored.get(task_id) != wbs_number
+        ]
+        if values:
+            self._update_tasks(values, _ImportProgress(None, len(values)))
+            self.db.commit()
+            logger.info(f"WBS export: assigned WBS numbers to {len(values)} tasks in project {self.project_id}")
+        return wbs_numbers
+
+    def count_unnumbered_tasks(self) -> int:
+        """WBS番号が未設定・重複の既存タスク数（差分更新で照合できないタスク）"""
+        numbers = [
+            wbs_number for (wbs_number,) in
+            self.db.query(Task.wbs_number).filter(Task.project_id == self.project_id)
+        ]
+        return len(numbers) - len({n for n in numbers if n})
+
+    def diff_unavailable_reason(self) -> Optional[str]:
+        """差分更新できない場合の理由（できる場合はNone）"""
+        count = self.count_unnumbered_tasks()
+        if count == 0:
+            return None
+        return (
+            f"WBS番号が未設定または重複しているタスクが{count}件あるため差分更新できません。"
+            "タスクをエクスポートするとWBS番号が確定するため、エクスポートしたファイルを編集してインポートしてください"
+        )
 
+    def _diff_tasks(self, tasks: List[WBSImportTask], progress: Optional[ImportProgressCallback]) -> dict:
+        """
+        既存タスクとWBS番号で照合し、差分だけを反映（コミットは呼び出し側）
+        既存タスクのWBS番号は一意であること（diff_unavailable_reason で確認済み）
+        - Excelにないタスクは削除
+        - Excelにだけあるタスクは登録
+        - 両方にあるタスクはExcelの列に変更がある場合のみ更新
+          （進捗・実績・単価は保持し、親タスクは削除される場合のみ外す）
+        """
+        existing = self.db.query(
+            Task.id,
+            Task.parent_id,
+            Task.predecessor_id,
+            *(getattr(Task, column) for column in DIFF_COLUMNS),
+        ).filter(
+            Task.project_id == self.project_id
+        ).order_by(Task.id).all()
+
+        file_wbs_numbers = {task.wbs_number for task in tasks}
+        matched: Dict[str, object] = {}
+        deleted_ids: List[int] = []
+        for row in existing:
+            if row.wbs_number in file_wbs_numbers and row.wbs_number not in matched:
+                matched[row.wbs_number] = row
+            else:
+                deleted_ids.append(row.id)
+        deleted_id_set = set(deleted_ids)
+
+        new_tasks = [task for task in tasks if task.wbs_number not in matched]
+        new_wbs_numbers = {task.wbs_number for task in new_tasks}
+
+        # 変更のある既存タスク（新規タスクを先行タスクにする場合は必ず変更あり）
+        changed: List[Tuple[WBSImportTask, dict]] = []
+        for task in tasks:
+            row = matched.get(task.wbs_number)
+            if row is None:
+                continue
+            values = self._import_values(task)
+            values["parent_id"] = None if row.parent_id in deleted_id_set else row.parent_id
+            predecessor_wbs = task.predecessor_wbs
+            if predecessor_wbs in new_wbs_numbers:
+                predecessor_changed = True
+            else:
+                predecessor_row = matched.get(predecessor_wbs) if predecessor_wbs else None
+                values["predecessor_id"] = predecessor_row.id if predecessor_row is not None else None
+                predecessor_changed = values["predecessor_id"] != row.predecessor_id
+            if predecessor_changed or values["parent_id"] != row.parent_id or any(
+                not _same_value(getattr(row, column), values[column]) for column in DIFF_COLUMNS
+            ):
+                changed.append((task, values))
+
+        new_predecessor_count = sum(1 for task in new_tasks if task.predecessor_wbs)
+        tracker = _ImportProgress(
+            progress, len(new_tasks) + len(changed) + new_predecessor_count + len(deleted_ids)
+        )
+
+        # 新規タスクを作成（まず先行タスクなしで作成）
+        wbs_to_db_id = {wbs_number: row.id for wbs_number, row in matched.items()}
+        wbs_to_db_id.update(self._insert_tasks(new_tasks, tracker))
+
+        # 変更のある既存タスクを更新
+        updates = []
+        for task, values in changed:
+            values["id"] = matched[task.wbs_number].id
+            values["predecessor_id"] = wbs_to_db_id.get(task.predecessor_wbs) if task.predecessor_wbs else None
+            updates.append(values)
+        self._update_tasks(updates, tracker)
+
+        # 新規タスクの先行タスクIDを設定
+        self._update_tasks([
+            {"id": wbs_to_db_id[task.wbs_number], "predecessor_id": wbs_to_db_id[task.predecessor_wbs]}
+            for task in new_tasks
+            if task.predecessor_wbs and task.predecessor_wbs in wbs_to_db_id
+        ], tracker)
+
+        # Excelにないタスクを削除（参照は上で付け替え済み）
+        self._delete_tasks(deleted_ids, tracker)
+
+        return {"inserted_count": len(new_tasks), "updated_count": len(changed), "deleted_count": len(deleted_ids)}
+
+    def execute_import(
+        self,
+        source: Union[bytes, BinaryIO],
+        progress: Optional[ImportProgressCallback] = None,
+        mode: str = "replace",
+        file_format: str = "xlsx",
+    ) -> dict:
+        """
+        インポート実行
+        mode="replace" は既存タスク削除→新規作成、mode="diff" はWBS番号で照合して差分のみ反映
+        progress を渡すと登録・更新・削除のバッチごとに (処理済み件数, 全件数) で呼ばれる
+        """
+        tasks, parse_errors = self.parse_file(source, file_format)
+        return self.import_parsed(tasks, parse_errors, progress, mode)
+
+    def import_parsed(
+        self,
+        tasks: List[WBSImportTask],
+        parse_errors: List[WBSImportError],
+        progress: Optional[ImportProgressCallback] = None,
+        mode: str = "replace",
+    ) -> dict:
+        """パース済みのタスクでインポート実行（パースエラーがあれば何もしない）"""
         if parse_errors:
             return {
                 "success": False,
@@ -447,6 +1150,39 @@ class WBSImportService:
                 "imported_count": 0,
             }
 
+        return self._import_tasks(tasks, progress, mode)
+
+    def execute_cached_import(
+        self,
+        import_token: str,
+        progress: Optional[ImportProgressCallback] = None,
+        mode: str = "replace",
+    ) -> Optional[dict]:
+        """
+        プレビュー時にキャッシュしたタスクでインポート実行
+        キャッシュにない（期限切れ・別プロセスでのプレビュー）場合はNone
+        """
+        cache_key = self._cache_key(import_token)
+        tasks = _cached_import_tasks(cache_key)
+        if tasks is None:
+            return None
+
+        result = self._import_tasks(tasks, progress, mode)
+        if result["success"]:
+            _import_cache.delete(cache_key)
+        return result
+
+    def _import_tasks(
+        self,
+        tasks: List[WBSImportTask],
+        progress: Optional[ImportProgressCallback] = None,
+        mode: str = "replace",
+    ) -> dict:
+        """パース済みタスクの担当者を解決して登録"""
+        if mode not in IMPORT_MODES:
+            raise ValueError(f"Unknown import mode: {mode}")
+
+        # 担当者はプレビュー後に変更されている可能性があるため毎回解決する
         tasks, resolve_errors = self.resolve_references(tasks)
 
         if resolve_errors:
@@ -457,46 +1193,45 @@ class WBSImportService:
                 "imported_count": 0,
             }
 
-        # 既存タスクを全削除
-        self.db.query(Task).filter(Task.project_id == self.project_id).delete()
+        if mode == "diff":
+            # 番号のないタスクを推測した番号で照合すると、進捗・実績が別のタスクに移るため照合しない
+            reason = self.diff_unavailable_reason()
+            if reason:
+                return {
+                    "success": False,
+                    "message": reason,
+                    "errors": [],
+                    "imported_count": 0,
+                }
 
-        # 新規タスクを作成（まず先行タスクなしで作成）
-        wbs_to_db_id: Dict[str, int] = {}
-        created_tasks: List[Task] = []
+        try:
+            if mode == "diff":
+                counts = self._diff_tasks(tasks, progress)
+            else:
+                counts = self._replace_tasks(tasks, progress)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        logger.info(
+            f"Imported {len(tasks)} WBS tasks into project {self.project_id} ({mode}: "
+            f"{counts['inserted_count']} inserted, {counts['updated_count']} updated, "
+            f"{counts['deleted_count']} deleted)"
+        )
 
-        for task in tasks:
-            db_task = Task(
-                project_id=self.project_id,
-                parent_id=None,  # 親子関係は使用しない
-                predecessor_id=None,  # 後で設定
-                name=task.name,
-                description=task.description,
-                task_type=task.task_type,
-                planned_hours=task.planned_hours,
-                planned_start_date=task.planned_start_date,
-                planned_end_date=task.planned_end_date,
-                assigned_member_id=task.assigned_member_id,
-                is_milestone=task.is_milestone,
-                progress=0,
-                actual_hours=0,
-                hourly_rate=5000,
+        if mode == "diff":
+            message = (
+                f"{len(tasks)}件のタスクをインポートしました"
+                f"（追加{counts['inserted_count']}件・更新{counts['updated_count']}件・削除{counts['deleted_count']}件）"
             )
-            self.db.add(db_task)
-            self.db.flush()  # IDを取得するためにflush
-
-            wbs_to_db_id[task.wbs_number] = db_task.id
-            created_tasks.append(db_task)
-
-        # 先行タスクIDを設定
-        for i, task in enumerate(tasks):
-            if task.predecessor_wbs and task.predecessor_wbs in wbs_to_db_id:
-                created_tasks[i].predecessor_id = wbs_to_db_id[task.predecessor_wbs]
-
-        self.db.commit()
+        else:
+            message = f"{len(tasks)}件のタスクをインポートしました"
 
         return {
             "success": True,
-            "message": f"{len(tasks)}件のタスクをインポートしました",
+            "message": message,
             "errors": [],
             "imported_count": len(tasks),
+            **counts,
         }
@@ -0,0 +1,245 @@
+"""稼働日カレンダー（土日・休日を除外した稼働日計算）"""
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.holiday import Holiday
+
+
+class WorkingCalendar:
+    """
+    稼働日カレンダー
+
+    土日と休日から稼働日数の累積配列（プレフィックス配列）を作成し、
+    任意期間の稼働日数を配列参照2回で求める
+    """
+
+    # 索引を拡張する際の余白日数（再構築の回数を抑える）
+    INDEX_MARGIN_DAYS = 366
+    # 索引の最大日数（約100年）。これを超える期間は索引を作らず np.busday_count で直接数える
+    MAX_INDEX_DAYS = 366 * 100
+
+    def __init__(self, holiday_dates: Iterable[date]):
+        self._holiday_set: Set[date] = {
+            d.date() if isinstance(d, datetime) else d for d in holiday_dates
+        }
+        self._holidays = np.array(sorted(self._holiday_set), dtype="datetime64[D]")
+        self._busdaycal = np.busdaycalendar(holidays=self._holidays)
+        self._index: Optional[Tuple[date, np.ndarray]] = None
+
+    @property
+    def holiday_dates(self) -> Set[date]:
+        """休日の日付セット"""
+        return self._holiday_set
+
+    def is_non_working_day(self, target_date: date) -> bool:
+        """指定日が非稼働日（土日または休日）かどうかを判定"""
+        # 土曜日(5)または日曜日(6)
+        if target_date.weekday() >= 5:
+            return True
+        # 休日カレンダーに登録されている日
+        return target_date in self._holiday_set
+
+    def working_day_mask(self, dates: np.ndarray) -> np.ndarray:
+        """各日付が稼働日かどうかの真偽値配列を取得（ベクトル化）"""
+        return np.is_busday(np.asarray(dates, dtype="datetime64[D]"), busdaycal=self._busdaycal)
+
+    def build_index(self, start_date: date, end_date: date) -> Tuple[date, np.ndarray]:
+        """
+        期間の稼働日プレフィックス配列を作成
+        prefix[i] = origin から origin + i 日の前日までの稼働日数
+        """
+        days = np.arange(
+            np.datetime64(start_date, "D"),
+            np.datetime64(end_date, "D") + 1,
+        )
+        working = np.is_busday(days, busdaycal=self._busdaycal)
+        # カレンダーはスレッド間で共有されるため、起点と配列を1つのタプルで差し替える
+        self._index = (start_date, np.concatenate(([0], np.cumsum(working, dtype=np.int64))))
+        return self._index
+
+    def _ensure_index(self, start_date: date, end_date: date) -> Optional[Tuple[date, np.ndarray]]:
+        """
+        索引が期間をカバーしていなければ範囲を広げて再作成
+        期間が MAX_INDEX_DAYS を超える場合（9999-12-31 のような日付を含む場合など）はNone
+        """
+        index = self._index
+        if index is not None:
+            origin, prefix = index
+            index_end = origin + timedelta(days=len(prefix) - 2)
+            if origin <= start_date and end_date <= index_end:
+                return index
+            # 既存の索引と合わせて上限を超える場合は、要求された期間だけで作り直す
+            merged_start = min(start_date, origin)
+            merged_end = max(end_date, index_end)
+            if (merged_end - merged_start).days < self.MAX_INDEX_DAYS:
+                start_date, end_date = merged_start, merged_end
+        if (end_date - start_date).days >= self.MAX_INDEX_DAYS:
+            return None
+        return self.build_index(
+            _offset_date(start_date, -self.INDEX_MARGIN_DAYS),
+            _offset_date(end_date, self.INDEX_MARGIN_DAYS),
+        )
+
+    def count_working_days(self, start_date: date, end_date: date) -> int:
+        """期間内（両端含む）の稼働日数を計算（土日祝日を除外）"""
+        if start_date > end_date:
+            return 0
+        index = self._ensure_index(start_date, end_date)
+        if index is None:
+            return int(np.busday_count(
+                np.datetime64(start_date, "D"), np.datetime64(end_date, "D") + 1, busdaycal=self._busdaycal
+            ))
+        origin, prefix = index
+        start_idx = (start_date - origin).days
+        end_idx = (end_date - origin).days + 1
+        return int(prefix[end_idx] - prefix[start_idx])
+
+    def count_working_days_array(self, start_dates: np.ndarray, end_dates: np.ndarray) -> np.ndarray:
+        """
+        期間ごとの稼働日数をまとめて計算（両端含む、ベクトル化）
+        start_dates / end_dates は datetime64[D] 配列
+        """
+        start_dates = np.asarray(start_dates, dtype="datetime64[D]")
+        end_dates = np.asarray(end_dates, dtype="datetime64[D]")
+        if start_dates.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        index = self._ensure_index(
+            min(start_dates.min(), end_dates.min()).item(),
+            max(start_dates.max(), end_dates.max()).item(),
+        )
+        if index is None:
+            counts = np.busday_count(start_dates, end_dates + 1, busdaycal=self._busdaycal)
+            return np.where(start_dates > end_dates, 0, counts)
+        origin, prefix = index
+        origin = np.datetime64(origin, "D")
+        start_idx = (start_dates - origin).astype(np.int64)
+        end_idx = (end_dates - origin).astype(np.int64) + 1
+        counts = prefix[end_idx] - prefix[start_idx]
+        return np.where(start_dates > end_dates, 0, counts)
+
+    def cumulative_working_days(self, dates: np.ndarray) -> np.ndarray:
+        """
+        各日付より前の稼働日の累積数を取得（ベクトル化）
+        期間 [a, b] の稼働日数は cumulative(b + 1日) - cumulative(a) で求められる
+        （起点は索引によって変わるため、値は1回の呼び出しの中でのみ比較できる）
+        """
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        if dates.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        index = self._ensure_index(dates.min().item(), dates.max().item())
+        if index is None:
+            return np.busday_count(dates.min(), dates, busdaycal=self._busdaycal).astype(np.int64)
+        origin, prefix = index
+        return prefix[(dates - np.datetime64(origin, "D")).astype(np.int64)]
+
+    def roll_forward(self, target_date: date) -> date:
+        """指定日が非稼働日なら次の稼働日に繰り下げ（稼働日ならそのまま）"""
+        return np.busday_offset(
+            np.datetime64(target_date, "D"), 0, roll="forward", busdaycal=self._busdaycal
+        ).item()
+
+    def next_working_day(self, current_date: date) -> date:
+        """翌日以降で最初の稼働日を取得（土日祝日を除外）"""
+        return self.roll_forward(current_date + timedelta(days=1))
+
+    def add_working_days(self, start_date: date, days: int) -> date:
+        """
+        開始日を含めて days 稼働日目の日付を計算（終了日）
+        days=1の場合は開始日（非稼働日なら次の稼働日）、days=2の場合は翌稼働日
+        """
+        if days <= 0:
+            return start_date
+        return np.busday_offset(
+            np.datetime64(start_date, "D"), days - 1, roll="forward", busdaycal=self._busdaycal
+        ).item()
+
+    def shift_working_days(self, start_date: date, days: int) -> date:
+        """
+        基準日から稼働日をずらした日付を計算（正=後ろ倒し、負=前倒し）
+        基準日自体は数えず、移動先の稼働日のみを数える
+        """
+        if days == 0:
+            return start_date
+        # 基準日が非稼働日の場合、移動方向と逆側の稼働日を起点にする
+        roll = "backward" if days > 0 else "forward"
+        return np.busday_offset(
+            np.datetime64(start_date, "D"), days, roll=roll, busdaycal=self._busdaycal
+        ).item()
+
+
+def _offset_date(target_date: date, days: int) -> date:
+    """日付をずらす（date.min・date.max を超える場合はその値に丸める）"""
+    try:
+        return target_date + timedelta(days=days)
+    except OverflowError:
+        return date.max if days > 0 else date.min
+
+
+def _holidays_query(project_id: int):
+    return select(Holiday.date).filter(Holiday.project_id == project_id)
+
+
+def load_working_calendar(db: Session, project_id: int) -> WorkingCalendar:
+    """プロジェクトの休日を1回のクエリで読み込み、稼働日カレンダーを作成"""
+    return WorkingCalendar(db.scalars(_holidays_query(project_id)))
+
+
+async def load_working_calendar_async(db: AsyncSession, project_id: int) -> WorkingCalendar:
+    """プロジェクトの休日を1回のクエリで読み込み、稼働日カレンダーを作成（非同期セッション）"""
+    return WorkingCalendar((await db.scalars(_holidays_query(project_id))).all())
+
+
+# プロジェクトごとの稼働日カレンダーキャッシュ（プロセス内で共有）
+# 休日の書き込み時に invalidate_working_calendar でバージョンを進めて無効化する
+_calendar_cache: Dict[int, Tuple[int, WorkingCalendar]] = {}
+_calendar_versions: Dict[int, int] = {}
+_calendar_lock = threading.Lock()
+
+
+def _cached_calendar(project_id: int) -> Tuple[int, Optional[WorkingCalendar]]:
+    """現在のバージョンと、そのバージョンでキャッシュしたカレンダー（なければNone）"""
+    with _calendar_lock:
+        version = _calendar_versions.get(project_id, 0)
+        cached = _calendar_cache.get(project_id)
+    if cached is not None and cached[0] == version:
+        return version, cached[1]
+    return version, None
+
+
+def _store_calendar(project_id: int, version: int, calendar: WorkingCalendar) -> None:
+    """カレンダーをキャッシュ（読み込み中に無効化された場合は古い内容をキャッシュしない）"""
+    with _calendar_lock:
+        if _calendar_versions.get(project_id, 0) == version:
+            _calendar_cache[project_id] = (version, calendar)
+
+
+def get_working_calendar(db: Session, project_id: int) -> WorkingCalendar:
+    """プロジェクトの稼働日カレンダーを取得（プロセス内キャッシュ付き）"""
+    version, calendar = _cached_calendar(project_id)
+    if calendar is None:
+        calendar = load_working_calendar(db, project_id)
+        _store_calendar(project_id, version, calendar)
+    return calendar
+
+
+async def get_working_calendar_async(db: AsyncSession, project_id: int) -> WorkingCalendar:
+    """プロジェクトの稼働日カレンダーを取得（非同期セッション、プロセス内キャッシュ付き）"""
+    version, calendar = _cached_calendar(project_id)
+    if calendar is None:
+        calendar = await load_working_calendar_async(db, project_id)
+        _store_calendar(project_id, version, calendar)
+    return calendar
+
+
+def invalidate_working_calendar(project_id: int) -> None:
+    """プロジェクトの稼働日カレンダーキャッシュを無効化（休日の作成・更新・削除後に呼ぶ）"""
+    with _calendar_lock:
+        _calendar_versions[project_id] = _calendar_versions.get(project_id, 0) + 1
+        _calendar_cache.pop(project_id, None)
@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+# アプリの読み込み前にテスト用のデータベースを指定
+_db_dir = tempfile.mkdtemp(prefix="evm-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.auth import get_current_user, get_current_user_async
+from app.core.database import Base, SessionLocal, engine
+from app.core.migrations import run_migrations
+from app.models import Project, User
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _migrate():
+    run_migrations(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as connection:
+            for table in reversed(Base.metadata.sorted_tables):
+                connection.execute(table.delete())
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="test@example.com", name="テストユーザー")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def project(db):
+    project = Project(name="テストプロジェクト", start_date=datetime(2026, 1, 1), end_date=datetime(2026, 12, 31))
+    db.add(project)
+    db.commit()
+    return project
+
+
+@pytest.fixture
+def client(user):
+    from app.main import app
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_async] = lambda: user
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
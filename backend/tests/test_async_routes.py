@@ -0,0 +1,52 @@
+import inspect
+from datetime import datetime
+
+from app.api import evm, members, projects
+from app.models import Member, Task
+from app.services.evm_calculator import EVMCalculator
+
+
+def test_dashboard_reads_are_async():
+    """ダッシュボードが並列に呼ぶ参照はスレッドプールを使わずに受け付ける（計算のみスレッドプール）"""
+    for endpoint in (
+        evm.get_evm_metrics, evm.get_pv_curve, evm.get_evm_breakdown, evm.get_evm_analysis,
+        evm.get_evm_snapshots, members.get_members_by_project, members.get_members_utilization,
+        members.get_members_evm, projects.get_projects, projects.get_project,
+    ):
+        assert inspect.iscoroutinefunction(endpoint), endpoint.__name__
+
+
+def test_async_routes_match_sync_calculation(client, db, project):
+    """非同期セッションで読み込んだ計算結果は同期セッションでの計算と一致する"""
+    member = Member(project_id=project.id, name="担当者", available_hours_per_week=40)
+    db.add(member)
+    db.flush()
+    db.add_all([
+        Task(
+            project_id=project.id, name="設計", planned_hours=40.0, progress=50.0, actual_hours=30.0,
+            assigned_member_id=member.id,
+            planned_start_date=datetime(2026, 1, 5), planned_end_date=datetime(2026, 1, 16),
+        ),
+        Task(
+            project_id=project.id, name="実装", planned_hours=80.0, progress=10.0, actual_hours=8.0,
+            planned_start_date=datetime(2026, 1, 12), planned_end_date=datetime(2026, 2, 6),
+        ),
+    ])
+    db.commit()
+
+    as_of = "2026-01-14T00:00:00"
+    expected = EVMCalculator(db, project.id).calculate_all(datetime(2026, 1, 14))
+    metrics = client.get(f"/api/evm/projects/{project.id}/metrics", params={"as_of_date": as_of}).json()
+    assert {k: metrics[k] for k in ("pv", "ev", "ac", "bac", "spi", "cpi")} == {
+        k: expected[k] for k in ("pv", "ev", "ac", "bac", "spi", "cpi")
+    }
+
+    breakdown = client.get(
+        f"/api/evm/projects/{project.id}/breakdown", params={"group_by": "member", "as_of_date": as_of}
+    ).json()
+    assert {item["label"]: item["bac"] for item in breakdown} == {"担当者": 40.0, "未割当": 80.0}
+    assert round(sum(item["pv"] for item in breakdown), 1) == round(expected["pv"], 1)
+
+    detail = client.get(f"/api/projects/{project.id}").json()
+    assert detail["budget"] == 120.0
+    assert client.get("/api/projects/999999").status_code == 404
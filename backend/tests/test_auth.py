@@ -0,0 +1,30 @@
+import time
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import auth
+
+
+def test_user_resolved_across_allowlist_change_is_not_cached(db, user, monkeypatch):
+    """照会中に許可リストが変更された場合、変更前の判定結果をキャッシュしない"""
+    payload = {"email": user.email, "sub": "uid", "exp": time.time() + 3600}
+    monkeypatch.setattr(auth, "verify_supabase_token", lambda token: payload)
+
+    def resolve_during_allowlist_change(session, token_payload):
+        # 許可リストチェックの後、キャッシュ登録までの間に許可リストが削除された場合を再現
+        resolved = session.query(auth.User).filter(auth.User.email == token_payload["email"]).first()
+        auth.clear_token_cache()
+        return resolved
+
+    monkeypatch.setattr(auth, "_resolve_user", resolve_during_allowlist_change)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="token-during-change")
+    try:
+        assert auth.get_current_user(credentials, db).id == user.id
+        assert auth._token_cache.get("token-during-change") is None
+
+        # 変更のない照会はキャッシュされる
+        monkeypatch.setattr(auth, "_resolve_user", lambda session, token_payload: user)
+        auth.get_current_user(credentials, db)
+        assert auth._token_cache.get("token-during-change") is not None
+    finally:
+        auth.clear_token_cache()
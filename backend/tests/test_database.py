@@ -0,0 +1,25 @@
+from app.core import database
+from app.core.config import settings
+
+
+def test_default_sqlite_settings_fit_memory_budget():
+    """既定のプール・キャッシュ設定は、同期・非同期の両エンジンの全接続を合わせてもメモリ予算に収まる"""
+    assert database.sqlite_memory_budget_bytes() <= settings.SQLITE_MEMORY_BUDGET_MB * 1024 * 1024
+    assert database.check_sqlite_memory_budget("sqlite:///./evm.db")
+
+
+def test_default_sqlite_pool_covers_dashboard_burst():
+    """ダッシュボードが並列に発行するリクエスト（最大8件）は接続待ちにならない"""
+    assert settings.SQLITE_POOL_SIZE + settings.SQLITE_MAX_OVERFLOW >= 8
+
+
+def test_oversized_sqlite_settings_are_reported(monkeypatch):
+    """予算を超える設定は起動時の確認で検出する"""
+    monkeypatch.setattr(settings, "SQLITE_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "SQLITE_MAX_OVERFLOW", 5)
+    monkeypatch.setattr(settings, "SQLITE_CACHE_SIZE_KB", 8192)
+    monkeypatch.setattr(settings, "SQLITE_MMAP_SIZE", 64 * 1024 * 1024)
+
+    assert database.sqlite_memory_budget_bytes() == 2 * 10 * 8 * 1024 * 1024 + 64 * 1024 * 1024
+    assert not database.check_sqlite_memory_budget("sqlite:///./evm.db")
+    assert database.check_sqlite_memory_budget("postgresql://user@localhost/evm")
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models import Task
+from app.models.evm_snapshot import EVMSnapshot
+from app.models.project import ProjectStatus
+from app.services.snapshot_scheduler import get_due_project_ids
+
+
+def test_backfill_records_pv_only(client, db, project):
+    """過去日の一括作成はPVのみを記録し、現在のEV・ACを過去日に記録しない"""
+    db.add(Task(
+        project_id=project.id, name="タスク", planned_hours=100.0, progress=80.0, actual_hours=90.0,
+        planned_start_date=datetime(2026, 1, 5), planned_end_date=datetime(2026, 1, 30),
+    ))
+    project.status = ProjectStatus.IN_PROGRESS
+    db.commit()
+
+    response = client.post(
+        f"/api/evm/projects/{project.id}/snapshots/backfill",
+        params={"start_date": "2026-01-05", "end_date": "2026-01-09"},
+    )
+    assert response.status_code == 200
+    assert response.json()["created_count"] == 5
+
+    snapshots = client.get(f"/api/evm/projects/{project.id}/snapshots").json()
+    assert [s["pv"] for s in snapshots] == [5.0, 10.0, 15.0, 20.0, 25.0]
+    for snapshot in snapshots:
+        assert all(snapshot[key] is None for key in ("ev", "ac", "sv", "cv", "spi", "cpi", "eac", "etc"))
+
+    # PVのみのスナップショットは定期作成の判定に数えない
+    assert get_due_project_ids(db, timedelta(days=1), datetime.now(timezone.utc)) == [project.id]
+
+    response = client.get(f"/api/evm/projects/{project.id}/export", params={"format": "markdown"})
+    assert response.status_code == 200
+    assert "| 2026-01-05 | 5.0h | - | - | - | - |" in response.text
+
+
+def test_overwrite_backfill_keeps_measured_snapshots(client, db, project):
+    """overwrite で置き換えるのはPVのみのスナップショットだけで、EV・ACを記録したスナップショットは残す"""
+    db.add(Task(
+        project_id=project.id, name="タスク", planned_hours=100.0,
+        planned_start_date=datetime(2026, 1, 5), planned_end_date=datetime(2026, 1, 30),
+    ))
+    db.add(EVMSnapshot(
+        project_id=project.id, date=datetime(2026, 1, 7), pv=15.0, ev=12.0, ac=14.0,
+        sv=-3.0, cv=-2.0, spi=0.8, cpi=0.857,
+    ))
+    db.commit()
+
+    params = {"start_date": "2026-01-05", "end_date": "2026-01-09"}
+    url = f"/api/evm/projects/{project.id}/snapshots/backfill"
+    assert client.post(url, params=params).json()["created_count"] == 4
+    response = client.post(url, params={**params, "overwrite": True}).json()
+    assert (response["created_count"], response["skipped_count"]) == (4, 1)
+
+    snapshots = client.get(f"/api/evm/projects/{project.id}/snapshots").json()
+    assert len(snapshots) == 5
+    measured = [s for s in snapshots if s["ev"] is not None]
+    assert [(s["date"][:10], s["ev"], s["ac"]) for s in measured] == [("2026-01-07", 12.0, 14.0)]
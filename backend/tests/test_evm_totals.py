@@ -0,0 +1,38 @@
+from sqlalchemy import event
+
+from app.core.database import SessionLocal
+from app.models import Task
+from app.services.evm_totals import EVMTotals, get_evm_totals, invalidate_evm_totals, load_evm_totals
+
+
+def test_read_between_commit_and_cache_update(client, db, project):
+    """書き込みのコミット直後に別リクエストの読み込みが割り込んでも二重計上しない"""
+    task = Task(project_id=project.id, name="タスク", planned_hours=10.0, progress=0.0)
+    db.add(task)
+    db.commit()
+
+    def read_after_commit(session):
+        if session is not db:
+            get_evm_totals(db, project.id)
+
+    event.listen(SessionLocal, "after_commit", read_after_commit)
+    try:
+        # 未キャッシュの状態で書き込む（割り込んだ読み込みがコミット後の値をキャッシュする）
+        invalidate_evm_totals(project.id)
+        response = client.patch(f"/api/tasks/{task.id}/progress", params={"progress": 50})
+        assert response.status_code == 200
+        assert get_evm_totals(db, project.id) == EVMTotals(10.0, 5.0, 0.0)
+
+        # 未キャッシュの状態で書き込む（割り込んだ読み込みがコミット後の値をキャッシュする）
+        invalidate_evm_totals(project.id)
+        response = client.post("/api/tasks/", json={"project_id": project.id, "name": "追加", "planned_hours": 4.0})
+        assert response.status_code == 200
+        assert get_evm_totals(db, project.id) == EVMTotals(14.0, 5.0, 0.0)
+
+        # 未キャッシュの状態で書き込む（割り込んだ読み込みがコミット後の値をキャッシュする）
+        invalidate_evm_totals(project.id)
+        response = client.delete(f"/api/tasks/{task.id}")
+        assert response.status_code == 200
+        assert get_evm_totals(db, project.id) == load_evm_totals(db, project.id) == EVMTotals(4.0, 0.0, 0.0)
+    finally:
+        event.remove(SessionLocal, "after_commit", read_after_commit)
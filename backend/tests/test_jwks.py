@@ -0,0 +1,139 @@
+import asyncio
+import io
+import json
+import threading
+import time
+
+import jwt
+import pytest
+
+from app.core import jwks as jwks_module
+from app.core.jwks import JWKSKeyStore, JWKSUnavailableError, generate_local_jwks
+
+
+class _FakeURLOpen:
+    """JWKSの取得（urlopen）の呼び出し回数を数える"""
+
+    def __init__(self, jwks: dict, delay: float = 0.0):
+        self.body = json.dumps(jwks).encode("utf-8")
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, url, timeout=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return io.BytesIO(self.body)
+
+
+async def _wait_until(predicate, timeout: float = 5.0) -> None:
+    """predicate が真になるまで待つ（固定のsleepに依存しない）"""
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    assert predicate()
+
+
+def _resolves(store: JWKSKeyStore, token: str) -> bool:
+    try:
+        store.get_signing_key(token)
+    except JWKSUnavailableError:
+        return False
+    return True
+
+
+def _token(private_key, kid: str) -> str:
+    return jwt.encode({"sub": "user"}, private_key, algorithm="ES256", headers={"kid": kid})
+
+
+def test_missing_keys_do_not_fetch_on_request(monkeypatch):
+    """鍵がない場合もリクエスト処理中にネットワークから取得しない"""
+    private_key, jwks = generate_local_jwks("k1")
+    fake = _FakeURLOpen(jwks, delay=5)
+    monkeypatch.setattr(jwks_module.urllib.request, "urlopen", fake)
+    store = JWKSKeyStore(jwks_url="https://example.invalid/jwks.json")
+
+    started = time.monotonic()
+    with pytest.raises(JWKSUnavailableError):
+        store.get_signing_key(_token(private_key, "k1"))
+    assert time.monotonic() - started < 1
+    assert fake.calls == 0
+
+
+def test_concurrent_fetch_downloads_once(monkeypatch):
+    """ロック待ちのスレッドは、待っている間に取得された鍵を使う"""
+    _, jwks = generate_local_jwks("k1")
+    fake = _FakeURLOpen(jwks)
+    monkeypatch.setattr(jwks_module.urllib.request, "urlopen", fake)
+    store = JWKSKeyStore(jwks_url="https://example.invalid/jwks.json")
+
+    # 全スレッドが取得を要求してロック待ちになってから取得を始める
+    threads = [threading.Thread(target=store.fetch) for _ in range(5)]
+    with store._fetch_lock:
+        for thread in threads:
+            thread.start()
+        time.sleep(0.5)
+    for thread in threads:
+        thread.join()
+
+    assert fake.calls == 1
+    assert store.has_keys
+
+
+def test_background_refresh_on_unknown_kid(monkeypatch):
+    """
+    未知の kid は取得が済むまで再試行可能なエラー（503）とし、ログアウトさせない
+    取得後は新しい鍵で検証でき、取得後も見つからない kid は不正なトークン（401）
+    """
+    _, old_jwks = generate_local_jwks("old")
+    new_key, new_jwks = generate_local_jwks("new")
+    forged_key, _ = generate_local_jwks("forged")
+    fake = _FakeURLOpen(old_jwks)
+    monkeypatch.setattr(jwks_module.urllib.request, "urlopen", fake)
+    store = JWKSKeyStore(
+        jwks_url="https://example.invalid/jwks.json",
+        refresh_interval_seconds=3600,
+        min_refetch_seconds=0.5,
+    )
+
+    async def scenario():
+        store.start_background_refresh()
+        try:
+            await _wait_until(lambda: store.has_keys)
+
+            # 鍵のローテーション後のトークン
+            fake.body = json.dumps(new_jwks).encode("utf-8")
+            token = _token(new_key, "new")
+            for _ in range(10):
+                with pytest.raises(JWKSUnavailableError):
+                    store.get_signing_key(token)
+            # 最短間隔が経過するまでは取得しない
+            assert fake.calls == 1
+
+            await _wait_until(lambda: _resolves(store, token))
+            assert store.get_signing_key(token).key_id == "new"
+            assert fake.calls == 2
+
+            # 取得後も見つからない kid は不正なトークン
+            forged = _token(forged_key, "forged")
+            with pytest.raises(JWKSUnavailableError):
+                store.get_signing_key(forged)
+            await _wait_until(lambda: fake.calls == 3 and not store._pending_kids)
+            with pytest.raises(jwt.InvalidTokenError):
+                store.get_signing_key(forged)
+        finally:
+            await store.stop_background_refresh()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_kid_without_background_refresh_is_invalid():
+    """バックグラウンドでの取得をしない場合、未知の kid は待たずに不正なトークン"""
+    _, jwks = generate_local_jwks("k1")
+    other_key, _ = generate_local_jwks("k2")
+    store = JWKSKeyStore()
+    store.load_jwks(jwks)
+
+    with pytest.raises(jwt.InvalidTokenError):
+        store.get_signing_key(_token(other_key, "k2"))
@@ -0,0 +1,36 @@
+from datetime import date
+
+from app.services.pv_engine import PlannedValueEngine
+from app.services.working_calendar import WorkingCalendar
+
+
+def _engine(calendar: WorkingCalendar) -> PlannedValueEngine:
+    # 2026-01-05（月）〜 2026-01-30（金）の20稼働日・100時間のタスク
+    return PlannedValueEngine.from_rows(
+        calendar, [(100.0, date(2026, 1, 5), date(2026, 1, 30))]
+    )
+
+
+def test_curve_prorates_by_working_days():
+    engine = _engine(WorkingCalendar([]))
+    assert engine.curve([date(2026, 1, 4), date(2026, 1, 5), date(2026, 1, 16), date(2026, 2, 1)]).tolist() == [
+        0.0, 5.0, 50.0, 100.0,
+    ]
+
+
+def test_index_rebuilt_with_earlier_origin():
+    """索引がより前の起点で作り直されてもPVが変わらない"""
+    calendar = WorkingCalendar([])
+    engine = _engine(calendar)
+
+    calendar.count_working_days(date(2020, 1, 1), date(2020, 1, 2))
+
+    assert engine.curve([date(2026, 1, 5)]).tolist() == [5.0]
+    assert engine.curve([date(2023, 1, 1), date(2026, 1, 5)]).tolist() == [0.0, 5.0]
+
+
+def test_holidays_are_excluded():
+    calendar = WorkingCalendar([date(2026, 1, 12)])
+    engine = _engine(calendar)
+    # 19稼働日のうち5日目（1/9）まで
+    assert engine.curve([date(2026, 1, 9)]).tolist() == [100.0 * 5 / 19]
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import Project
+from app.models.evm_snapshot import EVMSnapshot
+from app.models.project import ProjectStatus
+from app.services import snapshot_scheduler
+from app.services.evm_calculator import EVMCalculator
+
+
+@pytest.fixture
+def projects(db):
+    projects = [
+        Project(
+            name=f"プロジェクト{i}", status=ProjectStatus.IN_PROGRESS,
+            start_date=datetime(2026, 1, 1), end_date=datetime(2026, 12, 31),
+        )
+        for i in range(3)
+    ]
+    db.add_all(projects)
+    db.commit()
+    return [p.id for p in projects]
+
+
+def _snapshot_project_ids(db):
+    db.expire_all()
+    return sorted(row[0] for row in db.query(EVMSnapshot.project_id).all())
+
+
+def test_calculation_error_skips_only_that_project(db, projects, monkeypatch):
+    """計算に失敗したプロジェクトのみスキップし、同じバッチの他のプロジェクトは作成する"""
+    failing = projects[1]
+    calculate_all = EVMCalculator.calculate_all
+
+    def calculate_or_fail(self, as_of_date=None):
+        if self.project_id == failing:
+            raise ValueError("broken project")
+        return calculate_all(self, as_of_date)
+
+    monkeypatch.setattr(EVMCalculator, "calculate_all", calculate_or_fail)
+
+    assert snapshot_scheduler.run_snapshot_job(timedelta(days=1), batch_size=10) == 2
+    assert _snapshot_project_ids(db) == [projects[0], projects[2]]
+
+
+def test_insert_error_retries_batch_one_by_one(db, projects, monkeypatch):
+    """一括INSERTが失敗した場合は1件ずつ再試行し、失敗した行のみスキップする"""
+    failing = projects[0]
+    to_snapshot_row = EVMCalculator.to_snapshot_row
+
+    def invalid_row(self, metrics):
+        row = to_snapshot_row(self, metrics)
+        if self.project_id == failing:
+            row["date"] = "invalid"  # DateTime列に変換できない値
+        return row
+
+    monkeypatch.setattr(EVMCalculator, "to_snapshot_row", invalid_row)
+
+    assert snapshot_scheduler.run_snapshot_job(timedelta(days=1), batch_size=10) == 2
+    assert _snapshot_project_ids(db) == [projects[1], projects[2]]
@@ -0,0 +1,154 @@
+from app.core.token_cache import TokenCache
+from app.models import Task
+from app.services import wbs_import
+from app.services.wbs_import import WBSImportService
+
+CSV_HEADER = "WBS番号,タスク名,タスク種別,予定工数,予定開始日,予定終了日,担当者,先行タスク,説明,固定日付\n"
+
+
+def _csv(*names: str) -> bytes:
+    rows = "".join(f"{i},{name},PG,8,,,,,,\n" for i, name in enumerate(names, start=1))
+    return (CSV_HEADER + rows).encode("utf-8-sig")
+
+
+def _task_names(db, project_id):
+    db.expire_all()
+    return [t.name for t in db.query(Task).filter(Task.project_id == project_id).order_by(Task.id)]
+
+
+def _preview(client, project_id, content):
+    response = client.post(
+        f"/api/tasks/project/{project_id}/import-excel/preview",
+        files={"file": ("wbs.csv", content, "text/csv")},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_token_with_different_file_imports_the_file(client, db, project):
+    """プレビュー後に選び直したファイルは、プレビュー時のパース結果ではなくファイルの内容でインポートする"""
+    token = _preview(client, project.id, _csv("プレビューしたタスク"))["import_token"]
+    assert token
+
+    response = client.post(
+        f"/api/tasks/project/{project.id}/import-excel",
+        data={"import_token": token},
+        files={"file": ("wbs.csv", _csv("選び直したタスク"), "text/csv")},
+    )
+    assert response.status_code == 200
+    assert response.json()["success"]
+    assert _task_names(db, project.id) == ["選び直したタスク"]
+
+
+def test_token_only_import_and_expiry(client, db, project):
+    """インポートトークンのみで実行でき、キャッシュにない場合は410"""
+    token = _preview(client, project.id, _csv("タスクA", "タスクB"))["import_token"]
+
+    response = client.post(f"/api/tasks/project/{project.id}/import-excel", data={"import_token": token})
+    assert response.status_code == 200
+    assert _task_names(db, project.id) == ["タスクA", "タスクB"]
+
+    # 成功したインポートのキャッシュは破棄される
+    response = client.post(f"/api/tasks/project/{project.id}/import-excel", data={"import_token": token})
+    assert response.status_code == 410
+
+
+def test_cached_tasks_are_not_shared(db, project):
+    """キャッシュしたタスクをリクエストごとに書き換えても他のリクエストに影響しない"""
+    service = WBSImportService(db, project.id)
+    token = service.preview(_csv("タスク"), "csv")["import_token"]
+
+    tasks = wbs_import._cached_import_tasks(service._cache_key(token))
+    tasks[0].assigned_member_id = 999
+    tasks[0].name = "変更"
+
+    again = wbs_import._cached_import_tasks(service._cache_key(token))
+    assert again[0].assigned_member_id is None
+    assert again[0].name == "タスク"
+
+
+def test_cache_bounded_by_total_weight():
+    cache: TokenCache[str] = TokenCache(max_size=8, max_ttl_seconds=60, max_weight=100)
+    assert cache.set("a", "a", weight=60)
+    assert cache.set("b", "b", weight=30)
+    assert cache.set("c", "c", weight=30)
+    # 合計が上限を超えたため最も古いエントリを削除
+    assert cache.get("a") is None
+    assert cache.get("b") == "b" and cache.get("c") == "c"
+    # 1件で上限を超えるエントリは保持しない
+    assert not cache.set("d", "d", weight=101)
+    assert len(cache) == 2
+
+
+def test_diff_import_keeps_tasks_without_wbs_number(client, db, project):
+    """WBS番号のない既存タスク（番号導入前のインポート・画面から作成）をエクスポートから差分更新しても削除しない"""
+    db.add_all([
+        Task(project_id=project.id, name="設計", planned_hours=40.0, progress=50.0, actual_hours=20.0),
+        Task(project_id=project.id, name="実装", planned_hours=40.0, progress=50.0, actual_hours=10.0),
+    ])
+    db.commit()
+
+    exported = client.get(f"/api/tasks/project/{project.id}/export-excel")
+    assert exported.status_code == 200
+
+    response = client.post(
+        f"/api/tasks/project/{project.id}/import-excel",
+        data={"mode": "diff"},
+        files={"file": ("wbs.xlsx", exported.content, "application/octet-stream")},
+    )
+    body = response.json()
+    assert body["success"]
+    assert (body["inserted_count"], body["updated_count"], body["deleted_count"]) == (0, 0, 0)
+
+    db.expire_all()
+    tasks = db.query(Task).filter(Task.project_id == project.id).order_by(Task.id).all()
+    assert [(t.name, t.wbs_number, t.progress, t.actual_hours) for t in tasks] == [
+        ("設計", "1", 50.0, 20.0),
+        ("実装", "2", 50.0, 10.0),
+    ]
+
+
+def test_diff_import_refused_for_tasks_without_wbs_number(client, db, project):
+    """WBS番号のないタスクを推測した番号で照合せず、差分更新を拒否してプレビューで理由を返す"""
+    db.add_all([
+        Task(project_id=project.id, name="設計", planned_hours=40.0, progress=80.0, actual_hours=30.0),
+        Task(project_id=project.id, name="実装", planned_hours=40.0, progress=0.0, actual_hours=0.0),
+    ])
+    db.commit()
+
+    content = _csv("要件定義", "設計")
+    assert _preview(client, project.id, content)["diff_unavailable_reason"]
+
+    response = client.post(
+        f"/api/tasks/project/{project.id}/import-excel",
+        data={"mode": "diff"},
+        files={"file": ("wbs.csv", content, "text/csv")},
+    )
+    body = response.json()
+    assert not body["success"]
+    assert "WBS番号" in body["message"]
+
+    db.expire_all()
+    tasks = db.query(Task).filter(Task.project_id == project.id).order_by(Task.id).all()
+    assert [(t.name, t.wbs_number, t.progress, t.actual_hours) for t in tasks] == [
+        ("設計", None, 80.0, 30.0),
+        ("実装", None, 0.0, 0.0),
+    ]
+
+    # エクスポートで番号が確定した後は差分更新できる
+    assert client.get(f"/api/tasks/project/{project.id}/export-excel").status_code == 200
+    assert _preview(client, project.id, content)["diff_unavailable_reason"] is None
+
+
+def test_deleted_project_template_is_not_reused(client, db):
+    """削除したプロジェクトのIDが再利用されても、削除前のテンプレートを返さない"""
+    project_id = client.post("/api/projects/", json={"name": "削除するプロジェクト"}).json()["id"]
+    client.post("/api/members/", json={"project_id": project_id, "name": "担当者", "available_hours_per_week": 40})
+    etag = client.get(f"/api/tasks/project/{project_id}/template").headers["etag"]
+
+    assert client.delete(f"/api/projects/{project_id}").status_code == 200
+    assert client.post("/api/projects/", json={"name": "新しいプロジェクト"}).json()["id"] == project_id
+
+    response = client.get(f"/api/tasks/project/{project_id}/template", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from app.models import Member, Task
+from app.services.working_calendar import WorkingCalendar
+
+
+def test_extreme_dates_fall_back_to_busday_count():
+    """date.max・date.min 付近の日付でも例外にならず、索引を作らずに数える"""
+    calendar = WorkingCalendar([date(2026, 1, 1)])
+
+    expected = int(np.busday_count(
+        np.datetime64("2026-01-01"), np.datetime64("10000-01-01"), holidays=["2026-01-01"]
+    ))
+    assert calendar.count_working_days(date(2026, 1, 1), date(9999, 12, 31)) == expected
+    assert calendar.count_working_days(date(9999, 12, 1), date(9999, 12, 31)) == 23
+    assert calendar.count_working_days(date(1, 1, 1), date(1, 1, 31)) == 23
+
+    starts = np.array(["2026-01-01", "2026-01-05", "2026-01-09"], dtype="datetime64[D]")
+    ends = np.array(["9999-12-31", "2026-01-09", "2026-01-05"], dtype="datetime64[D]")
+    assert calendar.count_working_days_array(starts, ends).tolist() == [expected, 5, 0]
+
+    # 索引は上限の範囲でのみ作る
+    origin, prefix = calendar._index
+    assert len(prefix) <= WorkingCalendar.MAX_INDEX_DAYS + 2 * WorkingCalendar.INDEX_MARGIN_DAYS + 2
+    assert calendar.count_working_days(date(2026, 1, 1), date(2026, 1, 31)) == 21
+
+
+def test_task_ending_at_date_max_does_not_break_endpoints(client, db, project):
+    """終了日が 9999-12-31 のタスクがあってもEVM・稼働率のエンドポイントは応答する"""
+    member = Member(project_id=project.id, name="担当者", available_hours_per_week=40)
+    db.add(member)
+    db.flush()
+    db.add(Task(
+        project_id=project.id, name="長期タスク", planned_hours=100.0, assigned_member_id=member.id,
+        planned_start_date=datetime(2026, 1, 5), planned_end_date=datetime(9999, 12, 31),
+    ))
+    db.commit()
+
+    for path, params in (
+        (f"/api/evm/projects/{project.id}/metrics", {"as_of_date": "2026-06-01T00:00:00"}),
+        (f"/api/evm/projects/{project.id}/analysis", {}),
+        (f"/api/evm/projects/{project.id}/breakdown", {"group_by": "member"}),
+        (f"/api/members/project/{project.id}/evm", {}),
+        (f"/api/members/project/{project.id}/utilization", {"start_date": "2026-01-01", "end_date": "2026-01-31"}),
+    ):
+        response = client.get(path, params=params)
+        assert response.status_code == 200, (path, response.text)
@@ -1,6 +1,6 @@
 import axios from 'axios';
 import { supabase } from '../lib/supabase';
-import type { Project, ProjectCreate, Task, TaskCreate, EVMMetrics, EVMSnapshot, EVMAnalysis, Member, MemberWithUtilization, MemberCreate, MemberEVM, MemberWithSkills, MemberUtilizationDetail, Holiday, HolidayCreate, HolidayImportItem, HolidayGenerateRequest, WorkingDaysInfo, HolidayType, ReschedulePreviewResponse, RescheduleResponse, AutoSchedulePreviewResponse, AutoScheduleResponse, WBSImportPreviewResponse, WBSImportResponse, TaskOrderItem, TaskReorderResponse, InitCustomOrderResponse } from '../types';
+import type { Project, ProjectCreate, Task, TaskCreate, EVMMetrics, EVMSnapshot, EVMAnalysis, PVCurve, EVMBreakdownItem, EVMBreakdownGroupBy, Member, MemberWithUtilization, MemberCreate, MemberEVM, MemberWithSkills, MemberUtilizationDetail, Holiday, HolidayCreate, HolidayImportItem, HolidayGenerateRequest, WorkingDaysInfo, HolidayType, ReschedulePreviewResponse, RescheduleResponse, AutoSchedulePreviewResponse, AutoScheduleResponse, WBSImportPreviewResponse, WBSImportResponse, WBSImportMode, WBSFileFormat, WBSBulkImportResponse, TaskOrderItem, TaskReorderResponse, InitCustomOrderResponse } from '../types';
 
 const api = axios.create({
   baseURL: '/api',
@@ -189,6 +189,14 @@ export const tasksApi = {
     return data;
   },
 
+  exportExcel: async (projectId: number, format: WBSFileFormat = 'xlsx'): Promise<Blob> => {
+    const { data } = await api.get(`/tasks/project/${projectId}/export-excel`, {
+      params: { format },
+      responseType: 'blob',
+    });
+    return data;
+  },
+
   importExcelPreview: async (projectId: number, file: File): Promise<WBSImportPreviewResponse> => {
     const formData = new FormData();
     formData.append('file', file);
@@ -198,10 +206,44 @@ export const tasksApi = {
     return data;
   },
 
-  importExcel: async (projectId: number, file: File): Promise<WBSImportResponse> => {
+  importExcel: async (projectId: number, file: File, importToken?: string | null, mode: WBSImportMode = 'replace'): Promise<WBSImportResponse> => {
+    const post = async (withFile: boolean) => {
+      const formData = new FormData();
+      formData.append('mode', mode);
+      if (withFile) {
+        formData.append('file', file);
+      } else if (importToken) {
+        formData.append('import_token', importToken);
+      }
+      const { data } = await api.post(`/tasks/project/${projectId}/import-excel`, formData, {
+        headers: { 'Content-Type': 'multipart/form-data' },
+      });
+      return data;
+    };
+
+    if (!importToken) {
+      return post(true);
+    }
+    // プレビュー時のパース結果を使い、ファイルは送らない（サーバー側で期限切れの場合のみファイルを送り直す）
+    try {
+      return await post(false);
+    } catch (err) {
+      if (axios.isAxiosError(err) && err.response?.status === 410) {
+        return post(true);
+      }
+      throw err;
+    }
+  },
+
+  // 複数シートの一括インポート（sheetProjects 省略時はプロジェクト名と同名のシートが対象）
+  importExcelBulk: async (file: File, sheetProjects?: Record<string, number>, mode: WBSImportMode = 'replace'): Promise<WBSBulkImportResponse> => {
     const formData = new FormData();
     formData.append('file', file);
-    const { data } = await api.post(`/tasks/project/${projectId}/import-excel`, formData, {
+    formData.append('mode', mode);
+    if (sheetProjects) {
+      formData.append('sheet_projects', JSON.stringify(sheetProjects));
+    }
+    const { data } = await api.post('/tasks/import-excel/bulk', formData, {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
     return data;
@@ -239,6 +281,19 @@ export const evmApi = {
     return data;
   },
 
+  getPVCurve: async (projectId: number, startDate?: string, endDate?: string, interval: 'day' | 'week' = 'day'): Promise<PVCurve> => {
+    const params: Record<string, string> = { interval };
+    if (startDate) params.start_date = startDate;
+    if (endDate) params.end_date = endDate;
+    const { data } = await api.get(`/evm/projects/${projectId}/pv-curve`, { params });
+    return data;
+  },
+
+  getBreakdown: async (projectId: number, groupBy: EVMBreakdownGroupBy = 'member'): Promise<EVMBreakdownItem[]> => {
+    const { data } = await api.get(`/evm/projects/${projectId}/breakdown`, { params: { group_by: groupBy } });
+    return data;
+  },
+
   getAnalysis: async (projectId: number): Promise<EVMAnalysis> => {
     const { data } = await api.get(`/evm/projects/${projectId}/analysis`);
     return data;
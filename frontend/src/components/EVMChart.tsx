@@ -44,8 +44,9 @@ export function EVMChart({ snapshots }: EVMChartProps) {
               <CartesianGrid strokeDasharray="3 3" />
               <XAxis dataKey="date" />
               <YAxis />
+              {/* PVのみのスナップショット（過去日の一括作成）ではEV・ACの線を途切れさせる */}
               <Tooltip
-                formatter={(value: number) => `${value.toLocaleString()}h`}
+                formatter={(value: number | null) => (value == null ? '-' : `${value.toLocaleString()}h`)}
                 labelFormatter={(label) => `日付: ${label}`}
               />
               <Legend />
@@ -2,7 +2,7 @@ import { useState, useRef } from 'react';
 import { X, Download, Upload, AlertTriangle, CheckCircle, FileSpreadsheet } from 'lucide-react';
 import { useMutation, useQueryClient } from '@tanstack/react-query';
 import { tasksApi } from '../api/client';
-import type { WBSImportPreviewResponse, WBSImportPreviewTask } from '../types';
+import type { WBSFileFormat, WBSImportMode, WBSImportPreviewResponse, WBSImportPreviewTask } from '../types';
 
 interface Props {
   projectId: number;
@@ -14,23 +14,29 @@ export function WBSImportModal({ projectId, onClose }: Props) {
   const fileInputRef = useRef<HTMLInputElement>(null);
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [previewData, setPreviewData] = useState<WBSImportPreviewResponse | null>(null);
+  const [importMode, setImportMode] = useState<WBSImportMode>('replace');
   const [isDownloading, setIsDownloading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
+  // Blobをファイルとして保存
+  const saveBlob = (blob: Blob, filename: string) => {
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = filename;
+    document.body.appendChild(a);
+    a.click();
+    window.URL.revokeObjectURL(url);
+    document.body.removeChild(a);
+  };
+
   // テンプレートダウンロード
   const handleDownloadTemplate = async () => {
     setIsDownloading(true);
     setError(null);
     try {
       const blob = await tasksApi.downloadTemplate(projectId);
-      const url = window.URL.createObjectURL(blob);
-      const a = document.createElement('a');
-      a.href = url;
-      a.download = `wbs_template_${projectId}.xlsx`;
-      document.body.appendChild(a);
-      a.click();
-      window.URL.revokeObjectURL(url);
-      document.body.removeChild(a);
+      saveBlob(blob, `wbs_template_${projectId}.xlsx`);
     } catch (err) {
       setError('テンプレートのダウンロードに失敗しました');
       console.error(err);
@@ -39,6 +45,21 @@ export function WBSImportModal({ projectId, onClose }: Props) {
     }
   };
 
+  // 現在のタスクをエクスポート
+  const handleExport = async (format: WBSFileFormat = 'xlsx') => {
+    setIsDownloading(true);
+    setError(null);
+    try {
+      const blob = await tasksApi.exportExcel(projectId, format);
+      saveBlob(blob, `wbs_export_${projectId}.${format}`);
+    } catch (err) {
+      setError('エクスポートに失敗しました');
+      console.error(err);
+    } finally {
+      setIsDownloading(false);
+    }
+  };
+
   // プレビューmutation
   const previewMutation = useMutation({
     mutationFn: (file: File) => tasksApi.importExcelPreview(projectId, file),
@@ -54,7 +75,7 @@ export function WBSImportModal({ projectId, onClose }: Props) {
 
   // インポート実行mutation
   const importMutation = useMutation({
-    mutationFn: (file: File) => tasksApi.importExcel(projectId, file),
+    mutationFn: (file: File) => tasksApi.importExcel(projectId, file, previewData?.import_token, importMode),
     onSuccess: (data) => {
       if (data.success) {
         queryClient.invalidateQueries({ queryKey: ['tasks', projectId] });
@@ -87,10 +108,16 @@ export function WBSImportModal({ projectId, onClose }: Props) {
     }
   };
 
+  // WBS番号のないタスクがある場合は差分更新できない
+  const diffUnavailable = importMode === 'diff' && !!previewData?.diff_unavailable_reason;
+
   // インポート実行
   const handleImport = () => {
-    if (selectedFile && previewData?.success) {
-      if (confirm('既存のタスクは全て削除され、Excelファイルの内容で置き換えられます。\n\n実行してもよろしいですか？')) {
+    if (selectedFile && previewData?.success && !diffUnavailable) {
+      const message = importMode === 'diff'
+        ? 'WBS番号で既存のタスクと照合し、Excelにないタスクは削除されます（既存タスクの進捗・実績工数は保持されます）。\n\n実行してもよろしいですか？'
+        : '既存のタスクは全て削除され、Excelファイルの内容で置き換えられます。\n\n実行してもよろしいですか？';
+      if (confirm(message)) {
         importMutation.mutate(selectedFile);
       }
     }
@@ -124,38 +151,58 @@ export function WBSImportModal({ projectId, onClose }: Props) {
               <div className="text-sm text-yellow-700 dark:text-yellow-300">
                 <p className="font-medium">注意</p>
                 <p>インポートを実行すると、既存のタスクは全て削除され、Excelファイルの内容で置き換えられます。</p>
+                <p>差分更新を選ぶと、WBS番号が一致するタスクの進捗・実績工数は保持されます。</p>
               </div>
             </div>
           </div>
 
-          {/* ステップ1: テンプレートダウンロード */}
+          {/* ステップ1: テンプレートダウンロード・エクスポート */}
           <div className="mb-6">
             <h4 className="text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2">
-              ステップ1: テンプレートをダウンロード（任意）
+              ステップ1: テンプレート・現在のWBSをダウンロード（任意）
             </h4>
-            <button
-              onClick={handleDownloadTemplate}
-              disabled={isDownloading}
-              className="flex items-center gap-2 px-4 py-2 bg-green-600 text-white rounded-lg text-sm font-medium hover:bg-green-700 transition-colors disabled:opacity-50"
-            >
-              <Download className="w-4 h-4" />
-              {isDownloading ? 'ダウンロード中...' : 'テンプレートをダウンロード'}
-            </button>
+            <div className="flex flex-wrap gap-2">
+              <button
+                onClick={handleDownloadTemplate}
+                disabled={isDownloading}
+                className="flex items-center gap-2 px-4 py-2 bg-green-600 text-white rounded-lg text-sm font-medium hover:bg-green-700 transition-colors disabled:opacity-50"
+              >
+                <Download className="w-4 h-4" />
+                {isDownloading ? 'ダウンロード中...' : 'テンプレートをダウンロード'}
+              </button>
+              <button
+                onClick={() => handleExport()}
+                disabled={isDownloading}
+                className="flex items-center gap-2 px-4 py-2 border border-green-600 text-green-700 dark:text-green-400 rounded-lg text-sm font-medium hover:bg-green-50 dark:hover:bg-green-900/20 transition-colors disabled:opacity-50"
+              >
+                <Download className="w-4 h-4" />
+                現在のWBSをエクスポート
+              </button>
+              <button
+                onClick={() => handleExport('csv')}
+                disabled={isDownloading}
+                className="flex items-center gap-2 px-4 py-2 border border-green-600 text-green-700 dark:text-green-400 rounded-lg text-sm font-medium hover:bg-green-50 dark:hover:bg-green-900/20 transition-colors disabled:opacity-50"
+              >
+                <Download className="w-4 h-4" />
+                CSVでエクスポート
+              </button>
+            </div>
             <p className="mt-2 text-xs text-gray-500 dark:text-gray-400">
               プロジェクトのメンバー情報が含まれたExcelテンプレートをダウンロードできます。
+              現在のタスクをエクスポートして編集し、再度インポートすることもできます。
             </p>
           </div>
 
           {/* ステップ2: ファイル選択 */}
           <div className="mb-6">
             <h4 className="text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2">
-              ステップ2: Excelファイルを選択
+              ステップ2: Excel・CSVファイルを選択
             </h4>
             <div className="flex items-center gap-4">
               <input
                 ref={fileInputRef}
                 type="file"
-                accept=".xlsx,.xls"
+                accept=".xlsx,.xls,.csv,.parquet"
                 onChange={handleFileSelect}
                 className="hidden"
               />
@@ -179,6 +226,26 @@ export function WBSImportModal({ projectId, onClose }: Props) {
             <h4 className="text-sm font-semibold text-gray-700 dark:text-gray-300 mb-2">
               ステップ3: プレビュー
             </h4>
+            <div className="flex flex-wrap gap-4 mb-3 text-sm text-gray-700 dark:text-gray-300">
+              <label className="flex items-center gap-2">
+                <input
+                  type="radio"
+                  name="wbs-import-mode"
+                  checked={importMode === 'replace'}
+                  onChange={() => setImportMode('replace')}
+                />
+                全て置き換え
+              </label>
+              <label className="flex items-center gap-2">
+                <input
+                  type="radio"
+                  name="wbs-import-mode"
+                  checked={importMode === 'diff'}
+                  onChange={() => setImportMode('diff')}
+                />
+                差分更新（WBS番号で照合、進捗・実績を保持）
+              </label>
+            </div>
             <button
               onClick={handlePreview}
               disabled={!selectedFile || previewMutation.isPending}
@@ -212,6 +279,16 @@ export function WBSImportModal({ projectId, onClose }: Props) {
                 </div>
               )}
 
+              {/* 差分更新できない理由 */}
+              {diffUnavailable && (
+                <div className="mb-4 p-3 bg-yellow-50 dark:bg-yellow-900/20 border border-yellow-200 dark:border-yellow-800 rounded-lg">
+                  <div className="flex items-start gap-2">
+                    <AlertTriangle className="w-5 h-5 text-yellow-600 dark:text-yellow-400 mt-0.5 flex-shrink-0" />
+                    <p className="text-sm text-yellow-700 dark:text-yellow-300">{previewData.diff_unavailable_reason}</p>
+                  </div>
+                </div>
+              )}
+
               {/* 成功表示 */}
               {previewData.success && (
                 <div className="mb-4 p-3 bg-green-50 dark:bg-green-900/20 border border-green-200 dark:border-green-800 rounded-lg">
@@ -282,7 +359,7 @@ export function WBSImportModal({ projectId, onClose }: Props) {
           </button>
           <button
             onClick={handleImport}
-            disabled={!previewData?.success || importMutation.isPending}
+            disabled={!previewData?.success || diffUnavailable || importMutation.isPending}
             className="px-4 py-2 bg-blue-600 text-white rounded-lg text-sm font-medium hover:bg-blue-700 transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
           >
             {importMutation.isPending ? 'インポート中...' : 'インポート実行'}
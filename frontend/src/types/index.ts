@@ -97,6 +97,7 @@ export interface Task {
   is_milestone: boolean;  // 固定日付タスク（リスケジュール対象外）
   task_type?: TaskType;   // タスク種別（フェーズ）
   sort_order?: number;    // カスタム並び順
+  wbs_number?: string | null;  // WBS番号（Excelインポートでの照合用）
   // 予定スケジュール
   planned_start_date?: string;
   planned_end_date?: string;
@@ -146,15 +147,46 @@ export interface EVMSnapshot {
   project_id: number;
   date: string;
   pv: number;
+  // 過去日の一括作成で作成したスナップショットはPVのみ（以下はnull）
+  ev: number | null;
+  ac: number | null;
+  sv: number | null;
+  cv: number | null;
+  spi: number | null;
+  cpi: number | null;
+  eac?: number | null;
+  etc?: number | null;
+  created_at: string;
+}
+
+export interface PVCurvePoint {
+  date: string;
+  pv: number;
+}
+
+export interface PVCurve {
+  project_id: number;
+  interval: 'day' | 'week';
+  bac: number;
+  points: PVCurvePoint[];
+}
+
+export type EVMBreakdownGroupBy = 'member' | 'task_type' | 'parent';
+
+export interface EVMBreakdownItem {
+  key: string | null;
+  label: string;
+  task_count: number;
+  bac: number;
+  pv: number;
   ev: number;
   ac: number;
   sv: number;
   cv: number;
   spi: number;
   cpi: number;
-  eac?: number;
-  etc?: number;
-  created_at: string;
+  etc: number;
+  eac: number;
 }
 
 export interface EVMAnalysis {
@@ -347,11 +379,33 @@ export interface WBSImportPreviewResponse {
   errors: WBSImportError[];
   tasks: WBSImportPreviewTask[];
   total_count: number;
+  import_token?: string | null;
+  diff_unavailable_reason?: string | null;  // 差分更新できない場合の理由
 }
 
+// replace: 全削除→再作成, diff: WBS番号で照合して差分のみ反映
+export type WBSImportMode = 'replace' | 'diff';
+
+export type WBSFileFormat = 'xlsx' | 'csv' | 'parquet';
+
 export interface WBSImportResponse {
   success: boolean;
   message: string;
   errors: WBSImportError[];
   imported_count: number;
+  inserted_count: number;
+  updated_count: number;
+  deleted_count: number;
+}
+
+export interface WBSBulkImportSheetResult extends WBSImportResponse {
+  sheet_name: string;
+  project_id: number;
+  project_name: string;
+}
+
+export interface WBSBulkImportResponse {
+  success: boolean;
+  results: WBSBulkImportSheetResult[];
+  skipped_sheets: string[];
 }